@@ -0,0 +1,187 @@
+import json
+import operator
+import os
+import threading
+from bisect import bisect_right
+import numpy as np
+from core import clock
+from core.sharding import building_of
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(obj):
+    """Compact JSON bytes, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def encode_values(values):
+    """JSON number bytes for each value; null for NaN and infinities. Without orjson, to 8 significant digits."""
+    if not len(values):
+        return []
+    if orjson is not None:
+        # orjson writes non-finite floats as null
+        return orjson.dumps(values.tolist())[1:-1].split(b",")
+    texts = (b"%.8g," * len(values) % tuple(values.tolist()))[:-1].split(b",")
+    for i in np.flatnonzero(~np.isfinite(values)).tolist():
+        texts[i] = b"null"
+    return texts
+
+def encode_fault(fault):
+    return b',"fault":' + dumps(fault) + b"},"
+
+NO_FAULT = encode_fault(None)
+
+class SensorListing:
+    """
+    The `/sensors` response, kept encoded between requests.
+
+    Sensors are sorted by name once per sensor set, and each one's static fields (name, unit,
+    writable, type, protocols) are encoded once. An entry is three byte strings: the static
+    head, the value and the fault. After a tick, `refresh` re-encodes only the values reported
+    as changed (see ChangeTracker) and the faults that changed since the last refresh, so a
+    poll costs one join over the selected entries. `etag` changes whenever any entry does.
+    """
+    def __init__(self, registry, protocols):
+        self.registry = registry
+        self.protocols = protocols
+        self.names = None
+        self.version = 0
+        # Set by invalidate() so the next refresh rescans faults without waiting for a tick
+        self.stale = True
+        self.revision = 0
+        self._token = os.urandom(4).hex()
+        self._lock = threading.Lock()
+
+    @property
+    def etag(self):
+        return f'"{self._token}-{self.revision}"'
+
+    def invalidate(self):
+        """Call after changing faults outside a tick."""
+        self.stale = True
+
+    def _build(self, snapshot):
+        names = snapshot.names
+        order = sorted(range(len(names)), key=names.__getitem__)
+        self.names = names
+        self.sorted_names = [names[i] for i in order]
+        # Registry position -> position in the listing
+        self.rank = np.empty(len(names), dtype=np.intp)
+        self.rank[order] = np.arange(len(names))
+        self.order = np.array(order, dtype=np.intp)
+        self.sensors = [self.registry.get_sensor(name) for name in self.sorted_names]
+        self.types = [getattr(s, "simulation_type", "unknown") for s in self.sensors]
+        self.writable = np.array([bool(s.writable) for s in self.sensors], dtype=bool)
+        self.by_building, self.by_type = {}, {}
+        for j, name in enumerate(self.sorted_names):
+            self.by_building.setdefault(building_of(name), []).append(j)
+            self.by_type.setdefault(self.types[j], []).append(j)
+        self.by_building = {k: np.array(v, dtype=np.intp) for k, v in self.by_building.items()}
+        self.by_type = {k: np.array(v, dtype=np.intp) for k, v in self.by_type.items()}
+        self.heads = [
+            dumps({"name": s.name, "unit": s.unit, "writable": s.writable, "type": t,
+                   "protocols": self.protocols.get(s.name, [])})[:-1] + b',"value":'
+            for s, t in zip(self.sensors, self.types)
+        ]
+        self.values = [b"null"] * len(names)
+        self.faults = [None] * len(names)
+        self.fault_texts = [NO_FAULT] * len(names)
+        self.faulted = np.zeros(len(names), dtype=bool)
+        self._plan_positions = {}
+        self.body = None
+
+    def _current_faults(self):
+        """Per listing position: the sensor's own fault, else the first active batch plan covering it."""
+        faults = [s.fault for s in self.sensors]
+        now = clock.now()
+        for plan in self.registry.faults.plans():
+            if not plan.start <= now < plan.end:
+                continue
+            positions = self._plan_positions.get(plan.id)
+            if positions is None:
+                positions = self._plan_positions[plan.id] = self.rank[plan.select(self.names)].tolist()
+            for j in positions:
+                if faults[j] is None:
+                    faults[j] = {"type": plan.type, "value": plan.value, "plan": plan.id}
+        return faults
+
+    def refresh(self):
+        """Brings the entries up to the latest tick; returns the ETag."""
+        with self._lock:
+            snapshot = self.registry.snapshot()
+            if snapshot.version == self.version and snapshot.names is self.names and not self.stale:
+                return self.etag
+            if snapshot.names is not self.names:
+                self._build(snapshot)
+                self.version = 0
+            snapshot, changed = self.registry.changes_since(self.version)
+            self.stale = False
+            self.version = snapshot.version
+            dirty = len(changed) > 0
+            if len(changed) == len(self.values):
+                self.values = encode_values(snapshot.values[self.order])
+            else:
+                texts = self.values
+                for j, text in zip(self.rank[changed].tolist(), encode_values(snapshot.values[changed])):
+                    texts[j] = text
+            faults = self._current_faults()
+            if any(map(operator.is_not, self.faults, faults)):
+                for j, (old, new) in enumerate(zip(self.faults, faults)):
+                    if old is not new and old != new:
+                        self.fault_texts[j] = NO_FAULT if new is None else encode_fault(new)
+                        dirty = True
+                self.faulted = np.array([f is not None for f in faults], dtype=bool)
+            self.faults = faults
+            if dirty:
+                self.body = None
+                self.revision += 1
+            return self.etag
+
+    def _join(self, selected=None):
+        if selected is None:
+            heads, values, faults = self.heads, self.values, self.fault_texts
+        else:
+            heads = [self.heads[j] for j in selected]
+            values = [self.values[j] for j in selected]
+            faults = [self.fault_texts[j] for j in selected]
+        if not heads:
+            return b"[]"
+        parts = [None] * (3 * len(heads))
+        parts[0::3], parts[1::3], parts[2::3] = heads, values, faults
+        # Each fault part ends with "},"; the last comma becomes the closing bracket
+        return b"[" + b"".join(parts)[:-1] + b"]"
+
+    def page(self, building=None, type=None, writable=None, faulted=None, cursor=None, limit=None):
+        """(JSON array bytes, matching count, cursor of the next page or None), sorted by name."""
+        with self._lock:
+            n = len(self.heads)
+            start = bisect_right(self.sorted_names, cursor) if cursor is not None else 0
+            if building is None and type is None and writable is None and faulted is None:
+                selected = np.arange(start, n)
+            else:
+                keep = np.ones(n, dtype=bool)
+                keep[:start] = False
+                for group, key in ((self.by_building, building), (self.by_type, type)):
+                    if key is not None:
+                        mask = np.zeros(n, dtype=bool)
+                        mask[group.get(key, [])] = True
+                        keep &= mask
+                if writable is not None:
+                    keep &= self.writable == writable
+                if faulted is not None:
+                    keep &= self.faulted == faulted
+                selected = np.flatnonzero(keep)
+            total = len(selected)
+            next_cursor = None
+            if limit is not None and total > limit:
+                selected = selected[:limit]
+                next_cursor = self.sorted_names[selected[-1]]
+            if len(selected) == n:
+                if self.body is None:
+                    self.body = self._join()
+                return self.body, total, None
+            return self._join(selected.tolist()), total, next_cursor
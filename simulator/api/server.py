@@ -1,19 +1,43 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel, Field
+from typing import List, Optional
 import uvicorn
 import os
-import yaml
+import re
+from core.config_cache import load_yaml
+from core.faults import FaultPlan
+from api.listing import SensorListing
 
 app = FastAPI()
 _registry = None
 _protocols_cache = {}
+_listing = None
 
 @app.get("/")
 def read_root():
     count = len(_registry.sensors) if _registry else 0
     return {"status": "online", "sensor_count": count}
 
+@app.get("/simulation/stats")
+def simulation_stats():
+    if _registry is None:
+        raise HTTPException(status_code=503, detail="Registry not initialized")
+    if hasattr(_registry, "shard_stats"):
+        return {"shards": _registry.shard_stats()}
+    if _registry.scheduler is None:
+        raise HTTPException(status_code=404, detail="Simulation loop not running")
+    return _registry.scheduler.stats.report()
+
+@app.get("/mqtt/stats")
+def mqtt_stats():
+    """Publish rate, in-flight QoS 1 messages, backlog and latency of the sharded MQTT publisher."""
+    if _registry is None:
+        raise HTTPException(status_code=503, detail="Registry not initialized")
+    if _registry.mqtt is None:
+        raise HTTPException(status_code=404, detail="Sharded MQTT publisher not running")
+    return _registry.mqtt.stats()
+
 @app.get("/sensors/{sensor_name}")
 def read_sensor(sensor_name: str):
     if _registry is None:
@@ -25,7 +49,7 @@ def read_sensor(sensor_name: str):
     
     return {
         "name": sensor.name,
-        "value": sensor.value,
+        "value": _registry.get(sensor.name),
         "unit": sensor.unit,
         "fault": sensor.fault
     }
@@ -40,24 +64,24 @@ def load_protocols():
     modbus_path = os.path.join(base_dir, "config", "modbus_map.yaml")
     if os.path.exists(modbus_path):
         try:
-            with open(modbus_path, "r") as f:
-                modbus = yaml.safe_load(f) or {}
-                for section_name, section in modbus.items():
-                    if isinstance(section, dict):
-                        for addr, item in section.items():
-                            name = item.get("sensor")
-                            if name:
-                                protos = _protocols_cache.setdefault(name, [])
-                                type_map = {
-                                    "holding_registers": "HR",
-                                    "input_registers": "IR",
-                                    "discrete_inputs": "DI",
-                                    "coils": "CO"
-                                }
-                                prefix = type_map.get(section_name, section_name)
-                                label = f"Modbus {prefix}:{addr}"
-                                if label not in protos:
-                                    protos.append(label)
+            modbus = load_yaml(modbus_path) or {}
+            for section_name, section in modbus.items():
+                # `units` maps unit IDs to buildings, not addresses to sensors
+                if isinstance(section, dict) and section_name != "units":
+                    for addr, item in section.items():
+                        name = item.get("sensor")
+                        if name:
+                            protos = _protocols_cache.setdefault(name, [])
+                            type_map = {
+                                "holding_registers": "HR",
+                                "input_registers": "IR",
+                                "discrete_inputs": "DI",
+                                "coils": "CO"
+                            }
+                            prefix = type_map.get(section_name, section_name)
+                            label = f"Modbus {prefix}:{addr}"
+                            if label not in protos:
+                                protos.append(label)
         except Exception as e:
             print(f"Error loading modbus map: {e}")
 
@@ -65,49 +89,57 @@ def load_protocols():
     bacnet_path = os.path.join(base_dir, "config", "bacnet_map.yaml")
     if os.path.exists(bacnet_path):
         try:
-            with open(bacnet_path, "r") as f:
-                bacnet = yaml.safe_load(f) or {}
-                for obj_type, objects in bacnet.items():
-                    if isinstance(objects, dict):
-                        for instance, data in objects.items():
-                            name = data.get("sensor")
-                            if name:
-                                protos = _protocols_cache.setdefault(name, [])
-                                type_map = {
-                                    "analogValue": "AV",
-                                    "binaryValue": "BV",
-                                    "analogInput": "AI",
-                                    "binaryInput": "BI",
-                                    "multiStateValue": "MSV"
-                                }
-                                prefix = type_map.get(obj_type, obj_type)
-                                label = f"BACnet {prefix}:{instance}"
-                                if label not in protos:
-                                    protos.append(label)
+            bacnet = load_yaml(bacnet_path) or {}
+            for obj_type, objects in bacnet.items():
+                if isinstance(objects, dict):
+                    for instance, data in objects.items():
+                        name = data.get("sensor")
+                        if name:
+                            protos = _protocols_cache.setdefault(name, [])
+                            type_map = {
+                                "analogValue": "AV",
+                                "binaryValue": "BV",
+                                "analogInput": "AI",
+                                "binaryInput": "BI",
+                                "multiStateValue": "MSV"
+                            }
+                            prefix = type_map.get(obj_type, obj_type)
+                            label = f"BACnet {prefix}:{instance}"
+                            if label not in protos:
+                                protos.append(label)
         except Exception as e:
             print(f"Error loading bacnet map: {e}")
 
+def _invalidate_listing():
+    if _listing is not None:
+        _listing.invalidate()
+
 @app.get("/sensors")
-def list_sensors():
+def list_sensors(request: Request, building: Optional[str] = None, type: Optional[str] = None,
+                 writable: Optional[bool] = None, faulted: Optional[bool] = None, cursor: Optional[str] = None,
+                 limit: Optional[int] = Query(None, ge=1)):
+    """
+    Sensors sorted by name, optionally filtered. With `limit`, the `X-Next-Cursor` header holds
+    the `cursor` of the next page. Unchanged polls with `If-None-Match` get 304.
+    """
+    global _listing
     if _registry is None:
         return []
-    
+
     if not _protocols_cache:
         load_protocols()
+    if _listing is None or _listing.registry is not _registry:
+        _listing = SensorListing(_registry, _protocols_cache)
 
-    sensors_list = []
-    # Iterate over a copy of values to avoid runtime error if dict changes size
-    for s in list(_registry.sensors.values()):
-        sensors_list.append({
-            "name": s.name,
-            "value": s.value,
-            "unit": s.unit,
-            "writable": s.writable,
-            "type": getattr(s, "simulation_type", "unknown"),
-            "protocols": _protocols_cache.get(s.name, []),
-            "fault": s.fault
-        })
-    return sorted(sensors_list, key=lambda x: x["name"])
+    etag = _listing.refresh()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    body, total, next_cursor = _listing.page(building, type, writable, faulted, cursor, limit)
+    headers["X-Total-Count"] = str(total)
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(body, media_type="application/json", headers=headers)
 
 @app.get("/dashboard", response_class=HTMLResponse)
 def dashboard():
@@ -130,7 +162,8 @@ def inject_fault(sensor_name: str, fault: FaultInjection):
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
     
-    sensor.fault = {"type": fault.type, "value": fault.value}
+    sensor.set_fault(fault.type, fault.value)
+    _invalidate_listing()
     return {"status": "success", "name": sensor.name, "message": f"Fault {fault.type} injected"}
 
 @app.delete("/sensors/{sensor_name}/fault")
@@ -142,9 +175,73 @@ def clear_fault(sensor_name: str):
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
     
-    sensor.fault = None
+    sensor.clear_fault()
+    _invalidate_listing()
     return {"status": "success", "name": sensor.name, "message": "Fault cleared"}
 
+class FaultPlanSpec(BaseModel):
+    pattern: str
+    type: str
+    match: str = "glob"
+    value: Optional[float] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+    delay: Optional[float] = None
+    duration: Optional[float] = None
+    ramp: float = 0.0
+    drift_rate: float = 0.0
+
+@app.post("/faults")
+def add_fault_plans(plans: List[FaultPlanSpec]):
+    """Schedule a batch of pattern-based faults in one call."""
+    if _registry is None:
+        raise HTTPException(status_code=503, detail="Registry not initialized")
+
+    names = list(_registry.sensors)
+    try:
+        compiled = [FaultPlan.from_dict(p.model_dump()) for p in plans]
+    except (ValueError, re.error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results = []
+    for plan in compiled:
+        _registry.faults.add(plan)
+        _invalidate_listing()
+        results.append({**plan.to_dict(), "matched": len(plan.select(names))})
+    return {"status": "success", "plans": results}
+
+@app.get("/faults")
+def list_fault_plans():
+    if _registry is None:
+        raise HTTPException(status_code=503, detail="Registry not initialized")
+    return [plan.to_dict() for plan in _registry.faults.plans()]
+
+@app.delete("/faults/{plan_id}")
+def remove_fault_plan(plan_id: int):
+    if _registry is None:
+        raise HTTPException(status_code=503, detail="Registry not initialized")
+    if _registry.faults.remove(plan_id) is None:
+        raise HTTPException(status_code=404, detail="Fault plan not found")
+    _invalidate_listing()
+    return {"status": "success", "id": plan_id, "message": "Fault plan removed"}
+
+@app.delete("/faults")
+def clear_fault_plans():
+    if _registry is None:
+        raise HTTPException(status_code=503, detail="Registry not initialized")
+    _registry.faults.clear()
+    _invalidate_listing()
+    return {"status": "success", "message": "All fault plans cleared"}
+
+@app.get("/writes")
+def list_writes(since: int = 0, sensor: Optional[str] = None, protocol: Optional[str] = None, limit: int = 100):
+    """Protocol writes and relinquishes from the audit journal, oldest first; pass `next` back as `since`."""
+    if _registry is None:
+        raise HTTPException(status_code=503, detail="Registry not initialized")
+    journal = _registry.journal
+    entries = journal.query(since, sensor, protocol, max(0, min(limit, journal.capacity)))
+    return {"entries": entries, "next": entries[-1]["seq"] if entries else max(since, 0), **journal.stats()}
+
 class SensorUpdate(BaseModel):
     value: float
     priority: int = Field(16, ge=1, le=16)
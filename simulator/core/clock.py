@@ -0,0 +1,95 @@
+import threading
+import time
+
+class RealTimeClock:
+    """Wall-clock time; the default."""
+    mode = "realtime"
+
+    def now(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def wait(self, event, seconds):
+        """Sleep for `seconds` of simulated time unless `event` is set. Returns True if it was."""
+        return event.wait(seconds)
+
+class ScaledClock:
+    """Simulated time runs `scale` times faster than wall-clock time, starting at `start`."""
+    mode = "scaled"
+
+    def __init__(self, scale=60.0, start=None):
+        if scale <= 0:
+            raise ValueError("Clock scale must be positive")
+        self.scale = scale
+        self._origin_real = time.monotonic()
+        self._origin_sim = start if start is not None else time.time()
+
+    def now(self):
+        return self._origin_sim + self.monotonic()
+
+    def monotonic(self):
+        return (time.monotonic() - self._origin_real) * self.scale
+
+    def wait(self, event, seconds):
+        return event.wait(seconds / self.scale)
+
+class SteppedClock:
+    """
+    As-fast-as-possible stepping: time only moves when the simulation loop waits,
+    and waiting advances it instantly instead of sleeping.
+    """
+    mode = "step"
+
+    def __init__(self, start=None):
+        self._start = start if start is not None else time.time()
+        self._elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def now(self):
+        return self._start + self._elapsed
+
+    def monotonic(self):
+        return self._elapsed
+
+    def advance(self, seconds):
+        with self._lock:
+            self._elapsed += seconds
+
+    def wait(self, event, seconds):
+        if event.is_set():
+            return True
+        self.advance(seconds)
+        return False
+
+CLOCK_MODES = ("realtime", "scaled", "step")
+
+def make_clock(mode="realtime", scale=60.0, start=None):
+    if mode == "realtime":
+        return RealTimeClock()
+    if mode == "scaled":
+        return ScaledClock(scale, start)
+    if mode == "step":
+        return SteppedClock(start)
+    raise ValueError(f"Unknown clock mode '{mode}', expected one of {CLOCK_MODES}")
+
+_clock = RealTimeClock()
+
+def get_clock():
+    return _clock
+
+def set_clock(clock):
+    """Install the process-wide simulation clock. Call before sensors are created."""
+    global _clock
+    _clock = clock
+
+def now():
+    """Current simulation time (epoch seconds)."""
+    return _clock.now()
+
+def apply_clock_config(config):
+    """Installs a clock and RNG seed from a dict with mode/scale/start/seed keys."""
+    from core.sensors import set_seed
+    set_clock(make_clock(config.get("mode", "realtime"), config.get("scale", 60.0), config.get("start")))
+    set_seed(config.get("seed"))
@@ -0,0 +1,104 @@
+import datetime
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+CACHE_DIR = ".cache"
+
+_memo = {}
+_lock = threading.Lock()
+
+def _cache_path(path, digest):
+    directory = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    return directory, os.path.join(directory, f"{os.path.basename(path)}.{digest}.json")
+
+def _encode(obj):
+    """
+    Parsed YAML as JSON-safe data. Mappings with non-string keys (e.g. register addresses) and
+    dates are wrapped in single-key tagged objects that `_decode` turns back.
+    """
+    if isinstance(obj, dict):
+        if all(isinstance(k, str) for k in obj):
+            return {k: _encode(v) for k, v in obj.items()}
+        return {"__pairs__": [[_encode(k), _encode(v)] for k, v in obj.items()]}
+    if isinstance(obj, list):
+        return [_encode(v) for v in obj]
+    if isinstance(obj, datetime.datetime):
+        return {"__datetime__": obj.isoformat()}
+    if isinstance(obj, datetime.date):
+        return {"__date__": obj.isoformat()}
+    if obj is None or isinstance(obj, (str, int, float)):
+        return obj
+    raise TypeError(f"{type(obj).__name__} values are not cached")
+
+def _decode(obj):
+    if len(obj) == 1:
+        if "__pairs__" in obj:
+            return {k: v for k, v in obj["__pairs__"]}
+        if "__date__" in obj:
+            return datetime.date.fromisoformat(obj["__date__"])
+        if "__datetime__" in obj:
+            return datetime.datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+def _write_cache(path, cache_path, data):
+    directory = os.path.dirname(cache_path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(_encode(data), f, separators=(",", ":"))
+        os.replace(tmp, cache_path)
+        # Drop artifacts compiled from older versions of the same file, and pickles from older releases
+        for stale in glob.glob(os.path.join(directory, f"{glob.escape(os.path.basename(path))}.*.*")):
+            if stale != cache_path and stale.endswith((".json", ".pickle")):
+                os.remove(stale)
+    except (OSError, TypeError) as e:
+        logging.warning(f"Could not write config cache for {path}: {e}")
+
+def load_yaml(path):
+    """
+    Loads a YAML config file through a compiled cache keyed by the file's content hash:
+    the first load parses the YAML and writes it as JSON next to it under `.cache/`, later
+    loads (and other subsystems in the same process) skip YAML parsing entirely. The cache is
+    plain data, so a writable cache directory cannot inject code.
+    The returned object is shared between callers and must not be modified.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    with _lock:
+        if digest in _memo:
+            return _memo[digest]
+
+        _, cache_path = _cache_path(path, digest)
+        data = None
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path) as f:
+                    data = json.load(f, object_hook=_decode)
+            except (OSError, ValueError, TypeError) as e:
+                logging.warning(f"Ignoring unreadable config cache {cache_path}: {e}")
+        if data is None:
+            data = yaml.load(raw, Loader=SafeLoader)
+            _write_cache(path, cache_path, data)
+
+        _memo[digest] = data
+        return data
+
+def compile_configs(config_dir):
+    """Pre-builds the cache for every YAML file in `config_dir` (run by the config generator)."""
+    paths = sorted(glob.glob(os.path.join(config_dir, "*.yaml")))
+    for path in paths:
+        load_yaml(path)
+    return paths
@@ -1,9 +1,8 @@
-import yaml
+from core.config_cache import load_yaml
 from core.sensors import AnalogSensor, BinarySensor
 
 def load_sensors(path, registry):
-    with open(path) as f:
-        cfg = yaml.safe_load(f)
+    cfg = load_yaml(path)
 
     for s in cfg["sensors"]:
         if s["type"] == "analog":
@@ -0,0 +1,238 @@
+import ast
+import re
+import numpy as np
+
+# Functions usable in expressions; all operate element-wise on arrays
+FUNCTIONS = {
+    "abs": np.abs,
+    "min": np.minimum,
+    "max": np.maximum,
+    "clip": np.clip,
+    "where": np.where,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "sin": np.sin,
+    "cos": np.cos,
+}
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.USub, ast.UAdd,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+class _Normalizer(ast.NodeTransformer):
+    """Replaces sensor names with `_v[i]` and numbers with `_c[j]`, collecting both in order."""
+    def __init__(self):
+        self.names = []
+        self.constants = []
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+            raise ValueError(f"Unsupported function call: {ast.unparse(node)}")
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def visit_Name(self, node):
+        self.names.append(node.id)
+        return ast.Subscript(ast.Name("_v", ast.Load()), ast.Constant(len(self.names) - 1), ast.Load())
+
+    def visit_Constant(self, node):
+        if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+            raise ValueError(f"Unsupported constant: {node.value!r}")
+        self.constants.append(float(node.value))
+        return ast.Subscript(ast.Name("_c", ast.Load()), ast.Constant(len(self.constants) - 1), ast.Load())
+
+# Identifiers and numeric literals, in source order (the same order the AST visits them)
+TOKEN_RE = re.compile(r"[A-Za-z_]\w*|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_shapes = {}
+
+def _parse_tree(expression):
+    tree = ast.parse(expression, mode="eval")
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in expression '{expression}': {type(node).__name__}")
+    normalizer = _Normalizer()
+    shape = ast.unparse(normalizer.visit(tree))
+    return shape, normalizer.names, normalizer.constants
+
+def parse(expression):
+    """
+    Splits an expression into its shape (source with names and numbers replaced by placeholders),
+    the sensor names it reads and its numeric constants. Expressions with the same shape, e.g. the
+    per-building copies of one template, are evaluated together as one vectorized group.
+    """
+    tokens = TOKEN_RE.findall(expression)
+    key = TOKEN_RE.sub(lambda m: m.group() if m.group() in FUNCTIONS else "#", expression)
+    if key not in _shapes:
+        _shapes[key] = _parse_tree(expression)[0]
+    names = [t for t in tokens if not t[0].isdigit() and t[0] != "." and t not in FUNCTIONS]
+    constants = [float(t) for t in tokens if t[0].isdigit() or t[0] == "."]
+    return _shapes[key], names, constants
+
+class ExpressionGroup:
+    """Derived sensors sharing one expression shape: target positions plus gathered argument indices."""
+    def __init__(self, shape, members, sensors):
+        self.code = compile(shape, f"<derived: {shape}>", "eval")
+        self.idx = np.array([i for i, _, _ in members], dtype=np.intp)
+        # One row per argument/constant slot, one column per member
+        self.args = np.array([args for _, args, _ in members], dtype=np.intp).T.reshape(-1, len(members))
+        self.consts = np.array([consts for _, _, consts in members], dtype=float).T.reshape(-1, len(members))
+        self.min = np.array([_bound(sensors[i], "min", -np.inf) for i in self.idx], dtype=float)
+        self.max = np.array([_bound(sensors[i], "max", np.inf) for i in self.idx], dtype=float)
+
+    def evaluate(self, values, cols=None):
+        """Values of all members, or of the members at `cols`."""
+        if cols is None:
+            args, consts, low, high = self.args, self.consts, self.min, self.max
+        else:
+            args, consts, low, high = self.args[:, cols], self.consts[:, cols], self.min[cols], self.max[cols]
+        scope = dict(FUNCTIONS, _v=[values[a] for a in args], _c=list(consts))
+        result = np.broadcast_to(eval(self.code, {"__builtins__": {}}, scope), low.shape)
+        return np.clip(result.astype(float), low, high)
+
+def _bound(sensor, attr, default):
+    value = getattr(sensor, attr, None)
+    return default if value is None else value
+
+def _overridden(sensor):
+    priority = getattr(sensor, "priority_array", None)
+    return priority is not None and priority.count(None) != len(priority)
+
+def _faulted(sensor, value):
+    """A derived sensor's computed value with its own fault applied, as Sensor.update() does for base sensors."""
+    fault = sensor.fault
+    amount = fault.get("value")
+    if fault["type"] == "offset":
+        value += float(amount or 0.0)
+    elif fault["type"] == "noise":
+        extra = float(amount if amount is not None else 1.0)
+        value += sensor.rng.uniform(-extra, extra)
+    elif fault["type"] == "spike" and sensor.rng.random() < 0.05:
+        value += float(amount if amount is not None else (sensor.max - sensor.min) * 0.5)
+    return max(_bound(sensor, "min", -np.inf), min(_bound(sensor, "max", np.inf), value))
+
+class DerivedPlan:
+    """
+    Evaluation plan for all `simulation_type: derived` sensors of a registry layout.
+    Built once per layout: expressions are parsed, ordered topologically into levels (a level
+    only reads base sensors and earlier levels) and grouped by shape within each level.
+    `readers` maps each position to the derived sensors reading it, so a tick that changed a
+    few positions re-evaluates only the sensors downstream of them.
+    """
+    def __init__(self, names, sensors):
+        index = {n: i for i, n in enumerate(names)}
+        parsed = {}
+        for i, sensor in enumerate(sensors):
+            if getattr(sensor, "simulation_type", None) != "derived":
+                continue
+            expression = getattr(sensor, "expression", None)
+            if not expression:
+                raise ValueError(f"Derived sensor '{sensor.name}' has no expression")
+            shape, refs, consts = parse(expression)
+            missing = [r for r in refs if r not in index]
+            if missing:
+                raise ValueError(f"Derived sensor '{sensor.name}' references unknown sensors: {missing}")
+            parsed[i] = (shape, [index[r] for r in refs], consts)
+
+        self.targets = np.array(sorted(parsed), dtype=np.intp)
+        self.sensors = [sensors[i] for i in self.targets.tolist()]
+        self.levels = []
+        # Target position -> level number
+        self.level_of = {}
+        # Target position -> (level, group, column), and position -> targets reading it
+        self.member_of = {}
+        self.readers = {}
+        for i, (_, args, _) in parsed.items():
+            for a in set(args):
+                self.readers.setdefault(a, []).append(i)
+        for n, level in enumerate(self._levels(parsed, names)):
+            self.level_of.update((i, n) for i in level)
+            shapes = {}
+            for i in level:
+                shape, args, consts = parsed[i]
+                shapes.setdefault(shape, []).append((i, args, consts))
+            self.levels.append([ExpressionGroup(shape, members, sensors) for shape, members in shapes.items()])
+            for g, group in enumerate(self.levels[-1]):
+                self.member_of.update((i, (n, g, col)) for col, i in enumerate(group.idx.tolist()))
+        self._sensor_at = dict(zip(self.targets.tolist(), self.sensors))
+
+    @staticmethod
+    def _levels(parsed, names):
+        depth = {}
+        remaining = dict(parsed)
+        while remaining:
+            ready = [i for i, (_, args, _) in remaining.items()
+                     if all(a not in parsed or a in depth for a in args)]
+            if not ready:
+                cycle = sorted(names[i] for i in remaining)
+                raise ValueError(f"Derived sensors form a dependency cycle: {cycle}")
+            for i in ready:
+                args = remaining.pop(i)[1]
+                depth[i] = 1 + max((depth[a] for a in args if a in parsed), default=-1)
+
+        levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for i, d in sorted(depth.items()):
+            levels[d].append(i)
+        return levels
+
+    def __bool__(self):
+        return bool(self.levels)
+
+    def affected(self, positions):
+        """Derived sensors to re-evaluate after `positions` changed: those among them and everything downstream."""
+        found = set()
+        pending = positions.tolist()
+        while pending:
+            i = pending.pop()
+            if i in self.member_of:
+                found.add(i)
+            for reader in self.readers.get(i, ()):
+                if reader not in found:
+                    found.add(reader)
+                    pending.append(reader)
+        return found
+
+    def evaluate(self, values, positions=None):
+        """
+        Computes derived sensors in place in `values` and writes them back to the sensors: all of
+        them, or only those affected by a change at `positions`. Returns the evaluated positions.
+        """
+        targets = self.targets if positions is None else np.array(sorted(self.affected(positions)), dtype=np.intp)
+        if not len(targets):
+            return targets
+        # Per level and group: the columns to evaluate (None for the whole group)
+        cols = None
+        if len(targets) < len(self.targets):
+            cols = [[[] for _ in level] for level in self.levels]
+            for i in targets.tolist():
+                n, g, col = self.member_of[i]
+                cols[n][g].append(col)
+        sensors = [self._sensor_at[i] for i in targets.tolist()]
+
+        # Sensors with an active priority override or a freeze fault keep the value their update()
+        # produced; other faults are applied to the computed value before the next level reads it
+        held_idx, faulted = [], [[] for _ in self.levels]
+        for i, sensor in zip(targets.tolist(), sensors):
+            fault = getattr(sensor, "fault", None)
+            if _overridden(sensor) or (fault is not None and fault["type"] == "freeze"):
+                held_idx.append(i)
+            elif fault is not None:
+                faulted[self.level_of[i]].append((i, sensor))
+        held_values = values[held_idx]
+
+        for n, (level, level_faults) in enumerate(zip(self.levels, faulted)):
+            for g, group in enumerate(level):
+                if cols is None:
+                    values[group.idx] = group.evaluate(values)
+                elif cols[n][g]:
+                    selected = np.array(cols[n][g], dtype=np.intp)
+                    values[group.idx[selected]] = group.evaluate(values, selected)
+            for i, sensor in level_faults:
+                values[i] = _faulted(sensor, float(values[i]))
+            values[held_idx] = held_values
+
+        for sensor, value in zip(sensors, values[targets].tolist()):
+            sensor.value = value
+        return targets
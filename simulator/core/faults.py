@@ -0,0 +1,211 @@
+import fnmatch
+import itertools
+import re
+import threading
+import numpy as np
+from core import clock
+from core.sensors import stream_seed
+
+FAULT_TYPES = ("freeze", "offset", "drift", "noise", "spike")
+# Additive faults first; freeze last so it overrides everything else
+APPLY_ORDER = ("offset", "drift", "noise", "spike", "freeze")
+SPIKE_CHANCE = 0.05
+
+class FaultPlan:
+    """
+    One batch fault: every sensor whose name matches `pattern` (glob, or regex when
+    `regex=True`) gets fault `type` between `start` and `end` (epoch seconds, simulation clock).
+
+    - value: offset amount, noise amplitude, spike height, or freeze value (None holds the current value)
+    - ramp: seconds over which offset/noise/spike grow from 0 to full `value`
+    - drift_rate: units per second added from `start` onwards (type "drift")
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, pattern, type, value=None, start=None, end=None, ramp=0.0, drift_rate=0.0, regex=False):
+        if type not in FAULT_TYPES:
+            raise ValueError(f"Unknown fault type '{type}', expected one of {FAULT_TYPES}")
+        self.id = next(self._ids)
+        self.pattern = pattern
+        self.regex = regex
+        self.type = type
+        self.value = value
+        self.start = start if start is not None else clock.now()
+        self.end = end if end is not None else float("inf")
+        self.ramp = ramp or 0.0
+        self.drift_rate = drift_rate or 0.0
+        self._matcher = re.compile(pattern if regex else fnmatch.translate(pattern))
+
+    @classmethod
+    def from_dict(cls, spec):
+        """Builds a plan from API/config input; `delay`/`duration` are relative to now."""
+        spec = dict(spec)
+        now = clock.now()
+        delay = spec.pop("delay", None)
+        duration = spec.pop("duration", None)
+        if spec.get("start") is None and delay is not None:
+            spec["start"] = now + delay
+        if spec.get("end") is None and duration is not None:
+            spec["end"] = (spec.get("start") or now) + duration
+        spec["regex"] = spec.pop("match", "glob") == "regex" or spec.get("regex", False)
+        return cls(**spec)
+
+    def select(self, names):
+        return [i for i, name in enumerate(names) if self._matcher.fullmatch(name)]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "pattern": self.pattern,
+            "match": "regex" if self.regex else "glob",
+            "type": self.type,
+            "value": self.value,
+            "start": self.start,
+            "end": None if self.end == float("inf") else self.end,
+            "ramp": self.ramp,
+            "drift_rate": self.drift_rate,
+        }
+
+def _bound(sensor, attr, default):
+    value = getattr(sensor, attr, None)
+    return default if value is None else value
+
+class CompiledFaults:
+    """All (sensor, plan) pairs of one fault type as parallel arrays."""
+    def __init__(self, pairs, sensors):
+        self.idx = np.array([i for i, _ in pairs], dtype=np.intp)
+        plans = [p for _, p in pairs]
+        self.plan = np.array([p.id for p in plans], dtype=np.intp)
+        self.value = np.array([np.nan if p.value is None else p.value for p in plans], dtype=float)
+        self.start = np.array([p.start for p in plans], dtype=float)
+        self.end = np.array([p.end for p in plans], dtype=float)
+        self.ramp = np.array([p.ramp for p in plans], dtype=float)
+        self.drift_rate = np.array([p.drift_rate for p in plans], dtype=float)
+        self.min = np.array([_bound(sensors[i], "min", -np.inf) for i in self.idx], dtype=float)
+        self.max = np.array([_bound(sensors[i], "max", np.inf) for i in self.idx], dtype=float)
+        # Filled from FaultEngine._held, which outlives recompiles
+        self.held = np.full(len(self.idx), np.nan)
+
+class FaultEngine:
+    """
+    Applies batch fault plans to a tick's value array in one vectorized pass per fault type.
+    Plans are compiled against the registry layout into index arrays once, and recompiled
+    only when plans are added or removed or the sensor set changes. Values captured by
+    freeze plans are kept by (plan id, sensor name), so a recompile does not re-capture them.
+    """
+    def __init__(self):
+        self._plans = {}
+        self._held = {}
+        self._compiled = None
+        self._compiled_for = None
+        self._lock = threading.Lock()
+        self.rng = np.random.default_rng(stream_seed("fault_engine"))
+
+    def __bool__(self):
+        return bool(self._plans)
+
+    def add(self, plan):
+        with self._lock:
+            self._plans[plan.id] = plan
+            self._compiled = None
+        return plan
+
+    def remove(self, plan_id):
+        with self._lock:
+            plan = self._plans.pop(plan_id, None)
+            self._held = {k: v for k, v in self._held.items() if k[0] != plan_id}
+            self._compiled = None
+        return plan
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            self._held.clear()
+            self._compiled = None
+
+    def plans(self):
+        return list(self._plans.values())
+
+    def _compile(self, names, sensors):
+        if self._compiled is not None and self._compiled_for is names:
+            return self._compiled
+        with self._lock:
+            by_type = {}
+            for plan in self._plans.values():
+                for i in plan.select(names):
+                    by_type.setdefault(plan.type, []).append((i, plan))
+            self._compiled = {t: CompiledFaults(pairs, sensors) for t, pairs in by_type.items()}
+            freeze = self._compiled.get("freeze")
+            if freeze is not None and self._held:
+                freeze.held[:] = [self._held.get((pid, names[i]), np.nan)
+                                  for pid, i in zip(freeze.plan.tolist(), freeze.idx.tolist())]
+            self._compiled_for = names
+        return self._compiled
+
+    def _expire(self, now):
+        expired = [pid for pid, p in self._plans.items() if p.end <= now]
+        for pid in expired:
+            self.remove(pid)
+
+    def positions(self, names, sensors, now):
+        """Positions covered by a plan active at `now`."""
+        compiled = self._compile(names, sensors)
+        idx = [c.idx[(now >= c.start) & (now < c.end)] for c in compiled.values()]
+        return np.unique(np.concatenate(idx)) if idx else np.empty(0, dtype=np.intp)
+
+    def apply(self, names, sensors, values, now=None):
+        """Returns a faulted copy of `values` (or `values` itself when no plan is active)."""
+        if not self._plans:
+            return values
+        if now is None:
+            now = clock.now()
+        self._expire(now)
+        compiled = self._compile(names, sensors)
+
+        out = None
+        for fault_type in APPLY_ORDER:
+            c = compiled.get(fault_type)
+            if c is None:
+                continue
+            active = (now >= c.start) & (now < c.end)
+            if not active.any():
+                continue
+            if out is None:
+                out = np.array(values, dtype=float)
+
+            sel = np.flatnonzero(active)
+            idx = c.idx[sel]
+            elapsed = now - c.start[sel]
+            ramp = c.ramp[sel]
+            factor = np.where(ramp > 0, np.clip(elapsed / np.where(ramp > 0, ramp, 1.0), 0.0, 1.0), 1.0)
+            value = c.value[sel]
+
+            if fault_type == "freeze":
+                held = c.held[sel]
+                unset = np.isnan(held)
+                held[unset] = out[idx[unset]]
+                c.held[sel] = held
+                for k in np.flatnonzero(unset).tolist():
+                    self._held[(int(c.plan[sel[k]]), names[idx[k]])] = held[k]
+                out[idx] = np.where(np.isnan(value), held, value)
+                continue
+
+            if fault_type == "offset":
+                delta = np.nan_to_num(value) * factor
+            elif fault_type == "drift":
+                delta = c.drift_rate[sel] * elapsed
+            elif fault_type == "noise":
+                amplitude = np.where(np.isnan(value), 1.0, value) * factor
+                delta = self.rng.uniform(-1.0, 1.0, len(sel)) * amplitude
+            else:
+                span = np.nan_to_num(c.max[sel] - c.min[sel], posinf=0.0)
+                height = np.where(np.isnan(value), span * 0.5, value) * factor
+                delta = np.where(self.rng.random(len(sel)) < SPIKE_CHANCE, height, 0.0)
+
+            np.add.at(out, idx, delta)
+            out[idx] = np.clip(out[idx], c.min[sel], c.max[sel])
+
+        if out is None:
+            return values
+        out.flags.writeable = False
+        return out
@@ -0,0 +1,69 @@
+import threading
+import numpy as np
+
+DEFAULT_DEPTH = 1000
+
+class SensorHistory:
+    """
+    Recent reported values per sensor, in fixed-size NumPy ring buffers.
+
+    `record` is a registry subscriber: each tick it appends the positions in `snapshot.changed`
+    (deadband and heartbeat applied, as the protocol servers report them) with one fancy-indexed
+    assignment. Each sensor keeps its last `depth` samples, 16 bytes apiece. `read` orders a
+    sensor's ring and slices it to a time range with searchsorted, without touching samples
+    outside the range.
+    """
+    def __init__(self, depth=DEFAULT_DEPTH):
+        self.depth = depth
+        self.index = {}
+        self.times = np.empty((0, depth))
+        self.values = np.empty((0, depth))
+        # Samples ever written per sensor; the next slot is count % depth
+        self.counts = np.zeros(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _resize(self, snapshot):
+        n = len(snapshot.names)
+        times = np.full((n, self.depth), np.nan)
+        values = np.full((n, self.depth), np.nan)
+        counts = np.zeros(n, dtype=np.int64)
+        for name, i in self.index.items():
+            j = snapshot.index.get(name)
+            if j is not None:
+                times[j], values[j], counts[j] = self.times[i], self.values[i], self.counts[i]
+        self.times, self.values, self.counts = times, values, counts
+        self.index = dict(snapshot.index)
+
+    def record(self, snapshot):
+        changed = snapshot.changed
+        with self._lock:
+            if len(self.counts) != len(snapshot.names):
+                self._resize(snapshot)
+            if not len(changed):
+                return
+            slots = self.counts[changed] % self.depth
+            self.times[changed, slots] = snapshot.timestamp
+            self.values[changed, slots] = snapshot.values[changed]
+            self.counts[changed] += 1
+
+    def read(self, name, start=None, end=None):
+        """(times, values) of `name` with start <= time <= end (either bound optional), oldest first."""
+        i = self.index.get(name)
+        if i is None:
+            return np.empty(0), np.empty(0)
+        with self._lock:
+            count = int(self.counts[i])
+            head = count % self.depth
+            # Oldest-first contiguous segments of the ring: [head:] then [:head] once it has wrapped
+            segments = [slice(0, count)] if count <= self.depth else [slice(head, self.depth), slice(0, head)]
+            times, values = [], []
+            for segment in segments:
+                t = self.times[i, segment]
+                lo = 0 if start is None else np.searchsorted(t, start, "left")
+                hi = len(t) if end is None else np.searchsorted(t, end, "right")
+                times.append(t[lo:hi])
+                values.append(self.values[i, segment][lo:hi])
+            return np.concatenate(times), np.concatenate(values)
+
+    def stats(self):
+        return {"depth": self.depth, "sensors": len(self.counts), "samples": int(np.minimum(self.counts, self.depth).sum())}
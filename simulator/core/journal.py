@@ -0,0 +1,103 @@
+from collections import deque
+import json
+import logging
+import threading
+import time
+
+DEFAULT_CAPACITY = 10000
+FLUSH_INTERVAL = 1.0
+
+FIELDS = ("seq", "time", "protocol", "target", "sensor", "priority", "value", "action", "accepted", "source")
+
+class WriteJournal:
+    """
+    Audit trail of protocol writes and relinquishes, kept in a fixed-size in-memory ring.
+
+    `record` is called on the protocol thread and only appends a tuple under a short lock.
+    With a `path`, a background thread appends the entries recorded since its last pass to
+    that file as JSON lines, one write per batch; if it falls more than `capacity` entries
+    behind, the oldest unflushed entries are dropped and counted.
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY, path=None, flush_interval=FLUSH_INTERVAL):
+        self.capacity = capacity
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._ring = deque(maxlen=capacity)
+        self._pending = deque(maxlen=capacity)
+        self._seq = 0
+        self.flushed = 0
+        self.dropped = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def record(self, protocol, target, sensor, priority, value, accepted=True, source=None):
+        """Journals one write; `value` None is a relinquish."""
+        action = "relinquish" if value is None else "write"
+        with self._lock:
+            self._seq += 1
+            entry = (self._seq, time.time(), protocol, target, sensor, priority, value, action, accepted, source)
+            self._ring.append(entry)
+            if self.path:
+                if len(self._pending) == self.capacity:
+                    self.dropped += 1
+                self._pending.append(entry)
+        return entry[0]
+
+    def __len__(self):
+        return len(self._ring)
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def query(self, since=0, sensor=None, protocol=None, limit=100):
+        """Up to `limit` most recent entries after sequence number `since`, oldest first."""
+        with self._lock:
+            entries = list(self._ring)
+        start = len(entries)
+        # Entries are in sequence order; walk back to the first one after `since`
+        while start > 0 and entries[start - 1][0] > since:
+            start -= 1
+        selected = [e for e in entries[start:]
+                    if (sensor is None or e[4] == sensor) and (protocol is None or e[2] == protocol)]
+        return [dict(zip(FIELDS, e)) for e in selected[-limit:]] if limit else []
+
+    def stats(self):
+        return {"seq": self._seq, "buffered": len(self._ring), "capacity": self.capacity,
+                "path": self.path, "flushed": self.flushed, "dropped": self.dropped}
+
+    def flush(self):
+        """Appends every pending entry to `path` in one write; returns how many."""
+        with self._lock:
+            batch, self._pending = self._pending, deque(maxlen=self.capacity)
+        if not batch or not self.path:
+            return 0
+        lines = "".join(json.dumps(dict(zip(FIELDS, e))) + "\n" for e in batch)
+        try:
+            with open(self.path, "a") as f:
+                f.write(lines)
+        except OSError as e:
+            logging.error(f"Write journal flush to {self.path} failed: {e}")
+            self.dropped += len(batch)
+            return 0
+        self.flushed += len(batch)
+        return len(batch)
+
+    def start(self):
+        """Starts the background flusher (no-op without a path)."""
+        if self.path and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-journal", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import numpy as np
+from core import clock
+
+META_FILE = "meta.json"
+CHUNK_FILE = "chunk_{:05d}.npy"
+DEFAULT_CHUNK_ROWS = 3600
+
+class Recorder:
+    """
+    Appends every published snapshot to a recording directory: `meta.json` with the sensor
+    names, plus fixed-size `.npy` chunks memory-mapped in column-major order (column 0 is the
+    timestamp, then one float column per sensor). Unwritten rows keep a NaN timestamp, so a
+    recording cut short by a crash is still readable.
+
+    Use as a registry subscriber: `registry.subscribe(Recorder(path).record)`.
+    """
+    def __init__(self, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.names = None
+        self.rows = 0
+        self._chunk = None
+        self._columns = None
+        self._columns_for = None
+
+    def _start(self, names):
+        os.makedirs(self.path, exist_ok=True)
+        self.names = names
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump({"names": list(names), "chunk_rows": self.chunk_rows}, f)
+        logging.info(f"Recording {len(names)} sensors to {self.path}")
+
+    def _open_chunk(self, number):
+        chunk = np.lib.format.open_memmap(
+            os.path.join(self.path, CHUNK_FILE.format(number)), mode="w+", dtype=np.float64,
+            shape=(self.chunk_rows, len(self.names) + 1), fortran_order=True)
+        chunk[:, 0] = np.nan
+        return chunk
+
+    def _column_map(self, snapshot):
+        """Registry positions of the recorded columns (-1 for sensors no longer present)."""
+        if snapshot.names is not self._columns_for:
+            self._columns = np.array([snapshot.index.get(n, -1) for n in self.names], dtype=np.intp)
+            self._columns_for = snapshot.names
+        return self._columns
+
+    def record(self, snapshot):
+        if self.names is None:
+            self._start(snapshot.names)
+
+        row = self.rows % self.chunk_rows
+        if row == 0:
+            if self._chunk is not None:
+                self._chunk.flush()
+            self._chunk = self._open_chunk(self.rows // self.chunk_rows)
+
+        if snapshot.names is self.names or snapshot.names == self.names:
+            self._chunk[row, 1:] = snapshot.values
+        else:
+            columns = self._column_map(snapshot)
+            self._chunk[row, 1:] = np.where(columns >= 0, snapshot.values[columns], np.nan)
+        self._chunk[row, 0] = snapshot.timestamp
+        self.rows += 1
+
+    def close(self):
+        if self._chunk is not None:
+            self._chunk.flush()
+            self._chunk = None
+
+class Recording:
+    """Read-only view of a recording directory; chunks are memory-mapped on first access."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        self.names = tuple(meta["names"])
+        self.chunk_rows = meta["chunk_rows"]
+
+        self.chunks = []
+        while os.path.exists(os.path.join(path, CHUNK_FILE.format(len(self.chunks)))):
+            self.chunks.append(np.load(os.path.join(path, CHUNK_FILE.format(len(self.chunks))), mmap_mode="r"))
+        if not self.chunks:
+            raise ValueError(f"Recording {path} has no data")
+
+        last = self.chunks[-1][:, 0]
+        filled = int(np.count_nonzero(~np.isnan(last)))
+        self.rows = (len(self.chunks) - 1) * self.chunk_rows + filled
+        self.timestamps = np.concatenate([c[:, 0] for c in self.chunks])[:self.rows]
+
+    def __len__(self):
+        return self.rows
+
+    def row(self, i):
+        """Sensor values of row `i` (a read-only view into the mapped chunk)."""
+        chunk, offset = divmod(i, self.chunk_rows)
+        return self.chunks[chunk][offset, 1:]
+
+    def column(self, name):
+        """Full history of one sensor; contiguous within each chunk thanks to column-major layout."""
+        col = self.names.index(name) + 1
+        return np.concatenate([c[:, col] for c in self.chunks])[:self.rows]
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if self.rows else 0.0
+
+class ReplaySource:
+    """
+    Feeds recorded values into a registry instead of the synthetic generators, at `speed`
+    times the recorded rate on the simulation clock. Sensors with an active priority
+    override keep their own update(); sensors missing from the recording keep their value.
+    """
+    def __init__(self, recording, speed=1.0, loop=False):
+        if speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        self.recording = recording
+        self.speed = speed
+        self.loop = loop
+        self._origin = None
+        self._targets = None
+        self._targets_for = None
+
+    def position(self):
+        """Index of the recorded row for the current simulation time."""
+        now = clock.get_clock().monotonic()
+        if self._origin is None:
+            self._origin = now
+        elapsed = (now - self._origin) * self.speed
+        if self.loop and self.recording.duration > 0:
+            elapsed %= self.recording.duration
+        target = self.recording.timestamps[0] + elapsed
+        row = int(np.searchsorted(self.recording.timestamps, target, side="right")) - 1
+        return min(max(row, 0), len(self.recording) - 1)
+
+    def _pairs(self, sensors):
+        if self._targets_for is not sensors:
+            by_name = {s.name: s for s in sensors}
+            self._targets = [(col, by_name[n]) for col, n in enumerate(self.recording.names) if n in by_name]
+            self._targets_for = sensors
+        return self._targets
+
+    def apply(self, sensors):
+        values = self.recording.row(self.position()).tolist()
+        for col, sensor in self._pairs(sensors):
+            priority = getattr(sensor, "priority_array", None)
+            if priority is not None and priority.count(None) != len(priority):
+                sensor.update()
+            else:
+                sensor.value = values[col]
@@ -1,13 +1,179 @@
+from collections.abc import Mapping
 from threading import Lock
+import heapq
+import logging
+import numpy as np
+from core import clock
+from core.faults import FaultEngine
+from core.journal import WriteJournal
+
+class RegistrySnapshot(Mapping):
+    """
+    Immutable view of every sensor value after one completed tick.
+    Readers hold a reference to it instead of taking the registry lock;
+    `values` is a read-only array aligned with `names`.
+    """
+    def __init__(self, version, timestamp, names, index, values, changed=None):
+        self.version = version
+        self.timestamp = timestamp
+        self.names = names
+        self.index = index
+        self.values = values
+        # Positions reported as changed in this tick (see ChangeTracker)
+        self.changed = changed if changed is not None else np.empty(0, dtype=np.intp)
+
+    def __getitem__(self, name):
+        return float(self.values[self.index[name]])
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def items(self):
+        return zip(self.names, self.values.tolist())
+
+EMPTY_SNAPSHOT = RegistrySnapshot(0, 0.0, (), {}, np.empty(0))
+
+class ChangeTracker:
+    """
+    Report-by-exception state for every sensor in registry order.
+    A sensor is dirty when its value moved more than its `deadband` since it was
+    last reported, or when it has been silent for `max_silence` seconds (heartbeat).
+
+    `update` checks every sensor, or only `positions` (the ones whose value may have moved)
+    plus the sensors whose heartbeat fell due. Heartbeat deadlines are kept in buckets of
+    `resolution` seconds, so a partial update costs O(positions + due heartbeats).
+    """
+    def __init__(self, sensors, default_max_silence=None, resolution=1.0):
+        n = len(sensors)
+        self.deadband = np.array([getattr(s, "deadband", None) or 0.0 for s in sensors], dtype=float)
+        silence = [getattr(s, "max_silence", None) or default_max_silence for s in sensors]
+        self.max_silence = np.array([m if m else np.inf for m in silence], dtype=float)
+        self.reported = np.full(n, np.nan)
+        self.reported_at = np.zeros(n)
+        self.changed_version = np.zeros(n, dtype=np.int64)
+        self.resolution = resolution
+        # Bucket number -> position arrays reported with a heartbeat deadline in that bucket;
+        # None until the first partial update (full updates check every sensor anyway)
+        self._buckets = None
+        self._bucket_heap = []
+
+    def update(self, values, version, now, positions=None):
+        if positions is None:
+            changed = np.abs(values - self.reported) > self.deadband
+            changed |= np.isnan(self.reported)
+            changed |= (now - self.reported_at) >= self.max_silence
+            idx = np.flatnonzero(changed)
+            self._buckets = None
+        else:
+            if self._buckets is None:
+                self._buckets, self._bucket_heap = {}, []
+                self._schedule(np.arange(len(self.reported)))
+            candidates = np.union1d(positions, self._silent(now))
+            current = values[candidates]
+            reported = self.reported[candidates]
+            changed = np.abs(current - reported) > self.deadband[candidates]
+            changed |= np.isnan(reported)
+            changed |= (now - self.reported_at[candidates]) >= self.max_silence[candidates]
+            idx = candidates[changed]
+
+        self.reported[idx] = values[idx]
+        self.reported_at[idx] = now
+        self.changed_version[idx] = version
+        if self._buckets is not None:
+            self._schedule(idx)
+        idx.flags.writeable = False
+        return idx
+
+    def _schedule(self, idx):
+        deadline = self.reported_at[idx] + self.max_silence[idx]
+        finite = np.isfinite(deadline)
+        idx, deadline = idx[finite], deadline[finite]
+        if not len(idx):
+            return
+        keys = np.ceil(deadline / self.resolution).astype(np.int64)
+        if keys[0] == keys[-1] and (keys == keys[0]).all():
+            groups = [(int(keys[0]), idx)]
+        else:
+            order = np.argsort(keys, kind="stable")
+            keys, idx = keys[order], idx[order]
+            starts = np.flatnonzero(np.diff(keys)) + 1
+            groups = zip(keys[np.r_[0, starts]].tolist(), np.split(idx, starts))
+        for key, members in groups:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = [members]
+                heapq.heappush(self._bucket_heap, key)
+            else:
+                bucket.append(members)
+
+    def _silent(self, now):
+        """Positions whose heartbeat deadline has passed; entries of sensors reported since are dropped."""
+        # Bucket k holds deadlines in ((k - 1) * resolution, k * resolution]
+        limit = np.floor(now / self.resolution) + 1
+        due, later = [], []
+        while self._bucket_heap and self._bucket_heap[0] <= limit:
+            key = heapq.heappop(self._bucket_heap)
+            members = np.concatenate(self._buckets.pop(key))
+            current = np.ceil((self.reported_at[members] + self.max_silence[members]) / self.resolution) == key
+            expired = (now - self.reported_at[members]) >= self.max_silence[members]
+            due.append(members[current & expired])
+            later.append(members[current & ~expired])
+        if not due:
+            return np.empty(0, dtype=np.intp)
+        self._schedule(np.concatenate(later))
+        return np.concatenate(due)
+
+    def since(self, version):
+        """Positions reported as changed in any tick after `version`."""
+        return np.flatnonzero(self.changed_version > version)
 
 class SensorRegistry:
-    def __init__(self):
+    def __init__(self, use_bank=False, max_silence=None):
         self.sensors = {}
         self.lock = Lock()
+        # Opt-in vectorized engine (see core/sensor_bank.py), rebuilt lazily after add()
+        self.use_bank = use_bank
+        self._bank = None
+        # Latest published snapshot; swapped by reference so readers never block
+        self.latest = EMPTY_SNAPSHOT
+        self._layout = None
+        # Unfaulted values of the last tick; partial ticks copy it and overwrite only what changed
+        self._values = None
+        # Positions batch fault plans covered last tick (they must be re-checked once a plan ends)
+        self._fault_positions = np.empty(0, dtype=np.intp)
+        # Dirty-set tracking; `max_silence` is the default heartbeat for sensors without one
+        self.max_silence = max_silence
+        self._changes = None
+        self._subscribers = []
+        # Batch fault plans (see core/faults.py), applied to each snapshot's values
+        self.faults = FaultEngine()
+        # Recorded values to play back instead of the generators (see core/recording.py)
+        self.replay = None
+        # Audit trail of protocol writes (see core/journal.py)
+        self.journal = WriteJournal()
+        # ScheduleEngine writing priority arrays (see core/schedules.py), set at startup
+        self.schedules = None
+        # Called with a sensor's name after each priority-array write (e.g. the BACnet ChangeFeed)
+        self.priority_listeners = []
+        # Per-sensor value ring buffers (see core/history.py), set at startup
+        self.history = None
+        # ShardedPublisher (see services/mqtt_async.py), set when MQTT_CONNECTIONS > 0
+        self.mqtt = None
+        # Derived sensors (see core/derived.py), compiled lazily after add()
+        self._derived = None
+        # FixedRateScheduler driving update_all(), set by the simulation loop
+        self.scheduler = None
+        # Per-sensor update rates (see core/timing_wheel.py), rebuilt lazily after add()
+        self.tick_interval = 1.0
+        self.default_period = 1.0
+        self._wheel = None
 
     def add(self, sensor):
         from models.industrial import FACPSensor, PumpController
-        
+
         # Check if we should upgrade the sensor to a specialized model
         if hasattr(sensor, 'simulation_type'):
             if sensor.simulation_type == "facp":
@@ -16,20 +182,163 @@ class SensorRegistry:
                 sensor = PumpController(sensor.name, **sensor.__dict__)
 
         self.sensors[sensor.name] = sensor
+        sensor.on_priority_change = self.priority_changed
+        self._bank = None
+        self._layout = None
+        self._values = None
+        self._changes = None
+        self._wheel = None
+        self._derived = None
         return sensor
 
+    def priority_changed(self, name):
+        for listener in self.priority_listeners:
+            listener(name)
+
+    def configure_rates(self, tick_interval, default_period=None):
+        """Tick length of the simulation loop and the period used for sensors without `update_period`."""
+        self.tick_interval = tick_interval
+        self.default_period = default_period or tick_interval
+        self._wheel = None
+
+    def min_update_period(self):
+        periods = [getattr(s, "update_period", None) for s in self.sensors.values()]
+        periods = [p for p in periods if p]
+        return min(periods) if periods else None
+
     def update_all(self):
         with self.lock:
+            self._update()
+            snap = self._publish()
+        self._notify(snap)
+
+    def update_due(self):
+        """Advance one tick, updating only the sensors whose update_period has elapsed."""
+        with self.lock:
+            if self._wheel is None:
+                from core.timing_wheel import UpdateWheel
+                periods = [getattr(s, "update_period", None) or self.default_period for s in self.sensors.values()]
+                self._wheel = UpdateWheel(periods, self.tick_interval)
+
+            due = self._wheel.advance()
+            if self._wheel.every_tick():
+                self._update()
+                snap = self._publish()
+            else:
+                if len(due):
+                    self._update(due)
+                # Replay sets every sensor, so its ticks are published in full
+                snap = self._publish(due if self.replay is None else None)
+        self._notify(snap)
+
+    def _update(self, due=None):
+        if self.replay is not None:
+            self.replay.apply(self._sensor_list())
+        elif self.use_bank:
+            if self._bank is None:
+                from core.sensor_bank import SensorBank
+                self._bank = SensorBank(self.sensors.values())
+            self._bank.update(due=due)
+        elif due is None:
             for s in self.sensors.values():
                 s.update()
+        else:
+            sensors = self._sensor_list()
+            for i in due.tolist():
+                sensors[i].update()
 
-    def get(self, name):
+    def _sensor_list(self):
+        if self._layout is None:
+            names = tuple(self.sensors)
+            self._layout = (names, {n: i for i, n in enumerate(names)}, tuple(self.sensors.values()))
+        return self._layout[2]
+
+    def _publish(self, due=None):
+        """
+        Build the next snapshot and swap it in. Caller holds the lock. With `due`, only those
+        sensors were updated: their values are written into a copy of the last tick's array,
+        and derived sensors and change tracking only look at them and what depends on them.
+        """
+        sensors = self._sensor_list()
+        if self._derived is None:
+            from core.derived import DerivedPlan
+            self._derived = DerivedPlan(self._layout[0], sensors)
+        if due is None or self._values is None:
+            values = np.fromiter((s.value for s in sensors), dtype=float, count=len(sensors))
+            if self._derived:
+                self._derived.evaluate(values)
+            due = None
+        elif len(due):
+            # Copy on write: the previous array belongs to the published snapshot
+            values = self._values.copy()
+            values[due] = [sensors[i].value for i in due.tolist()]
+            if self._derived:
+                due = np.union1d(due, self._derived.evaluate(values, due))
+        else:
+            values = self._values
+        values.flags.writeable = False
+        self._values = values
+        self.latest = self._make_snapshot(self.latest.version + 1, values, due)
+        return self.latest
+
+    def _make_snapshot(self, version, values, positions=None):
+        """Snapshot of `values` after faults; `positions`, if given, are the only ones that may have changed."""
+        names, index, sensors = self._layout
+        if self._changes is None:
+            self._changes = ChangeTracker(sensors, self.max_silence, self.tick_interval)
+        now = clock.now()
+        if self.faults:
+            faulted = self.faults.positions(names, sensors, now)
+            values = self.faults.apply(names, sensors, values, now)
+            if positions is not None:
+                positions = np.union1d(positions, np.union1d(faulted, self._fault_positions))
+            self._fault_positions = faulted
+        elif len(self._fault_positions):
+            if positions is not None:
+                positions = np.union1d(positions, self._fault_positions)
+            self._fault_positions = np.empty(0, dtype=np.intp)
+        changed = self._changes.update(values, version, now, positions)
+        return RegistrySnapshot(version, now, names, index, values, changed)
+
+    def changes_since(self, version):
+        """
+        Latest snapshot plus the positions whose reported value changed after `version`.
+        Consumers remember `snapshot.version` and pass it back on their next poll.
+        """
+        snap = self.snapshot()
+        tracker = self._changes
+        if tracker is None or version <= 0 or version > snap.version or len(tracker.changed_version) != len(snap):
+            return snap, np.arange(len(snap))
+        return snap, tracker.since(version)
+
+    def subscribe(self, callback):
+        """Calls `callback(snapshot)` after every published tick; use `snapshot.changed` for the dirty set."""
+        self._subscribers.append(callback)
+
+    def _notify(self, snap):
+        for callback in self._subscribers:
+            try:
+                callback(snap)
+            except Exception as e:
+                logging.error(f"Registry subscriber failed: {e}")
+
+    def publish(self):
         with self.lock:
+            return self._publish()
+
+    def get(self, name):
+        try:
+            return self.snapshot()[name]
+        except KeyError:
+            # Added after the last tick was published
             return self.sensors[name].value
 
     def snapshot(self):
-        with self.lock:
-            return {k: v.value for k, v in self.sensors.items()}
+        """Latest complete tick. Publishes once on demand if no tick has run yet."""
+        snap = self.latest
+        if snap.version == 0 and self.sensors:
+            snap = self.publish()
+        return snap
 
     def by_bacnet_instance(self, instance):
         mapping = {1: "temperature", 2: "humidity", 3: "pressure"}
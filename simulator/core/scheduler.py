@@ -0,0 +1,147 @@
+import bisect
+import threading
+import time
+from core import clock as sim_clock
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations, reported in milliseconds."""
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile."""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for bound, n in zip(self.BUCKETS_MS, self.counts):
+            seen += n
+            if seen >= target:
+                return float(bound)
+        return self.max
+
+    def report(self):
+        labels = [f"<={b}" for b in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+        }
+
+class TickStats:
+    """
+    Per-tick duration, lateness and overrun accounting for a FixedRateScheduler.
+
+    Durations, lateness and `effective_hz` are measured on the scheduler's clock, the one its
+    deadlines follow, so `effective_hz` is comparable with `1 / interval`; `wall_hz` is the same
+    rate in real time (they differ under a scaled or stepped clock).
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.duration = LatencyHistogram()
+        self.lateness = LatencyHistogram()
+        # (scheduler clock, wall clock) at the first and the latest tick
+        self.first_tick = None
+        self.last_tick = None
+
+    def record(self, duration, lateness, at):
+        """One tick that started at `at` on the scheduler's clock."""
+        self.last_tick = (at, time.monotonic())
+        if self.first_tick is None:
+            self.first_tick = self.last_tick
+        self.ticks += 1
+        if duration > self.interval:
+            self.overruns += 1
+        self.duration.record(duration)
+        self.lateness.record(max(0.0, lateness))
+
+    def rate(self, which):
+        """Ticks per second between the first and latest tick on one clock (0: scheduler, 1: wall)."""
+        elapsed = self.last_tick[which] - self.first_tick[which] if self.ticks > 1 else 0.0
+        return (self.ticks - 1) / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        return {
+            "interval": self.interval,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "effective_hz": self.rate(0),
+            "wall_hz": self.rate(1),
+            "duration_ms": self.duration.report(),
+            "lateness_ms": self.lateness.report(),
+        }
+
+class FixedRateScheduler:
+    """
+    Runs a tick function against absolute deadlines (start + n * interval),
+    so work time does not accumulate as drift.
+
+    When a tick finishes behind schedule the policy decides what happens:
+    - "catch_up": run the missed ticks back-to-back (at most `max_catch_up`, the rest are skipped)
+    - "skip": drop the missed ticks and resume at the next future deadline
+
+    Deadlines follow the simulation clock (core/clock.py), so scaled and stepped
+    clocks run the same schedule faster than real time.
+    """
+    POLICIES = ("catch_up", "skip")
+
+    def __init__(self, interval=1.0, policy="catch_up", max_catch_up=5, clock=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown tick policy '{policy}', expected one of {self.POLICIES}")
+        self.interval = interval
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.clock = clock or sim_clock.get_clock()
+        self.stats = TickStats(interval)
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, tick, max_ticks=None):
+        clock = self.clock
+        deadline = clock.monotonic()
+        while not self._stop.is_set():
+            if max_ticks is not None and self.stats.ticks >= max_ticks:
+                break
+
+            now = clock.monotonic()
+            if now < deadline:
+                if clock.wait(self._stop, deadline - now):
+                    break
+                now = clock.monotonic()
+
+            tick()
+            finished = clock.monotonic()
+            self.stats.record(finished - now, now - deadline, now)
+
+            deadline += self.interval
+            behind = int((finished - deadline) // self.interval) if finished > deadline else -1
+            if behind < 0:
+                continue
+            # `behind + 1` deadlines have already passed
+            if self.policy == "skip":
+                missed = behind + 1
+            else:
+                missed = max(0, behind + 1 - self.max_catch_up)
+            deadline += missed * self.interval
+            self.stats.skipped += missed
@@ -0,0 +1,196 @@
+import datetime
+import heapq
+import itertools
+import logging
+from core import clock
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+# Shorthand keys for `weekly`; explicit day names override them
+DAY_GROUPS = {"daily": DAYS, "weekdays": DAYS[:5], "weekend": DAYS[5:]}
+
+def parse_time(text):
+    """Seconds after midnight for "HH:MM", "HH:MM:SS" or a number of seconds."""
+    if isinstance(text, (int, float)):
+        return int(text)
+    parts = [int(p) for p in str(text).split(":")]
+    hours, minutes, seconds = (parts + [0, 0])[:3]
+    if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+        raise ValueError(f"Invalid schedule time '{text}'")
+    return hours * 3600 + minutes * 60 + seconds
+
+def parse_date(text):
+    return text if isinstance(text, datetime.date) else datetime.date.fromisoformat(str(text))
+
+def parse_events(events):
+    """[[time, value], ...] -> sorted ((seconds, value), ...); a None value relinquishes."""
+    parsed = sorted((parse_time(t), None if v is None else float(v)) for t, v in (events or ()))
+    return tuple(parsed)
+
+class Calendar:
+    """A BACnet-style date list: single dates plus inclusive date ranges."""
+    def __init__(self, name, dates=(), ranges=()):
+        self.name = name
+        self.dates = {parse_date(d) for d in dates}
+        self.ranges = [(parse_date(a), parse_date(b)) for a, b in ranges]
+
+    @classmethod
+    def from_dict(cls, name, spec):
+        return cls(name, spec.get("dates", ()), spec.get("ranges", ()))
+
+    def __contains__(self, day):
+        return day in self.dates or any(a <= day <= b for a, b in self.ranges)
+
+class Schedule:
+    """
+    A weekly schedule that writes `target`'s priority array at `priority`.
+
+    The value in effect is the last event at or before the time of day in that day's event
+    list, or `default` before the first event; None means the slot is relinquished. A day
+    listed by an exception (a calendar or a single date, first match wins) uses the
+    exception's events instead of the weekday's. Outside `effective` (start, end dates) the
+    schedule holds `default`.
+    """
+    def __init__(self, name, target, priority=16, weekly=None, exceptions=(), default=None, effective=None):
+        if not 1 <= priority <= 16:
+            raise ValueError(f"Schedule '{name}': priority must be 1-16, got {priority}")
+        self.name = name
+        self.target = target
+        self.priority = priority
+        self.default = None if default is None else float(default)
+        self.weekly = tuple(parse_events((weekly or {}).get(day)) for day in DAYS)
+        # (Calendar or date, events) in precedence order
+        self.exceptions = list(exceptions)
+        self.effective = tuple(parse_date(d) for d in effective) if effective else None
+
+    @classmethod
+    def from_dict(cls, name, spec, calendars):
+        weekly = {}
+        for key, events in (spec.get("weekly") or {}).items():
+            for day in DAY_GROUPS.get(key, ()):
+                weekly.setdefault(day, events)
+        for key, events in (spec.get("weekly") or {}).items():
+            if key not in DAY_GROUPS:
+                if key not in DAYS:
+                    raise ValueError(f"Schedule '{name}': unknown day '{key}'")
+                weekly[key] = events
+        exceptions = []
+        for item in spec.get("exceptions", ()):
+            if "calendar" in item:
+                if item["calendar"] not in calendars:
+                    raise ValueError(f"Schedule '{name}': unknown calendar '{item['calendar']}'")
+                match = calendars[item["calendar"]]
+            else:
+                match = parse_date(item["date"])
+            exceptions.append((match, parse_events(item.get("events"))))
+        return cls(name, spec["target"], int(spec.get("priority", 16)), weekly, exceptions,
+                   spec.get("default"), spec.get("effective"))
+
+    def events_on(self, day):
+        """Event list in force on `day` (a date), or None outside the effective period."""
+        if self.effective and not self.effective[0] <= day <= self.effective[1]:
+            return None
+        for match, events in self.exceptions:
+            if (day in match) if isinstance(match, Calendar) else day == match:
+                return events
+        return self.weekly[day.weekday()]
+
+    def value_at(self, moment):
+        """Value in force at `moment` (a local datetime)."""
+        events = self.events_on(moment.date())
+        value = self.default
+        if events:
+            seconds = moment.hour * 3600 + moment.minute * 60 + moment.second
+            for at, event_value in events:
+                if at > seconds:
+                    break
+                value = self.default if event_value is None else event_value
+        return value
+
+    def next_transition(self, moment):
+        """Epoch seconds of the next event after `moment` today, or of the next midnight."""
+        seconds = moment.hour * 3600 + moment.minute * 60 + moment.second
+        day = moment.date()
+        for at, _ in self.events_on(day) or ():
+            if at > seconds:
+                return datetime.datetime.combine(day, datetime.time(at // 3600, at // 60 % 60, at % 60)).timestamp()
+        return datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time()).timestamp()
+
+class ScheduleEngine:
+    """
+    Runs schedules against the registry. Each schedule's next transition time (simulation
+    clock) sits in a heap; `run_due` pops only the schedules whose transition has come, writes
+    the target if the value in force changed, and pushes their next transition. Between
+    transitions a tick costs one comparison with the top of the heap, however many schedules
+    there are. Subscribe `on_tick` to the registry.
+    """
+    def __init__(self, registry, schedules, calendars=None):
+        self.registry = registry
+        self.schedules = {s.name: s for s in schedules}
+        # Calendar name -> Calendar, kept for exposing them (e.g. as BACnet Calendar objects)
+        self.calendars = dict(calendars or {})
+        # Schedule name -> value written last (None: relinquished)
+        self.values = {}
+        self.heap = []
+        self._seq = itertools.count()
+        self.fired = 0
+        # Called as listener(schedule, value) after each write
+        self.listeners = []
+        self._started = False
+
+    def start(self, now=None):
+        """Writes every schedule's current value and queues its next transition."""
+        now = clock.now() if now is None else now
+        moment = datetime.datetime.fromtimestamp(now)
+        self.heap = []
+        for schedule in self.schedules.values():
+            self._apply(schedule, schedule.value_at(moment), force=True)
+            self.heap.append((schedule.next_transition(moment), next(self._seq), schedule))
+        heapq.heapify(self.heap)
+        self._started = True
+
+    def next_due(self):
+        return self.heap[0][0] if self.heap else None
+
+    def run_due(self, now=None):
+        """Fires every schedule whose transition time has passed; returns how many were written."""
+        now = clock.now() if now is None else now
+        if not self._started:
+            self.start(now)
+            return len(self.schedules)
+        if not self.heap or self.heap[0][0] > now:
+            return 0
+        moment = datetime.datetime.fromtimestamp(now)
+        written = 0
+        while self.heap and self.heap[0][0] <= now:
+            _, _, schedule = heapq.heappop(self.heap)
+            written += self._apply(schedule, schedule.value_at(moment))
+            heapq.heappush(self.heap, (schedule.next_transition(moment), next(self._seq), schedule))
+        self.fired += written
+        return written
+
+    def on_tick(self, snapshot):
+        self.run_due(snapshot.timestamp)
+
+    def _apply(self, schedule, value, force=False):
+        if not force and self.values.get(schedule.name, None) == value:
+            return 0
+        self.values[schedule.name] = value
+        sensor = self.registry.get_sensor(schedule.target)
+        if sensor is None:
+            logging.warning(f"Schedule '{schedule.name}': target sensor '{schedule.target}' not found")
+            return 0
+        if value is None:
+            sensor.clear_priority(schedule.priority)
+        else:
+            sensor.set_priority(value, schedule.priority)
+        self.registry.journal.record("schedule", schedule.name, sensor.name, schedule.priority, value)
+        for listener in self.listeners:
+            listener(schedule, value)
+        return 1
+
+def load_schedules(config):
+    """Schedules and calendars from a schedules.yaml mapping ({calendars: ..., schedules: ...})."""
+    config = config or {}
+    calendars = {name: Calendar.from_dict(name, spec or {}) for name, spec in (config.get("calendars") or {}).items()}
+    schedules = [Schedule.from_dict(name, spec, calendars) for name, spec in (config.get("schedules") or {}).items()]
+    return schedules, calendars
@@ -0,0 +1,196 @@
+import itertools
+import numpy as np
+from core import clock
+from core.sensors import Sensor, stream_seed
+
+
+class SensorGroup:
+    """
+    All plain `Sensor` objects sharing one simulation_type.
+    Parameters are kept as NumPy arrays so a whole group is evaluated at once.
+    `overridden` flags members with a fault or priority override; the sensors keep it current.
+    """
+    ARRAYS = ("base", "min", "max", "noise", "period", "phase", "spike_chance", "spike_multiplier", "pulse_width",
+              "last", "span")
+
+    def __init__(self, simulation_type, sensors):
+        self.simulation_type = simulation_type
+        self.sensors = sensors
+        self.base = np.array([s.base for s in sensors], dtype=float)
+        self.min = np.array([s.min for s in sensors], dtype=float)
+        self.max = np.array([s.max for s in sensors], dtype=float)
+        self.noise = np.array([s.noise for s in sensors], dtype=float)
+        self.period = np.array([s.period for s in sensors], dtype=float)
+        self.phase = np.array([s.t0 for s in sensors], dtype=float)
+        self.spike_chance = np.array([s.spike_chance for s in sensors], dtype=float)
+        self.spike_multiplier = np.array([s.spike_multiplier for s in sensors], dtype=float)
+        self.pulse_width = np.array([s.pulse_width for s in sensors], dtype=float)
+        self.last = np.array([s.last_val for s in sensors], dtype=float)
+        self.span = self.max - self.min
+        self.overridden = np.array([s.overridden() for s in sensors], dtype=bool)
+        for i, s in enumerate(sensors):
+            s.override_flag = (self.overridden, i)
+
+    def __len__(self):
+        return len(self.sensors)
+
+    def take(self, selected):
+        """The members at `selected` as a group of their own (copies of the parameter arrays)."""
+        sub = SensorGroup.__new__(SensorGroup)
+        sub.simulation_type = self.simulation_type
+        sub.sensors = [self.sensors[i] for i in selected.tolist()]
+        for name in self.ARRAYS:
+            setattr(sub, name, getattr(self, name)[selected])
+        sub.overridden = self.overridden[selected]
+        return sub
+
+
+# Each evaluator mirrors the matching branch of Sensor.update().
+# It returns (values, clamp): clamp=False for types that return before noise/clamping.
+
+def _eval_sine(g, t, rng):
+    return g.base + np.sin(t / 30.0) * g.span * 0.05, True
+
+def _eval_ramp(g, t, rng):
+    return g.min + g.span * ((t % 60.0) / 60.0), True
+
+def _eval_random_walk(g, t, rng):
+    step = rng.uniform(-g.noise, g.noise)
+    step -= np.where(g.last > g.base + g.span * 0.2, g.noise * 0.5, 0.0)
+    step += np.where(g.last < g.base - g.span * 0.2, g.noise * 0.5, 0.0)
+    return g.last + step, True
+
+def _eval_random_spike(g, t, rng):
+    val = g.base + np.sin(t / 60.0) * g.span * 0.1
+    spike = rng.random(len(g)) < g.spike_chance
+    return np.where(spike, val * g.spike_multiplier, val), True
+
+def _eval_random_binary(g, t, rng):
+    return np.where(rng.random(len(g)) < g.spike_chance, g.max, g.min), False
+
+def _eval_step(g, t, rng):
+    return np.where((t // 10.0) % 2 == 0, g.min, g.max), False
+
+def _eval_sawtooth(g, t, rng):
+    return g.min + g.span * ((t % g.period) / g.period), True
+
+def _eval_square_wave(g, t, rng):
+    return np.where((t % g.period) < g.period / 2, g.max, g.min), False
+
+def _eval_triangle_wave(g, t, rng):
+    phase = t % g.period
+    half_p = g.period / 2
+    up = g.min + g.span * (phase / half_p)
+    down = g.max - g.span * ((phase - half_p) / half_p)
+    return np.where(phase < half_p, up, down), True
+
+def _eval_pulse(g, t, rng):
+    return np.where((t % g.period) < g.pulse_width, g.max, g.min), False
+
+EVALUATORS = {
+    "sine": _eval_sine,
+    "ramp": _eval_ramp,
+    "random_walk": _eval_random_walk,
+    "random_spike": _eval_random_spike,
+    "random_binary": _eval_random_binary,
+    "step": _eval_step,
+    "sawtooth": _eval_sawtooth,
+    "square_wave": _eval_square_wave,
+    "triangle_wave": _eval_triangle_wave,
+    "pulse": _eval_pulse,
+}
+
+
+class SensorBank:
+    """
+    Vectorized update engine for large sensor populations.
+
+    Plain `Sensor` objects are grouped by simulation_type and evaluated in one
+    NumPy pass per group; results are written back to `sensor.value`.
+    Sensors with an active priority or fault, specialized models (FACP, pump)
+    and unknown simulation types fall back to their own `update()`.
+    """
+    def __init__(self, sensors, rng=None):
+        # One stream for the whole bank; seeded from SIM_SEED when set
+        self.rng = rng if rng is not None else np.random.default_rng(stream_seed("sensor_bank"))
+        self.groups = []
+        self.fallback = []
+        self.fallback_index = []
+
+        sensors = list(sensors)
+        self.size = len(sensors)
+
+        by_type = {}
+        for i, s in enumerate(sensors):
+            if type(s) is Sensor and s.simulation_type in EVALUATORS:
+                by_type.setdefault(s.simulation_type, []).append((i, s))
+            else:
+                self.fallback.append(s)
+                self.fallback_index.append(i)
+
+        # Position -> group number (-1 for fallback sensors) and index within the group
+        self.group_of = np.full(self.size, -1, dtype=np.intp)
+        self.member = np.zeros(self.size, dtype=np.intp)
+        for sim_type, members in by_type.items():
+            group = SensorGroup(sim_type, [s for _, s in members])
+            # Position of each member in the order the bank was built from
+            group.index = np.array([i for i, _ in members], dtype=np.intp)
+            self.group_of[group.index] = len(self.groups)
+            self.member[group.index] = np.arange(len(group))
+            self.groups.append(group)
+        self._fallback_at = dict(zip(self.fallback_index, self.fallback))
+
+    def __len__(self):
+        return sum(len(g) for g in self.groups)
+
+    def update(self, now=None, due=None):
+        """Update every sensor, or only the positions listed in `due`."""
+        if now is None:
+            now = clock.now()
+
+        if due is None:
+            for g in self.groups:
+                self._update_group(g, now)
+            for s in self.fallback:
+                s.update()
+            return
+
+        groups = self.group_of[due]
+        for n in np.unique(groups).tolist():
+            if n < 0:
+                for i in due[groups < 0].tolist():
+                    self._fallback_at[i].update()
+            else:
+                self._update_group(self.groups[n], now, np.sort(self.member[due[groups == n]]))
+
+    def _update_group(self, g, now, selected=None):
+        """Evaluates the whole group, or only the members at `selected` (cost follows their count)."""
+        sub = g if selected is None else g.take(selected)
+        t = now - sub.phase
+        values, clamp = EVALUATORS[g.simulation_type](sub, t, self.rng)
+        if clamp:
+            values = values + self.rng.uniform(-sub.noise, sub.noise)
+            values = np.clip(values, sub.min, sub.max)
+        values = np.array(values, dtype=float)
+
+        # Faults and priority overrides keep the exact scalar semantics
+        overridden = np.flatnonzero(sub.overridden).tolist()
+        for k in overridden:
+            sub.sensors[k].update()
+        if overridden:
+            plain = ~sub.overridden
+            for sensor, value in zip(itertools.compress(sub.sensors, plain), values[plain].tolist()):
+                sensor.value = value
+        else:
+            for sensor, value in zip(sub.sensors, values.tolist()):
+                sensor.value = value
+
+        if g.simulation_type == "random_walk":
+            for k in overridden:
+                values[k] = sub.sensors[k].last_val
+            if selected is None:
+                g.last = values
+            else:
+                g.last[selected] = values
+            for sensor, value in zip(sub.sensors, values.tolist()):
+                sensor.last_val = value
@@ -1,6 +1,26 @@
 import random
-import time
 import math
+import zlib
+from core import clock
+
+# Global seed for reproducible runs; None keeps every sensor on fresh OS entropy
+_seed = None
+
+def set_seed(seed):
+    global _seed
+    _seed = seed
+
+def get_seed():
+    return _seed
+
+def stream_seed(key):
+    """Deterministic per-stream seed derived from the global seed and a stable key (e.g. sensor name)."""
+    if _seed is None:
+        return None
+    return ((int(_seed) & 0xFFFFFFFF) << 32) | zlib.crc32(str(key).encode())
+
+def sensor_rng(name):
+    return random.Random(stream_seed(name))
 
 class Sensor:
     def __init__(self, name, unit, base, min, max, noise=0.1, period=1.0, writable=True, simulation_type="sine", **kwargs):
@@ -12,33 +32,64 @@ class Sensor:
         self.noise = noise
         self.period = period
         self.value = base
-        self.t0 = time.time()
+        self.t0 = clock.now()
+        self.rng = sensor_rng(name)
         self.fault = None
         self.writable = writable
         self.priority_array = [None] * 16
         self.simulation_type = simulation_type
         self.last_val = base
+        # (flags array, position) of this sensor's override flag in a SensorBank group, if any
+        self.override_flag = None
+        # Called with the sensor's name after each priority-array write (set by the registry)
+        self.on_priority_change = None
 
         # Capture extra args from config for specific simulation types
         self.spike_chance = kwargs.get("spike_chance", 0.05)
         self.spike_multiplier = kwargs.get("spike_multiplier", 1.5)
         self.pulse_width = kwargs.get("pulse_width", 1.0)
+        # Seconds between updates; None means every simulation tick
+        self.update_period = kwargs.get("update_period")
+        # Report-by-exception: minimum change to report, and heartbeat interval in seconds
+        self.deadband = kwargs.get("deadband", 0.0)
+        self.max_silence = kwargs.get("max_silence")
+        # simulation_type "derived": value is computed from other sensors (see core/derived.py)
+        self.expression = kwargs.get("expression")
 
     def set_fault(self, fault_type, value=None):
         self.fault = {"type": fault_type, "value": value}
+        self._overrides_changed()
 
     def clear_fault(self):
         self.fault = None
+        self._overrides_changed()
 
     def set_priority(self, value, priority):
         """Set a value at a specific priority (1-16)."""
         if self.writable and 1 <= priority <= 16:
             self.priority_array[priority - 1] = value
+            self._overrides_changed()
+            self._priority_changed()
 
     def clear_priority(self, priority):
         """Clear a value at a specific priority (1-16)."""
         if self.writable and 1 <= priority <= 16:
             self.priority_array[priority - 1] = None
+            self._overrides_changed()
+            self._priority_changed()
+
+    def overridden(self):
+        """True while a fault or a priority-array entry takes over the simulated value."""
+        return self.fault is not None or self.priority_array.count(None) != len(self.priority_array)
+
+    def _overrides_changed(self):
+        if self.override_flag is not None:
+            flags, i = self.override_flag
+            flags[i] = self.overridden()
+
+    def _priority_changed(self):
+        if self.on_priority_change is not None:
+            self.on_priority_change(self.name)
 
     def update(self):
         # Check commandable priority first
@@ -55,7 +106,7 @@ class Sensor:
             # Or priority array overrides simulation?
             # Let's say: fault overrides everything (physical failure simulation).
              
-        t = time.time() - self.t0
+        t = clock.now() - self.t0
         
         # Apply fault: Freeze
         if self.fault and self.fault["type"] == "freeze":
@@ -68,6 +119,10 @@ class Sensor:
              self.value = active_value
              return self.value
 
+        # Computed from other sensors by the registry's DerivedPlan
+        if self.simulation_type == "derived":
+            return self.value
+
         val = self.base
 
         if self.simulation_type == "sine":
@@ -79,7 +134,7 @@ class Sensor:
             val = self.min + (self.max - self.min) * progress
         elif self.simulation_type == "random_walk":
             # Random walk from last value
-            step = random.uniform(-self.noise, self.noise)
+            step = self.rng.uniform(-self.noise, self.noise)
             # Tendency to return to base if far away
             if self.last_val > self.base + (self.max - self.min)*0.2:
                 step -= self.noise * 0.5
@@ -90,10 +145,10 @@ class Sensor:
             # A base value that has some sine wave variation
             drift = math.sin(t / 60.0) * (self.max - self.min) * 0.1
             val += drift
-            if random.random() < self.spike_chance:
+            if self.rng.random() < self.spike_chance:
                 val *= self.spike_multiplier
         elif self.simulation_type == "random_binary":
-            if random.random() < self.spike_chance:
+            if self.rng.random() < self.spike_chance:
                 val = self.max
             else:
                 val = self.min
@@ -131,12 +186,12 @@ class Sensor:
             self.value = val
             return self.value
 
-        noise = random.uniform(-self.noise, self.noise)
+        noise = self.rng.uniform(-self.noise, self.noise)
         
         # Apply fault: Noise
         if self.fault and self.fault["type"] == "noise":
             extra_noise = float(self.fault.get("value", 1.0))
-            noise += random.uniform(-extra_noise, extra_noise)
+            noise += self.rng.uniform(-extra_noise, extra_noise)
         
         val += noise
 
@@ -146,7 +201,7 @@ class Sensor:
 
         # Apply fault: Spike
         if self.fault and self.fault["type"] == "spike":
-             if random.random() < 0.05:
+             if self.rng.random() < 0.05:
                  val += float(self.fault.get("value", (self.max - self.min)*0.5))
             
         self.value = max(self.min, min(self.max, val))
@@ -161,8 +216,19 @@ class BaseSensor:
         self.name = name
         self.unit = unit
         self.value = base
-        self.last_update = time.time()
+        self.last_update = clock.now()
+        self.rng = sensor_rng(name)
         self.protocols = kwargs.get("protocols", [])
+        self.update_period = kwargs.get("update_period")
+        self.deadband = kwargs.get("deadband", 0.0)
+        self.max_silence = kwargs.get("max_silence")
+        self.fault = None
+
+    def set_fault(self, fault_type, value=None):
+        self.fault = {"type": fault_type, "value": value}
+
+    def clear_fault(self):
+        self.fault = None
 
     def update(self):
         pass
@@ -209,7 +275,7 @@ class BinarySensor(BaseSensor):
         self.alarm = alarm
 
     def update(self):
-        if self.alarm and random.random() < self.alarm["trigger_probability"]:
+        if self.alarm and self.rng.random() < self.alarm["trigger_probability"]:
             self.value = 1
         else:
             self.value = 0
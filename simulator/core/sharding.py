@@ -0,0 +1,343 @@
+import logging
+import multiprocessing
+import queue
+import re
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from core import clock
+from core.registry import SensorRegistry
+from core.scheduler import FixedRateScheduler
+from core.sensors import Sensor
+from core.simulation import configure_tick, start_simulation
+
+BUILDING_RE = re.compile(r"^(building_\d+)_")
+
+def building_of(name):
+    """Building prefix of a generated sensor name ("building_12_power" -> "building_12")."""
+    match = BUILDING_RE.match(name)
+    return match.group(1) if match else "default"
+
+def point_path(name):
+    """(building, point type) of a sensor: "building_12_chiller_power" -> ("building_12", "chiller_power")."""
+    match = BUILDING_RE.match(name)
+    return (match.group(1), name[match.end():]) if match else ("default", name)
+
+def partition(sensor_defs, shards):
+    """
+    Split sensor definitions into `shards` lists, keeping each building on one shard.
+    Buildings are assigned largest-first to the least loaded shard.
+    """
+    buildings = {}
+    for d in sensor_defs:
+        buildings.setdefault(building_of(d["name"]), []).append(d)
+
+    parts = [[] for _ in range(shards)]
+    for members in sorted(buildings.values(), key=len, reverse=True):
+        min(parts, key=len).extend(members)
+    return [p for p in parts if p]
+
+class SharedValueTable:
+    """
+    One float64 value per sensor in `multiprocessing.shared_memory`, preceded by a
+    small per-shard header: stats and a write sequence. Workers write their slice between
+    `begin_write` and `end_write`; front-ends take consistent copies with `read`.
+    """
+    STAT_FIELDS = ("ticks", "overruns", "max_duration_ms", "max_lateness_ms")
+    # Seconds `read` waits for a stable sequence before giving up (a worker died mid-write)
+    READ_TIMEOUT = 1.0
+
+    def __init__(self, size, shards, name=None):
+        self.size = size
+        self.shards = shards
+        nbytes = 8 * (size + shards * (len(self.STAT_FIELDS) + 1))
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        else:
+            try:
+                # Attaching processes must not unlink the segment when they exit (3.13+)
+                self.shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                self.shm = shared_memory.SharedMemory(name=name)
+
+        buf = np.ndarray((nbytes // 8,), dtype=np.float64, buffer=self.shm.buf)
+        header = shards * len(self.STAT_FIELDS)
+        self.stats = buf[:header].reshape(shards, len(self.STAT_FIELDS))
+        # Per-shard seqlock counter: odd while the shard's slice is being written
+        self.sequence = buf[header:header + shards]
+        self.values = buf[header + shards:]
+        if name is None:
+            buf[:] = 0.0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def begin_write(self, shard_id):
+        self.sequence[shard_id] += 1
+
+    def end_write(self, shard_id):
+        self.sequence[shard_id] += 1
+
+    def read(self):
+        """(version, copy of all values) with no shard mid-write. `version` counts completed writes."""
+        sequence, values = self.read_sequence()
+        return int(sequence.sum()) // 2, values
+
+    def read_sequence(self):
+        """
+        (per-shard write sequences, copy of all values) with no shard mid-write, re-copying until
+        the sequences are even and unchanged across the copy; the sequences are the copy's.
+        """
+        deadline = time.monotonic() + self.READ_TIMEOUT
+        while True:
+            before = self.sequence.copy()
+            if not (before % 2).any():
+                values = self.values.copy()
+                if np.array_equal(before, self.sequence):
+                    break
+            if time.monotonic() > deadline:
+                logging.warning("Shared value table kept changing during reads; using a possibly torn copy")
+                before, values = self.sequence.copy(), self.values.copy()
+                break
+            time.sleep(0)
+        values.flags.writeable = False
+        return before, values
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+def _apply_command(registry, command):
+    op, name, *args = command
+    sensor = registry.get_sensor(name)
+    if sensor is None:
+        return
+    if op == "set_priority":
+        sensor.set_priority(*args)
+    elif op == "clear_priority":
+        sensor.clear_priority(*args)
+    elif op == "set_fault":
+        sensor.set_fault(*args)
+    elif op == "clear_fault":
+        sensor.clear_fault()
+
+def run_shard(shard_id, table_name, size, shards, offset, sensor_defs, commands, interval, policy, use_bank,
+              clock_config=None):
+    """Worker process entry point: simulates one shard into its slice of the shared table."""
+    if clock_config:
+        clock.apply_clock_config(clock_config)
+    table = SharedValueTable(size, shards, name=table_name)
+    registry = SensorRegistry(use_bank=use_bank)
+    for d in sensor_defs:
+        registry.add(Sensor(**d))
+    tick_interval = configure_tick(registry, interval)
+
+    scheduler = FixedRateScheduler(tick_interval, policy)
+    out = table.values[offset:offset + len(sensor_defs)]
+    stats = table.stats[shard_id]
+
+    def tick():
+        # Priority writes and faults routed from the front-end process
+        while True:
+            try:
+                _apply_command(registry, commands.get_nowait())
+            except queue.Empty:
+                break
+
+        registry.update_due()
+        table.begin_write(shard_id)
+        out[:] = registry.latest.values
+        table.end_write(shard_id)
+        s = scheduler.stats
+        stats[:] = (s.ticks + 1, s.overruns, s.duration.max, s.lateness.max)
+
+    scheduler.run(tick)
+
+class RemoteSensor:
+    """
+    Front-end stand-in for a sensor simulated in a worker process.
+    `value` reads the shared table; writes and faults are forwarded to the owning shard.
+    """
+    def __init__(self, registry, index, commands, name, unit, writable=True, simulation_type="sine", **kwargs):
+        self._registry = registry
+        self._index = index
+        self._commands = commands
+        self._fault = None
+        self.name = name
+        self.unit = unit
+        self.writable = writable
+        self.simulation_type = simulation_type
+        self.min = kwargs.get("min")
+        self.max = kwargs.get("max")
+        self.update_period = kwargs.get("update_period")
+        self.deadband = kwargs.get("deadband")
+        self.max_silence = kwargs.get("max_silence")
+        self.priority_array = [None] * 16
+
+    @property
+    def value(self):
+        return float(self._registry.table.values[self._index])
+
+    @property
+    def fault(self):
+        return self._fault
+
+    @fault.setter
+    def fault(self, fault):
+        # The API assigns `sensor.fault` directly; route it like set_fault/clear_fault
+        self._fault = fault
+        if fault is None:
+            self._commands.put(("clear_fault", self.name))
+        else:
+            self._commands.put(("set_fault", self.name, fault["type"], fault.get("value")))
+
+    def set_fault(self, fault_type, value=None):
+        self.fault = {"type": fault_type, "value": value}
+
+    def clear_fault(self):
+        self.fault = None
+
+    def set_priority(self, value, priority):
+        if self.writable and 1 <= priority <= 16:
+            self.priority_array[priority - 1] = value
+            self._commands.put(("set_priority", self.name, value, priority))
+            self._registry.priority_changed(self.name)
+
+    def clear_priority(self, priority):
+        if self.writable and 1 <= priority <= 16:
+            self.priority_array[priority - 1] = None
+            self._commands.put(("clear_priority", self.name, priority))
+            self._registry.priority_changed(self.name)
+
+class ShardedRegistry(SensorRegistry):
+    """
+    Registry for the front-end process when buildings are simulated by worker processes.
+    Snapshots hold read-only copies of the shared value table taken under its seqlock, so
+    a snapshot never changes and never mixes two writes of a shard; their version is the
+    total number of shard writes completed. A front-end loop (see `start_sharded_simulation`)
+    calls `update_due` at the tick rate, which publishes and notifies subscribers whenever a
+    shard has written; `snapshot` only returns the latest one.
+    """
+    def __init__(self, table, processes, shard_sizes, max_silence=None):
+        super().__init__(max_silence=max_silence)
+        self.table = table
+        self.processes = processes
+        self.shard_sizes = shard_sizes
+        # First registry position of each shard, plus the total
+        self.shard_offsets = np.concatenate([[0], np.cumsum(shard_sizes)]).astype(np.intp)
+        # Per-shard write sequences of the published snapshot's values
+        self._sequence = None
+
+    def _update(self, due=None):
+        # Sensors are updated by the worker processes
+        pass
+
+    def _publish(self, due=None):
+        """
+        Swaps in a snapshot of the shared table if any shard wrote since the last one. Caller
+        holds the lock. With `due` (positions known to have changed), change tracking looks
+        only at them and at the slices of the shards that wrote; without it, at every sensor.
+        """
+        snap = self.latest
+        if int(self.table.sequence.sum()) // 2 != snap.version or len(snap) != len(self.sensors):
+            resized = len(snap) != len(self.sensors)
+            self._sensor_list()
+            sequence, values = self.table.read_sequence()
+            positions = None
+            if due is not None and self._sequence is not None and not resized:
+                positions = np.union1d(due, self._shard_positions(np.flatnonzero(sequence != self._sequence)))
+            self._sequence = sequence
+            self.latest = self._make_snapshot(int(sequence.sum()) // 2, values, positions)
+        return self.latest
+
+    def _shard_positions(self, shards):
+        """Registry positions of the given shards' slices."""
+        offsets = self.shard_offsets
+        return np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in shards.tolist()] +
+                              [np.empty(0, dtype=np.intp)])
+
+    def update_due(self):
+        """
+        One front-end tick: publishes and notifies subscribers only when the shards have moved on.
+        Only the shards that wrote are checked for changes.
+        """
+        with self.lock:
+            previous = self.latest
+            snap = self._publish(np.empty(0, dtype=np.intp))
+        if snap is not previous:
+            self._notify(snap)
+
+    update_all = update_due
+
+    def snapshot(self):
+        return self.latest
+
+    def get(self, name):
+        return self.sensors[name].value
+
+    def shard_stats(self):
+        stats = []
+        for shard_id, (size, proc) in enumerate(zip(self.shard_sizes, self.processes)):
+            row = dict(zip(SharedValueTable.STAT_FIELDS, self.table.stats[shard_id].tolist()))
+            row.update({"shard": shard_id, "sensors": size, "pid": proc.pid, "alive": proc.is_alive()})
+            stats.append(row)
+        return stats
+
+    def stop(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        for proc in self.processes:
+            proc.terminate()
+        for proc in self.processes:
+            proc.join(timeout=2)
+        self.table.unlink()
+
+def start_sharded_simulation(sensor_defs, workers, interval=1.0, policy="catch_up", use_bank=False, clock_config=None,
+                             max_silence=None):
+    """
+    Partitions sensors by building across `workers` processes and returns a ShardedRegistry
+    whose sensors read from the shared value table, with its front-end loop polling the
+    shards every tick.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    shards = partition(sensor_defs, workers)
+    total = sum(len(s) for s in shards)
+    table = SharedValueTable(total, len(shards))
+
+    processes = []
+    queues = []
+    offset = 0
+    for shard_id, defs in enumerate(shards):
+        commands = ctx.Queue()
+        proc = ctx.Process(
+            target=run_shard,
+            args=(shard_id, table.name, total, len(shards), offset, defs, commands, interval, policy, use_bank,
+                  clock_config),
+            name=f"sim-shard-{shard_id}",
+            daemon=True,
+        )
+        processes.append(proc)
+        queues.append(commands)
+        offset += len(defs)
+
+    registry = ShardedRegistry(table, processes, [len(s) for s in shards], max_silence)
+    index = 0
+    for defs, commands in zip(shards, queues):
+        for d in defs:
+            registry.sensors[d["name"]] = RemoteSensor(registry, index, commands, **d)
+            index += 1
+
+    # Initial all-zero snapshot, so readers never publish
+    registry.publish()
+    for proc in processes:
+        proc.start()
+    start_simulation(registry, interval, "skip")
+
+    buildings = len({building_of(d["name"]) for d in sensor_defs})
+    logging.info(f"Sharded simulation: {total} sensors, {buildings} buildings across {len(shards)} shards")
+    for shard_id, (defs, proc) in enumerate(zip(shards, processes)):
+        logging.info(f"  shard {shard_id} (pid {proc.pid}): {len(defs)} sensors")
+    return registry
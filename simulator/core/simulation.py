@@ -1,21 +1,36 @@
-import time
 import logging
 import threading
+from core.scheduler import FixedRateScheduler
 
-def run_simulation_loop(registry, interval=1.0):
+def configure_tick(registry, interval=1.0):
     """
-    Background loop that updates all sensor values in the registry.
+    Sensors faster than the default interval shorten the tick; everything else
+    keeps its own update_period (or `interval`) via the registry's update wheel.
+    Returns the tick interval.
     """
-    logging.info(f"Starting simulation loop (interval: {interval}s)")
-    
+    fastest = registry.min_update_period()
+    tick_interval = min(interval, fastest) if fastest else interval
+    registry.configure_rates(tick_interval, interval)
+    return tick_interval
+
+def run_simulation_loop(registry, interval=1.0, policy="catch_up"):
+    """
+    Background loop that updates all sensor values in the registry
+    on a fixed-rate, drift-free schedule.
+    """
+    tick_interval = configure_tick(registry, interval)
+    logging.info(f"Starting simulation loop (interval: {interval}s, tick: {tick_interval}s, policy: {policy})")
+    scheduler = FixedRateScheduler(tick_interval, policy)
+    registry.scheduler = scheduler
+
     # Track previous values to log changes for verification
     prev_values = {}
     critical_sensors = ["building_1_motion", "building_1_fire_alarm"]
 
-    while True:
+    def tick():
         try:
-            registry.update_all()
-            
+            registry.update_due()
+
             # Verification: Log specific binary sensors when they change
             for name in critical_sensors:
                 sensor = registry.get_sensor(name)
@@ -24,14 +39,13 @@ def run_simulation_loop(registry, interval=1.0):
                     if prev_values.get(name) != val:
                         logging.info(f"[VERIFY] {name} toggled to {val}")
                         prev_values[name] = val
-            
-            time.sleep(interval)
         except Exception as e:
             logging.error(f"Error in simulation loop: {e}")
-            time.sleep(interval)
 
-def start_simulation(registry, interval=1.0):
+    scheduler.run(tick)
+
+def start_simulation(registry, interval=1.0, policy="catch_up"):
     """Starts the simulation loop in a daemon thread."""
-    thread = threading.Thread(target=run_simulation_loop, args=(registry, interval), daemon=True)
+    thread = threading.Thread(target=run_simulation_loop, args=(registry, interval, policy), daemon=True)
     thread.start()
     return thread
@@ -0,0 +1,45 @@
+import numpy as np
+
+class UpdateWheel:
+    """
+    Decides which sensors are due on each simulation tick.
+
+    Sensors are grouped by update period, rounded to a whole number of ticks.
+    Each period class is a wheel with one slot per tick of its period and its
+    sensors are spread round-robin across the slots, so a tick only touches the
+    one slot that is due in each class. Per-tick cost is proportional to the
+    number of due sensors plus the number of distinct periods.
+    """
+    def __init__(self, periods, tick_interval):
+        self.tick_interval = tick_interval
+        self.tick = 0
+        self.size = len(periods)
+
+        classes = {}
+        for i, period in enumerate(periods):
+            ticks = max(1, int(round(period / tick_interval)))
+            classes.setdefault(ticks, []).append(i)
+
+        # (period_in_ticks, {slot: positions}); slots with no sensors are left out
+        self.wheels = []
+        for ticks, members in sorted(classes.items()):
+            slots = {}
+            for slot in range(min(ticks, len(members))):
+                slots[slot] = np.array(members[slot::ticks], dtype=np.intp)
+            self.wheels.append((ticks, slots))
+
+    def every_tick(self):
+        """True when all sensors run on every tick (no per-sensor rates configured)."""
+        return all(ticks == 1 for ticks, _ in self.wheels)
+
+    def advance(self):
+        """Positions due on the current tick; moves the wheel forward by one tick."""
+        due = []
+        for ticks, slots in self.wheels:
+            positions = slots.get(self.tick % ticks)
+            if positions is not None:
+                due.append(positions)
+        self.tick += 1
+        if not due:
+            return np.empty(0, dtype=np.intp)
+        return due[0] if len(due) == 1 else np.concatenate(due)
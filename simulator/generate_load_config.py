@@ -1,5 +1,8 @@
+import copy
 import yaml
 import os
+from core.config_cache import compile_configs
+from services.modbus_map import MAX_UNIT_ID
 
 # Configuration
 OUTPUT_DIR = "config"
@@ -11,6 +14,7 @@ def main():
     holding_registers = {}
     mqtt_topics = {}
     bacnet_objects = {}
+    schedules = {}
 
     # Modbus starting addresses
     # 30001+ for Input Registers (Analog Inputs)
@@ -33,13 +37,16 @@ def main():
 
     num_buildings = presets.get("settings", {}).get("num_buildings", 50)
     templates = presets.get("templates", [])
+    # Points added after the original layout; their addresses and instances follow every
+    # building's `templates` block, so existing Modbus addresses and BACnet instances stay put
+    appended_templates = presets.get("appended_templates", [])
 
     print(f"Generating configuration for {num_buildings} buildings...")
 
     for i in range(1, num_buildings + 1):
         building_id = f"building_{i}"
         
-        for t in templates:
+        for t in templates + appended_templates:
             sensor_name = f"{building_id}_{t['suffix']}"
             
             # 1. Sensor Definition
@@ -54,50 +61,73 @@ def main():
             }
             
             # Copy optional simulation parameters
-            for k in ["noise", "spike_chance", "spike_multiplier", "period", "pulse_width"]:
+            for k in ["noise", "spike_chance", "spike_multiplier", "period", "pulse_width", "update_period",
+                      "deadband", "max_silence"]:
                 if k in t:
                     sensor_def[k] = t[k]
+            # Derived sensors reference their building's sensors as {building}_<suffix>
+            if "expression" in t:
+                sensor_def["expression"] = t["expression"].format(building=building_id)
             sensors.append(sensor_def)
 
-            # 2. Modbus Mapping
-            if t["modbus"] == "ir":
-                input_registers[ir_counter] = {"sensor": sensor_name, "scale": t.get("scale", 1)}
-                ir_counter += 1
-            elif t["modbus"] == "di":
-                discrete_inputs[di_counter] = {"sensor": sensor_name}
-                di_counter += 1
-            elif t["modbus"] == "hr":
-                holding_registers[hr_counter] = {"sensor": sensor_name, "scale": t.get("scale", 1), "writable": True}
-                hr_counter += 1
-
-            # 3. MQTT Mapping
+            # 2. MQTT Mapping
             mqtt_topics[sensor_name] = f"campus/{building_id}/{t['suffix']}"
 
-            # 4. BACnet Mapping
-            if t["unit"] == "bool":
-                obj_type = "binaryValue"
-                instance = bv_counter
-                bv_counter += 1
-            else:
-                obj_type = "analogValue"
-                instance = av_counter
-                av_counter += 1
-            
-            if obj_type not in bacnet_objects:
-                bacnet_objects[obj_type] = {}
-            bacnet_objects[obj_type][instance] = {"sensor": sensor_name}
+            # 3. Schedules
+            if "schedule" in t:
+                schedules[f"{sensor_name}_schedule"] = {"target": sensor_name, **copy.deepcopy(t["schedule"])}
+
+    # Protocol addresses: every building's original points first, then the appended ones
+    for group in (templates, appended_templates):
+        for i in range(1, num_buildings + 1):
+            building_id = f"building_{i}"
+            for t in group:
+                sensor_name = f"{building_id}_{t['suffix']}"
+
+                # 4. Modbus Mapping
+                if t["modbus"] == "ir":
+                    input_registers[ir_counter] = {"sensor": sensor_name, "scale": t.get("scale", 1)}
+                    ir_counter += 1
+                elif t["modbus"] == "di":
+                    discrete_inputs[di_counter] = {"sensor": sensor_name}
+                    di_counter += 1
+                elif t["modbus"] == "hr":
+                    holding_registers[hr_counter] = {"sensor": sensor_name, "scale": t.get("scale", 1), "writable": True}
+                    hr_counter += 1
+
+                # 5. BACnet Mapping
+                if t["unit"] == "bool":
+                    obj_type = "binaryValue"
+                    instance = bv_counter
+                    bv_counter += 1
+                else:
+                    obj_type = "analogValue"
+                    instance = av_counter
+                    av_counter += 1
+
+                if obj_type not in bacnet_objects:
+                    bacnet_objects[obj_type] = {}
+                bacnet_objects[obj_type][instance] = {"sensor": sensor_name}
 
     # Prepare final data structures
     sensors_data = {"sensors": sensors}
     
+    # One Modbus unit ID per building (unit IDs stop at 247)
+    modbus_units = {i: f"building_{i}" for i in range(1, min(num_buildings, MAX_UNIT_ID) + 1)}
+    if num_buildings > MAX_UNIT_ID:
+        print(f"Warning: only the first {MAX_UNIT_ID} buildings get a Modbus unit ID")
+
     modbus_data = {
         "holding_registers": holding_registers,
         "input_registers": input_registers,
-        "discrete_inputs": discrete_inputs
+        "discrete_inputs": discrete_inputs,
+        "units": modbus_units
     }
     
     mqtt_data = {"topics": mqtt_topics}
 
+    schedules_data = {"calendars": presets.get("calendars", {}), "schedules": schedules}
+
     # Write to files
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -113,6 +143,13 @@ def main():
     with open(os.path.join(OUTPUT_DIR, "bacnet_map.yaml"), "w") as f:
         yaml.dump(bacnet_objects, f, sort_keys=False)
 
+    # Schedules write priority arrays, so they only run when SIM_SCHEDULES points at a file
+    with open(os.path.join(OUTPUT_DIR, "schedules.example.yaml"), "w") as f:
+        yaml.dump(schedules_data, f, sort_keys=False)
+
+    # Pre-build the compiled config cache so the next start skips YAML parsing
+    compile_configs(OUTPUT_DIR)
+
     print(f"Done! Generated {len(sensors)} sensors across {num_buildings} buildings.")
     print(f"Files saved to {OUTPUT_DIR}/")
 
@@ -1,22 +1,24 @@
-import threading
+import atexit
 import time
 import os
 import logging
 import warnings
 from dotenv import load_dotenv
-import yaml
 
 # Load environment variables
 load_dotenv()
 
 from core.sensors import Sensor
+from core.clock import apply_clock_config, now
 from core.registry import SensorRegistry
 from core.simulation import start_simulation
-from services.modbus_server import run_modbus
-from services.bacnet_server import run_bacnet
-from services.opcua_server import start_opcua
-from services.enip_server import start_enip
-from services.mqtt_client import run_mqtt, set_mqtt_enabled
+from core.sharding import start_sharded_simulation
+from core.recording import Recorder, Recording, ReplaySource
+from core.journal import WriteJournal, DEFAULT_CAPACITY
+from core.schedules import ScheduleEngine, load_schedules
+from core.history import SensorHistory
+from core.config_cache import load_yaml
+from services.plugins import start_plugins
 from api.server import run_api
 
 # Configure logging
@@ -25,48 +27,126 @@ warnings.filterwarnings("ignore", message="no signal handlers for child threads"
 logging.getLogger("pymodbus").setLevel(logging.WARNING)
 logging.getLogger("bacpypes").setLevel(logging.WARNING)
 
-def load_config(registry):
+DEFAULT_SENSORS = [
+    {"name": "temperature", "unit": "C", "base": 22.0, "min": -10, "max": 50, "writable": True},
+]
+
+def load_sensor_defs():
     base_dir = os.path.dirname(os.path.abspath(__file__))
     config_path = os.path.join(base_dir, "config", "sensors.yaml")
-    
+
     if os.path.exists(config_path):
-        with open(config_path, "r") as f:
-            config = yaml.safe_load(f)
-            for s in config.get("sensors", []):
-                registry.add(Sensor(**s))
-        logging.info(f"Loaded {len(registry.sensors)} sensors from {config_path}")
-    else:
-        logging.warning("Config file not found, using default sensors")
-        registry.add(Sensor("temperature", "C", 22.0, -10, 50, writable=True))
+        config = load_yaml(config_path)
+        sensor_defs = config.get("sensors", [])
+        logging.info(f"Loaded {len(sensor_defs)} sensors from {config_path}")
+        return sensor_defs
+
+    logging.warning("Config file not found, using default sensors")
+    return DEFAULT_SENSORS
+
+def load_config(registry):
+    for s in load_sensor_defs():
+        registry.add(Sensor(**s))
+
+def configure_clock():
+    """Installs the simulation clock and RNG seed from the environment; returns the settings for worker processes."""
+    start = os.getenv("SIM_CLOCK_START")
+    seed = os.getenv("SIM_SEED")
+    clock_config = {
+        "mode": os.getenv("SIM_CLOCK", "realtime"),
+        "scale": float(os.getenv("SIM_CLOCK_SCALE", 60)),
+        "start": float(start) if start else None,
+        "seed": int(seed) if seed else None,
+    }
+    apply_clock_config(clock_config)
+    # Workers must share one timeline with the front-end
+    clock_config["start"] = now()
+    logging.info(f"Simulation clock: {clock_config['mode']} (seed: {clock_config['seed']})")
+    return clock_config
+
+def configure_recording(registry):
+    """Attaches a recorder (SIM_RECORD) and/or a replay source (SIM_REPLAY) to the registry."""
+    replay_path = os.getenv("SIM_REPLAY")
+    if replay_path:
+        speed = float(os.getenv("SIM_REPLAY_SPEED", 1.0))
+        loop = os.getenv("SIM_REPLAY_LOOP", "False").lower() == "true"
+        registry.replay = ReplaySource(Recording(replay_path), speed, loop)
+        logging.info(f"Replaying {replay_path} at {speed}x (loop: {loop})")
+
+    record_path = os.getenv("SIM_RECORD")
+    if record_path:
+        recorder = Recorder(record_path)
+        registry.subscribe(recorder.record)
+        atexit.register(recorder.close)
+
+def configure_journal(registry):
+    """Sizes the write audit journal and, with SIM_WRITE_JOURNAL, flushes it to that file in the background."""
+    path = os.getenv("SIM_WRITE_JOURNAL") or None
+    capacity = int(os.getenv("SIM_WRITE_JOURNAL_SIZE", DEFAULT_CAPACITY))
+    registry.journal = WriteJournal(capacity, path).start()
+    if path:
+        atexit.register(registry.journal.close)
+        logging.info(f"Journaling protocol writes to {path}")
+
+def configure_history(registry):
+    """Keeps the last SIM_HISTORY_DEPTH reported values of every sensor in memory (default 0: off)."""
+    depth = int(os.getenv("SIM_HISTORY_DEPTH", 0))
+    if depth > 0:
+        registry.history = SensorHistory(depth)
+        registry.subscribe(registry.history.record)
+
+def configure_schedules(registry):
+    """Runs the schedules file named by SIM_SCHEDULES against the registry on every tick (default: none)."""
+    path = os.getenv("SIM_SCHEDULES")
+    if not path:
+        return
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    schedules, calendars = load_schedules(load_yaml(path))
+    registry.schedules = ScheduleEngine(registry, schedules, calendars)
+    registry.schedules.start()
+    registry.subscribe(registry.schedules.on_tick)
+    logging.info(f"Loaded {len(schedules)} schedules and {len(calendars)} calendars from {path}")
 
 def main():
+    started = time.perf_counter()
     logging.info("Initializing Industrial Protocol Simulator...")
-    registry = SensorRegistry()
-    load_config(registry)
+    clock_config = configure_clock()
+    use_bank = os.getenv("SIM_SENSOR_BANK", "False").lower() == "true"
+    tick_interval = float(os.getenv("SIM_TICK_INTERVAL", 1.0))
+    tick_policy = os.getenv("SIM_TICK_POLICY", "catch_up")
+    workers = int(os.getenv("SIM_WORKERS", 0))
+    max_silence = float(os.getenv("SIM_MAX_SILENCE", 60)) or None
+
+    if workers > 0 and os.getenv("SIM_REPLAY"):
+        logging.warning("SIM_REPLAY runs in a single process; ignoring SIM_WORKERS")
+        workers = 0
 
     # 1. Start core simulation
-    start_simulation(registry)
-
-    # 2. Start industrial protocol servers
-    servers = [
-        (run_modbus, "MODBUS_PORT", 5020, "Modbus"),
-        (run_bacnet, "BACNET_PORT", 47808, "BACnet"),
-        (start_opcua, "OPCUA_PORT", 4840, "OPC-UA"),
-        (start_enip, "ENIP_PORT", 44818, "EtherNet/IP")
-    ]
-
-    for func, env_var, default, name in servers:
-        port = int(os.getenv(env_var, default))
-        logging.info(f"Starting {name} server on port {port}...")
-        threading.Thread(target=func, args=(registry, port), daemon=True).start()
-
-    # 3. Start MQTT Client
-    mqtt_broker = os.getenv("MQTT_BROKER", "localhost")
-    mqtt_port = int(os.getenv("MQTT_PORT", 1883))
-    set_mqtt_enabled(os.getenv("MQTT_ENABLED", "True").lower() == "true")
-    threading.Thread(target=run_mqtt, args=(registry, mqtt_broker, mqtt_port), daemon=True).start()
-
-    # 4. Start Dashboard API
+    if workers > 0:
+        # Buildings are simulated in worker processes; servers read the shared value table
+        registry = start_sharded_simulation(load_sensor_defs(), workers, tick_interval, tick_policy, use_bank,
+                                            clock_config, max_silence)
+        configure_recording(registry)
+        configure_journal(registry)
+        configure_history(registry)
+        configure_schedules(registry)
+    else:
+        registry = SensorRegistry(use_bank=use_bank, max_silence=max_silence)
+        load_config(registry)
+        configure_recording(registry)
+        configure_journal(registry)
+        configure_history(registry)
+        configure_schedules(registry)
+        start_simulation(registry, tick_interval, tick_policy)
+
+    logging.info(f"Simulation core started in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # 2. Start enabled protocol servers (SIM_PROTOCOLS); each library is imported only when enabled
+    start_plugins(registry)
+    logging.info(f"Startup complete in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # 3. Start Dashboard API
     logging.info("Starting Dashboard API on port 8081...")
     run_api(registry) # This is blocking
 
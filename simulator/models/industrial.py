@@ -1,5 +1,3 @@
-import random
-import time
 from enum import IntEnum
 from core.sensors import Sensor
 
@@ -31,11 +29,11 @@ class FACPSensor(Sensor):
 
         # 3. Random event simulation if in normal mode
         if self.state == FACPStatus.NORMAL:
-            if random.random() < 0.001: # Rare fire alarm
+            if self.rng.random() < 0.001: # Rare fire alarm
                 self.set_priority(FACPStatus.ALARM, 1) # Internal override
                 self.last_event = "SMOKE DETECTED - ZONE 4"
                 self.active_zones = [4]
-            elif random.random() < 0.005: # Sensor trouble
+            elif self.rng.random() < 0.005: # Sensor trouble
                 self.state = FACPStatus.TROUBLE
                 self.last_event = "COMM LOSS - DETECTOR 12"
         
@@ -59,7 +57,7 @@ class PumpController(Sensor):
         self.flow = rpm_norm * 500.0 # 0-500 GPM
         
         # Add some noise
-        self.pressure += random.uniform(-0.5, 0.5)
-        self.flow += random.uniform(-1.0, 1.0)
+        self.pressure += self.rng.uniform(-0.5, 0.5)
+        self.flow += self.rng.uniform(-1.0, 1.0)
         
         return self.value
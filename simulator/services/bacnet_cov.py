@@ -0,0 +1,75 @@
+from bacpypes.core import deferred
+from bacpypes.primitivedata import Null
+
+def cov_increment(entry, sensor):
+    """COV increment for an analog object: the map's `cov_increment`, else the sensor's deadband."""
+    value = (entry or {}).get("cov_increment")
+    if value is None:
+        value = getattr(sensor, "deadband", None) or 0.0
+    return float(value)
+
+def binary_priority_array(priority_array):
+    return [Null() if v is None else ("active" if v else "inactive") for v in priority_array]
+
+class ChangeFeed:
+    """
+    Pushes registry changes into the BACnet objects backed by the changed sensors.
+
+    Subscribe `notify` to the registry: it runs on the tick thread and only schedules `apply`
+    on the bacpypes thread (at most one pending call however many ticks arrive), which writes
+    the objects of the positions changed since the last apply, plus those whose priority array
+    was written (a write below the active priority leaves the value as it was). Writing
+    `presentValue` runs the object's property monitors, so COV subscriptions are evaluated for
+    changed objects only.
+    """
+    def __init__(self, registry, objects_by_index, version=0):
+        self.registry = registry
+        self.objects_by_index = objects_by_index
+        self.version = version
+        self.pending = False
+        # Object -> last priority array written, to skip rewriting unchanged arrays
+        self.priorities = {}
+        # Names of sensors whose priority array was written since the last apply
+        self.priority_written = set()
+        registry.priority_listeners.append(self.on_priority_write)
+
+    def notify(self, snapshot):
+        if not self.pending:
+            self.pending = True
+            deferred(self.apply)
+
+    def on_priority_write(self, name):
+        self.priority_written.add(name)
+
+    def apply(self):
+        """Writes every object whose sensor changed since the last call; returns how many."""
+        self.pending = False
+        snapshot, changed = self.registry.changes_since(self.version)
+        self.version = snapshot.version
+        changed = changed.tolist()
+        if self.priority_written:
+            names, self.priority_written = self.priority_written, set()
+            changed = sorted(set(changed).union(snapshot.index[n] for n in names if n in snapshot.index))
+        written = 0
+        for i in changed:
+            objects = self.objects_by_index.get(i)
+            if not objects:
+                continue
+            value = float(snapshot.values[i])
+            for obj, sensor in objects:
+                self.write(obj, sensor, value)
+                written += 1
+        return written
+
+    def write(self, obj, sensor, value):
+        priorities = tuple(sensor.priority_array)
+        if obj.objectIdentifier[0] == "binaryValue":
+            obj.presentValue = "active" if value else "inactive"
+            if self.priorities.get(obj) != priorities:
+                obj.priorityArray = binary_priority_array(priorities)
+        else:
+            # Plain float so COV increment comparisons work on it
+            obj.presentValue = value
+            if self.priorities.get(obj) != priorities:
+                obj.priorityArray = list(priorities)
+        self.priorities[obj] = priorities
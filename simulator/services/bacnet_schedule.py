@@ -0,0 +1,135 @@
+import datetime
+from bacpypes.core import deferred
+from bacpypes.object import CalendarObject, ScheduleObject
+from bacpypes.primitivedata import Date, Null, Real, Time
+from bacpypes.basetypes import (CalendarEntry, DailySchedule, DateRange, DeviceObjectPropertyReference, SpecialEvent,
+                                SpecialEventPeriod, TimeValue)
+from core import clock
+from core.schedules import Calendar
+
+# Date with every field unspecified (an open end of an effective period)
+ANY_DATE = Date((255, 255, 255, 255))
+
+def bacnet_date(day):
+    return Date((day.year - 1900, day.month, day.day, day.isoweekday()))
+
+def atomic(value):
+    """A schedule value as a BACnet atomic: Real, or Null for a relinquish."""
+    return Null() if value is None else Real(value)
+
+def time_values(events):
+    return [TimeValue(time=Time((at // 3600, at // 60 % 60, at % 60, 0)), value=atomic(value)) for at, value in events]
+
+def calendar_object(instance, calendar, today):
+    entries = [CalendarEntry(date=bacnet_date(day)) for day in sorted(calendar.dates)]
+    entries += [CalendarEntry(dateRange=DateRange(startDate=bacnet_date(a), endDate=bacnet_date(b)))
+                for a, b in calendar.ranges]
+    return CalendarObject(
+        objectIdentifier=("calendar", instance),
+        objectName=calendar.name,
+        presentValue=today in calendar,
+        dateList=entries,
+    )
+
+def schedule_object(instance, schedule, value, calendar_ids, object_ids):
+    """
+    ScheduleObject mirroring a core Schedule: its weekly and exception events, effective period,
+    default and priority, referencing the target's BACnet object when it has one.
+    """
+    exceptions = []
+    for precedence, (match, events) in enumerate(schedule.exceptions, 1):
+        if isinstance(match, Calendar):
+            period = SpecialEventPeriod(calendarReference=calendar_ids[match.name])
+        else:
+            period = SpecialEventPeriod(calendarEntry=CalendarEntry(date=bacnet_date(match)))
+        exceptions.append(SpecialEvent(period=period, listOfTimeValues=time_values(events),
+                                       eventPriority=min(precedence, 16)))
+    if schedule.effective:
+        effective = DateRange(startDate=bacnet_date(schedule.effective[0]), endDate=bacnet_date(schedule.effective[1]))
+    else:
+        effective = DateRange(startDate=ANY_DATE, endDate=ANY_DATE)
+    target = object_ids.get(schedule.target)
+    references = [DeviceObjectPropertyReference(objectIdentifier=target, propertyIdentifier="presentValue")] if target else []
+    return ScheduleObject(
+        objectIdentifier=("schedule", instance),
+        objectName=schedule.name,
+        presentValue=atomic(value),
+        effectivePeriod=effective,
+        weeklySchedule=[DailySchedule(daySchedule=time_values(events)) for events in schedule.weekly],
+        exceptionSchedule=exceptions,
+        scheduleDefault=atomic(schedule.default),
+        listOfObjectPropertyReferences=references,
+        priorityForWriting=schedule.priority,
+        statusFlags=[0, 0, 0, 0],
+        reliability="noFaultDetected",
+        outOfService=False,
+    )
+
+class ScheduleFeed:
+    """
+    Serves a ScheduleEngine's schedules and calendars as BACnet Schedule and Calendar objects.
+
+    The engine stays the only evaluator: its write listener queues the schedules it wrote, and
+    `apply` (on the bacpypes thread) copies their values into the objects' presentValue. Calendar
+    presentValue is recomputed only when the simulated date changes. Subscribe `notify` to the registry.
+    """
+    def __init__(self, engine, object_ids):
+        self.engine = engine
+        # Sensor name -> objectIdentifier of the object backed by it, for listOfObjectPropertyReferences
+        self.object_ids = object_ids
+        self.calendar_ids = {name: ("calendar", i) for i, name in enumerate(engine.calendars, 1)}
+        self.schedule_ids = {name: ("schedule", i) for i, name in enumerate(engine.schedules, 1)}
+        # Schedule / calendar name -> objects served for it (one per device holding it)
+        self.schedules = {}
+        self.calendars = {}
+        self.day = None
+        self.written = set()
+        self.pending = False
+        engine.listeners.append(self.on_write)
+
+    def add_objects(self, app, schedules=None):
+        """Adds every calendar and the given schedules (default: all) to `app`; returns the objects added."""
+        today = self.day = datetime.date.fromtimestamp(clock.now())
+        added = []
+        for name, calendar in self.engine.calendars.items():
+            obj = calendar_object(self.calendar_ids[name][1], calendar, today)
+            self.calendars.setdefault(name, []).append(obj)
+            added.append(obj)
+        for schedule in self.engine.schedules.values() if schedules is None else schedules:
+            value = self.engine.values.get(schedule.name, schedule.default)
+            obj = schedule_object(self.schedule_ids[schedule.name][1], schedule, value, self.calendar_ids, self.object_ids)
+            self.schedules.setdefault(schedule.name, []).append(obj)
+            added.append(obj)
+        for obj in added:
+            app.add_object(obj)
+        return added
+
+    def on_write(self, schedule, value):
+        self.written.add(schedule.name)
+        self._defer()
+
+    def notify(self, snapshot):
+        if datetime.date.fromtimestamp(snapshot.timestamp) != self.day:
+            self._defer()
+
+    def _defer(self):
+        if not self.pending:
+            self.pending = True
+            deferred(self.apply)
+
+    def apply(self, now=None):
+        """Writes the values of the schedules written since the last call, and calendars on a new day."""
+        self.pending = False
+        written, self.written = self.written, set()
+        for name in written:
+            value = atomic(self.engine.values.get(name))
+            for obj in self.schedules.get(name, ()):
+                obj.presentValue = value
+        day = datetime.date.fromtimestamp(clock.now() if now is None else now)
+        if day != self.day:
+            self.day = day
+            for name, objects in self.calendars.items():
+                active = day in self.engine.calendars[name]
+                for obj in objects:
+                    obj.presentValue = active
+        return len(written)
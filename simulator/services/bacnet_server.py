@@ -1,169 +1,158 @@
-from bacpypes.core import run
-from bacpypes.app import Application, BIPSimpleApplication
-from bacpypes.object import AnalogValueObject, BinaryValueObject, CalendarObject, ScheduleObject
+from bacpypes.core import run, deferred
+from bacpypes.app import BIPSimpleApplication
+from bacpypes.service.cov import ChangeOfValueServices
+from bacpypes.service.object import ReadWritePropertyMultipleServices
+from bacpypes.object import AnalogValueObject, BinaryValueObject
 from bacpypes.local.device import LocalDeviceObject
-from bacpypes.primitivedata import Real, Date, Time, Boolean, Null
-from bacpypes.basetypes import DateRange, DeviceObjectPropertyReference
-from .bacnet_write import handle_write_property
-import threading
-import time
+from .bacnet_write import SensorWriteServices
+from .bacnet_cov import ChangeFeed, cov_increment
+from .bacnet_schedule import ScheduleFeed
+from .bacnet_vlan import VirtualRouter
 import logging
-import yaml
+from core.config_cache import load_yaml
+from core.sharding import building_of
 import os
 
-# Monkeypatch Application instead of BIPSimpleApplication for better dispatch coverage
+MAP_PATH = "config/bacnet_map.yaml"
+DEVICE_ID = int(os.getenv("BACNET_DEVICE_ID", 1234))
+# With a virtual network number, every building is its own device behind a router on the UDP port
+VIRTUAL_NETWORK = int(os.getenv("BACNET_VIRTUAL_NETWORK", 0))
+# Network number of the BACnet/IP side of that router
+LOCAL_NETWORK = int(os.getenv("BACNET_NETWORK", 1))
 
-def do_WritePropertyRequest(self, apdu):
-    with open("bacnet_debug.txt", "a") as f:
-        try:
-            f.write(f"DEBUG: WritePropertyRequest for {apdu.objectIdentifier}\n")
-            if not hasattr(self, 'registry') or not self.registry:
-                f.write("DEBUG: No registry attached to app\n")
-                # Fallback to default
-                pass 
-            else:
-                obj_type, obj_inst = apdu.objectIdentifier
-                priority = apdu.priority if apdu.priority else 16
-                
-                # Use the handle_write_property logic but inline for debug
-                sensor = None
-                if hasattr(self, 'bacnet_lookup'):
-                    if (obj_type, obj_inst) in self.bacnet_lookup:
-                        sensor_name = self.bacnet_lookup[(obj_type, obj_inst)]
-                        sensor = self.registry.get_sensor(sensor_name)
-                    elif obj_inst in self.bacnet_lookup:
-                        sensor_name = self.bacnet_lookup[obj_inst]
-                        sensor = self.registry.get_sensor(sensor_name)
-                elif hasattr(self.registry, 'by_bacnet_instance'):
-                    sensor = self.registry.by_bacnet_instance(obj_inst)
-
-                if sensor and obj_type in ("analogValue", "analogInput"):
-                    try:
-                        value = apdu.propertyValue.cast_out()
-                    except:
-                        value = apdu.propertyValue.value.cast_out()
-                    
-                    if isinstance(value, Null):
-                        sensor.clear_priority(priority)
-                        f.write(f"DEBUG: Cleared priority {priority} for {sensor.name}\n")
-                    elif hasattr(value, 'value'):
-                        sensor.set_priority(float(value.value), priority)
-                        f.write(f"DEBUG: Set {sensor.name} = {value.value} (pri {priority})\n")
-                    else:
-                        sensor.set_priority(float(value), priority)
-                        f.write(f"DEBUG: Set {sensor.name} = {value} (pri {priority})\n")
-
-            from bacpypes.apdu import SimpleAckPDU
-            self.response(SimpleAckPDU(context=apdu))
-        except Exception as e:
-            f.write(f"DEBUG: Error: {e}\n")
-            from bacpypes.apdu import ErrorPDU
-            self.response(ErrorPDU(context=apdu, errorClass='device', errorCode='operational-problem'))
-
-Application.do_WritePropertyRequest = do_WritePropertyRequest
-
-def run_bacnet(registry, port=47808):
-    # Specialized logger for BACpypes
-    b_logger = logging.getLogger("bacpypes")
-    b_logger.setLevel(logging.DEBUG)
-    fh = logging.FileHandler("bacpypes_detailed.log")
-    fh.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
-    b_logger.addHandler(fh)
+class SimulatorApplication(SensorWriteServices, BIPSimpleApplication, ReadWritePropertyMultipleServices,
+                           ChangeOfValueServices):
+    """BACnet/IP application answering ReadPropertyMultiple, SubscribeCOV and sensor writes as well as ReadProperty."""
+    pass
 
-    device = LocalDeviceObject(
-        objectName="SensorSimulator",
-        objectIdentifier=1234,
+def make_device(name, instance):
+    return LocalDeviceObject(
+        objectName=name,
+        objectIdentifier=instance,
         maxApduLengthAccepted=1024,
         segmentationSupported="segmentedBoth",
         vendorIdentifier=15,
     )
 
-    app = BIPSimpleApplication(device, f"0.0.0.0:{port}")
-    app.registry = registry
-    app.bacnet_lookup = {}
-    app.update_objects = []
+def analog_object(instance_id, sensor, data=None):
+    return AnalogValueObject(
+        objectIdentifier=("analogValue", instance_id),
+        objectName=sensor.name,
+        units="noUnits",
+        presentValue=0.0,
+        description=f"Simulated {sensor.name}",
+        priorityArray=[None] * 16,
+        relinquishDefault=0.0,
+        covIncrement=cov_increment(data, sensor),
+    )
 
-    map_path = "config/bacnet_map.yaml"
+def binary_object(instance_id, sensor):
+    return BinaryValueObject(
+        objectIdentifier=("binaryValue", instance_id),
+        objectName=sensor.name,
+        presentValue="inactive",
+        description=f"Simulated {sensor.name}",
+        priorityArray=[None] * 16,
+        relinquishDefault="inactive",
+    )
+
+def build_objects(registry, map_path=MAP_PATH):
+    """(object, sensor) for every sensor exposed over BACnet, from bacnet_map.yaml if it exists."""
+    objects = []
     if os.path.exists(map_path):
         logging.info(f"Loading BACnet map from {map_path}")
-        with open(map_path, "r") as f:
-            bacnet_config = yaml.safe_load(f)
-        
+        bacnet_config = load_yaml(map_path)
+
         # Analog Values
         for instance_id, data in bacnet_config.get("analogValue", {}).items():
-            instance_id = int(instance_id)
-            sensor_name = data["sensor"]
-            sensor = registry.get_sensor(sensor_name)
+            sensor = registry.get_sensor(data["sensor"])
             if not sensor: continue
-            
-            obj = AnalogValueObject(
-                objectIdentifier=("analogValue", instance_id),
-                objectName=sensor.name,
-                units="noUnits",
-                presentValue=0.0,
-                description=f"Simulated {sensor.name}",
-                priorityArray=[None] * 16,
-                relinquishDefault=0.0,
-            )
-            app.add_object(obj)
-            app.bacnet_lookup[("analogValue", instance_id)] = sensor.name
-            app.update_objects.append((obj, sensor))
+            objects.append((analog_object(int(instance_id), sensor, data), sensor))
 
         # Binary Values
         for instance_id, data in bacnet_config.get("binaryValue", {}).items():
-            instance_id = int(instance_id)
-            sensor_name = data["sensor"]
-            sensor = registry.get_sensor(sensor_name)
+            sensor = registry.get_sensor(data["sensor"])
             if not sensor: continue
-            
-            obj = BinaryValueObject(
-                objectIdentifier=("binaryValue", instance_id),
-                objectName=sensor.name,
-                presentValue="inactive",
-                description=f"Simulated {sensor.name}",
-                priorityArray=[None] * 16,
-                relinquishDefault="inactive",
-            )
-            app.add_object(obj)
-            app.bacnet_lookup[("binaryValue", instance_id)] = sensor.name
-            app.update_objects.append((obj, sensor))
+            objects.append((binary_object(int(instance_id), sensor), sensor))
     else:
         logging.info("BACnet map not found, using default dynamic mapping")
         # Dynamically register sensors
         sorted_sensors = sorted(registry.sensors.values(), key=lambda s: s.name)
-        
         for i, sensor in enumerate(sorted_sensors):
-            instance_id = i + 1
-            obj = AnalogValueObject(
-                objectIdentifier=("analogValue", instance_id),
-                objectName=sensor.name,
-                units="noUnits",
-                presentValue=0.0,
-                description=f"Simulated {sensor.name}",
-                priorityArray=[None] * 16,
-                relinquishDefault=0.0,
-            )
-            app.add_object(obj)
-            app.bacnet_lookup[("analogValue", instance_id)] = sensor.name
-            app.update_objects.append((obj, sensor))
+            objects.append((analog_object(i + 1, sensor), sensor))
+    return objects
+
+def attach(app, registry):
+    app.registry = registry
+    app.write_targets = {}
+    app.journal = registry.journal
+
+def add_sensor_object(app, obj, sensor):
+    app.add_object(obj)
+    # Resolved once here so a WriteProperty never has to search for its sensor
+    app.write_targets[obj.objectIdentifier] = sensor
+
+def building_devices(router, registry, objects):
+    """One virtual device per building (building -> app), numbered DEVICE_ID + 1, + 2, ... in map order."""
+    apps = {}
+    for obj, sensor in objects:
+        building = building_of(sensor.name)
+        app = apps.get(building)
+        if app is None:
+            app = apps[building] = router.add_device(make_device(building, DEVICE_ID + len(apps) + 1))
+            attach(app, registry)
+        add_sensor_object(app, obj, sensor)
+    return apps
+
+def add_schedules(registry, objects, apps=None, app=None):
+    """
+    Serves the registry's schedule engine (if any) as Schedule and Calendar objects: on `app`,
+    or with building devices (`apps`) each schedule on its target's building device.
+    """
+    engine = registry.schedules
+    if engine is None:
+        return None
+    feed = ScheduleFeed(engine, {sensor.name: obj.objectIdentifier for obj, sensor in objects})
+    if apps is None:
+        feed.add_objects(app)
+    else:
+        by_building = {}
+        for schedule in engine.schedules.values():
+            by_building.setdefault(building_of(schedule.target), []).append(schedule)
+        for building, schedules in by_building.items():
+            if building in apps:
+                feed.add_objects(apps[building], schedules)
+            else:
+                logging.warning(f"No BACnet device for building '{building}'; not serving its {len(schedules)} schedules")
+    registry.subscribe(feed.notify)
+    logging.info(f"BACnet serving {len(engine.schedules)} schedules and {len(engine.calendars)} calendars")
+    return feed
+
+def run_bacnet(registry, port=47808):
+    objects = build_objects(registry)
+    if VIRTUAL_NETWORK:
+        router = VirtualRouter(f"0.0.0.0:{port}", LOCAL_NETWORK, VIRTUAL_NETWORK)
+        apps = building_devices(router, registry, objects)
+        add_schedules(registry, objects, apps=apps)
+        deferred(router.announce)
+        logging.info(f"BACnet router to virtual network {VIRTUAL_NETWORK}: {len(apps)} building devices "
+                     f"({DEVICE_ID + 1}-{DEVICE_ID + len(apps)}), {len(objects)} objects")
+    else:
+        app = SimulatorApplication(make_device("SensorSimulator", DEVICE_ID), f"0.0.0.0:{port}")
+        attach(app, registry)
+        for obj, sensor in objects:
+            add_sensor_object(app, obj, sensor)
+        add_schedules(registry, objects, app=app)
+        logging.info(f"BACnet device {DEVICE_ID} serving {len(objects)} objects (COV, ReadPropertyMultiple)")
 
-    def updater():
-        while True:
-            for obj, sensor in app.update_objects:
-                if obj.objectIdentifier[0] == "binaryValue":
-                    obj.presentValue = "active" if sensor.value else "inactive"
-                    # Convert priority array for binary
-                    pa = []
-                    for v in sensor.priority_array:
-                        if v is None:
-                            pa.append(Null())
-                        else:
-                            pa.append("active" if v else "inactive")
-                    obj.priorityArray = pa
-                else:
-                    obj.presentValue = Real(sensor.value)
-                    obj.priorityArray = sensor.priority_array
-            time.sleep(1)
+    # Registry position -> BACnet objects backed by that sensor
+    snapshot = registry.snapshot()
+    objects_by_index = {}
+    for obj, sensor in objects:
+        objects_by_index.setdefault(snapshot.index[sensor.name], []).append((obj, sensor))
 
-    threading.Thread(target=updater, daemon=True).start()
+    # Objects are written from registry change notifications, only for the sensors that changed
+    feed = ChangeFeed(registry, objects_by_index)
+    feed.apply()
+    registry.subscribe(feed.notify)
     run()
@@ -0,0 +1,137 @@
+from bisect import bisect_left, bisect_right
+from copy import deepcopy
+from bacpypes.app import ApplicationIOController
+from bacpypes.apdu import APDU, UnconfirmedRequestPDU, WhoIsRequest
+from bacpypes.appservice import ApplicationServiceAccessPoint, StateMachineAccessPoint
+from bacpypes.bvllservice import BIPSimple, AnnexJCodec, UDPMultiplexer
+from bacpypes.comm import bind
+from bacpypes.netservice import NetworkServiceAccessPoint, NetworkServiceElement
+from bacpypes.npdu import NPDU
+from bacpypes.pdu import Address, LocalBroadcast
+from bacpypes.service.cov import ChangeOfValueServices
+from bacpypes.service.device import WhoIsIAmServices
+from bacpypes.service.object import ReadWritePropertyServices, ReadWritePropertyMultipleServices
+from bacpypes.vlan import Network, Node
+from .bacnet_write import SensorWriteServices
+
+# VLAN address of the router's own port; devices are numbered from 1
+ROUTER_MAC = 0
+
+def vlan_address(n):
+    """Two-octet VLAN station address, so a network holds up to 65535 devices."""
+    return Address(n.to_bytes(2, "big"))
+
+def who_is_limits(pdu):
+    """(low, high) device instance limits of a Who-Is with a range; None for any other PDU."""
+    try:
+        npdu = NPDU()
+        npdu.decode(deepcopy(pdu))
+        if npdu.npduNetMessage is not None:
+            return None
+        apdu = APDU()
+        apdu.decode(npdu)
+        if apdu.apduType != UnconfirmedRequestPDU.pduType or apdu.apduService != WhoIsRequest.serviceChoice:
+            return None
+        request = WhoIsRequest()
+        request.decode(apdu)
+    except Exception:
+        return None
+    if request.deviceInstanceRangeLowLimit is None:
+        return None
+    return request.deviceInstanceRangeLowLimit, request.deviceInstanceRangeHighLimit
+
+class VirtualNetwork(Network):
+    """
+    The VLAN holding the virtual devices behind the router. Unicasts are delivered through an
+    address dict instead of scanning every node. The simulated devices never talk to each other,
+    so a broadcast from a device only goes to the router port, and a broadcast from the router
+    only to the devices: a Who-Is with a device range reaches just the devices inside it (bisect
+    over the sorted device instances). Without this, N devices announcing themselves at startup
+    would cost N * N deliveries.
+    """
+    def __init__(self, name="vlan"):
+        super().__init__(name, broadcast_address=LocalBroadcast())
+        self.by_address = {}
+        # Nodes that are not devices (the router port)
+        self.ports = []
+        # Sorted device instances, and the node of each
+        self.instances = []
+        self.devices = []
+
+    def add_node(self, node, instance=None):
+        super().add_node(node)
+        self.by_address[node.address] = node
+        if instance is None:
+            self.ports.append(node)
+        else:
+            at = bisect_right(self.instances, instance)
+            self.instances.insert(at, instance)
+            self.devices.insert(at, node)
+
+    def broadcast_targets(self, pdu):
+        if not any(pdu.pduSource == port.address for port in self.ports):
+            return self.ports
+        limits = who_is_limits(pdu)
+        if limits is None:
+            return self.devices
+        return self.devices[bisect_left(self.instances, limits[0]):bisect_right(self.instances, limits[1])]
+
+    def process_pdu(self, pdu):
+        if pdu.pduDestination == self.broadcast_address:
+            for node in self.broadcast_targets(pdu):
+                node.response(deepcopy(pdu))
+        else:
+            node = self.by_address.get(pdu.pduDestination)
+            if node is not None:
+                node.response(deepcopy(pdu))
+
+class VirtualDeviceApplication(SensorWriteServices, ApplicationIOController, WhoIsIAmServices,
+                               ReadWritePropertyServices, ReadWritePropertyMultipleServices, ChangeOfValueServices):
+    """One virtual device: a full application stack whose network layer is a VLAN node."""
+    def __init__(self, device, address):
+        ApplicationIOController.__init__(self, device)
+        self.asap = ApplicationServiceAccessPoint()
+        self.smap = StateMachineAccessPoint(device)
+        self.smap.deviceInfoCache = self.deviceInfoCache
+        self.nsap = NetworkServiceAccessPoint()
+        self.nse = NetworkServiceElement()
+        bind(self.nse, self.nsap)
+        bind(self, self.asap, self.smap, self.nsap)
+        self.node = Node(address)
+        self.nsap.bind(self.node)
+
+class VirtualRouter:
+    """
+    Routes between the BACnet/IP network on the UDP port and the virtual network: clients
+    reach a device at `<virtual network>:<station>` after Who-Is-Router-To-Network.
+    """
+    def __init__(self, local_address, local_network, virtual_network):
+        self.nsap = NetworkServiceAccessPoint()
+        self.nse = NetworkServiceElement()
+        bind(self.nse, self.nsap)
+
+        self.bip = BIPSimple()
+        self.annexj = AnnexJCodec()
+        self.mux = UDPMultiplexer(Address(local_address))
+        bind(self.bip, self.annexj, self.mux.annexJ)
+        self.nsap.bind(self.bip, local_network, Address(local_address))
+
+        self.vlan = VirtualNetwork()
+        self.node = Node(vlan_address(ROUTER_MAC))
+        self.vlan.add_node(self.node)
+        self.nsap.bind(self.node, virtual_network, self.node.address)
+        self.devices = {}
+
+    def add_device(self, device):
+        """Attaches a new virtual device for `device` (a LocalDeviceObject) and returns its application."""
+        app = VirtualDeviceApplication(device, vlan_address(len(self.devices) + 1))
+        self.vlan.add_node(app.node, device.objectIdentifier[1])
+        self.devices[device.objectIdentifier[1]] = app
+        return app
+
+    def announce(self):
+        """Tells the IP side which network the devices are on (I-Am-Router-To-Network)."""
+        self.nse.i_am_router_to_network()
+
+    def close_socket(self):
+        self.mux.close_socket()
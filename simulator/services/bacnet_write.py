@@ -1,32 +1,52 @@
-from bacpypes.apdu import WritePropertyRequest
-from bacpypes.primitivedata import Real, Null
-import logging
-
-def handle_write_property(apdu, registry):
-    obj_type, obj_inst = apdu.objectIdentifier
-    
-    # We now use AnalogValue for commandable sensors
-    if obj_type not in ("analogValue", "analogInput"):
-        return
-
-    sensor = registry.by_bacnet_instance(obj_inst)
-    if not sensor or not sensor.writable:
-        return
-
-    priority = apdu.priority
-    if not priority:
-        priority = 16 # Default priority
-
-    # propertyValue.value is an 'Any' object, must cast_out to get actual primitive
-    try:
-        value = apdu.propertyValue.value.cast_out()
-    except Exception as e:
-        logging.error(f"Failed to cast_out property value: {e}")
-        return
-
-    if isinstance(value, Null):
-        sensor.clear_priority(priority)
-    elif isinstance(value, Real):
-        sensor.set_priority(float(value.value), priority)
-    elif isinstance(value, (float, int)):
-        sensor.set_priority(float(value), priority)
+from bacpypes.apdu import SimpleAckPDU
+from bacpypes.capability import Capability
+from bacpypes.errors import ExecutionError
+from bacpypes.primitivedata import Real
+from bacpypes.basetypes import BinaryPV
+
+DEFAULT_PRIORITY = 16
+
+def decode_value(apdu):
+    """Engineering value of a presentValue write, or None for a relinquish (Null)."""
+    value = apdu.propertyValue
+    if value.is_application_class_null():
+        return None
+    if apdu.objectIdentifier[0] == "binaryValue":
+        return 1.0 if value.cast_out(BinaryPV) == "active" else 0.0
+    return float(value.cast_out(Real))
+
+class SensorWriteServices(Capability):
+    """
+    WriteProperty on presentValue of objects backed by simulator sensors. The application's
+    `write_targets` maps object identifier -> sensor, built once when the objects are added, so
+    a write is a dict lookup, a priority-array update and a journal append; no I/O happens on
+    the BACnet thread. Other writes fall through to the standard bacpypes service.
+
+    The application sets `write_targets` and `journal` (a WriteJournal, or None) before serving.
+    """
+
+    def do_WritePropertyRequest(self, apdu):
+        sensor = self.write_targets.get(apdu.objectIdentifier)
+        if sensor is None or apdu.propertyIdentifier != "presentValue":
+            return super().do_WritePropertyRequest(apdu)
+
+        priority = apdu.priority or DEFAULT_PRIORITY
+        if not 1 <= priority <= 16:
+            raise ExecutionError(errorClass="property", errorCode="valueOutOfRange")
+        try:
+            value = decode_value(apdu)
+        except Exception:
+            raise ExecutionError(errorClass="property", errorCode="invalidDataType")
+
+        accepted = bool(sensor.writable)
+        if self.journal is not None:
+            self.journal.record("bacnet", "{}:{}".format(*apdu.objectIdentifier), sensor.name, priority, value,
+                                accepted, str(apdu.pduSource))
+        if not accepted:
+            raise ExecutionError(errorClass="property", errorCode="writeAccessDenied")
+
+        if value is None:
+            sensor.clear_priority(priority)
+        else:
+            sensor.set_priority(value, priority)
+        self.response(SimpleAckPDU(context=apdu))
@@ -1,43 +1,91 @@
 import threading
-import time
 import logging
-import cpppo.server.enip
-from cpppo.server.enip.get_attribute import proxy_simple
+import os
+import numpy as np
+import cpppo.server.enip.main
+from cpppo.server.enip import device
+from core.sharding import point_path
 
-def run_enip(registry, port=44818):
+WRITE_PRIORITY = int(os.getenv("ENIP_WRITE_PRIORITY", 16))
+# Prefix of the per-point-type arrays, e.g. CAMPUS_TEMPERATURE
+TYPE_PREFIX = "CAMPUS_"
+
+class SnapshotView:
+    """
+    A REAL tag's elements as a read-through view of registry snapshot positions. Reads index
+    the shared value array with positions resolved at startup; writes go to the sensors'
+    priority arrays. Implements the vector interface cpppo's Attribute accepts as `default`.
+    """
+    def __init__(self, registry, positions, journal=None):
+        self.registry = registry
+        self.positions = np.asarray(positions, dtype=np.intp)
+        names = registry.snapshot().names
+        self.sensors = [registry.get_sensor(names[i]) for i in self.positions.tolist()]
+        self.journal = journal
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __repr__(self):
+        return f"SnapshotView({len(self)} sensors)"
+
+    def __getitem__(self, key):
+        values = self.registry.snapshot().values
+        if isinstance(key, slice):
+            return values[self.positions[key]].tolist()
+        return float(values[self.positions[key]])
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            targets, values = self.sensors[key], [float(v) for v in value]
+        else:
+            targets, values = [self.sensors[key]], [float(value)]
+        accepted = all(sensor.writable for sensor in targets)
+        for sensor, v in zip(targets, values):
+            if accepted:
+                sensor.set_priority(v, WRITE_PRIORITY)
+            if self.journal is not None:
+                self.journal.record("enip", sensor.name.upper(), sensor.name, WRITE_PRIORITY, v, accepted)
+        if not accepted:
+            # cpppo answers the request with an error status
+            raise AssertionError("Tag elements are read-only")
+
+class TagAttribute(device.Attribute):
+    """cpppo Attribute whose value is the SnapshotView registered for its tag name."""
+    def __init__(self, name, type_cls, default=0, error=0x00, mask=0, views=None):
+        super().__init__(name, type_cls, default=views[name], error=error, mask=mask)
+
+def build_tags(registry):
     """
-    Simulates an EtherNet/IP (CIP) server.
-    Registers are mapped to CIP attributes.
+    Tag name -> SnapshotView, resolved once: a scalar tag per sensor (its name in upper case),
+    a REAL array per building (BUILDING_<n>, sensors in registry order) and one per point type
+    across buildings (CAMPUS_<TYPE>, in building order).
     """
-    # Mapping sensors to CIP tags (example: SENSOR_1, SENSOR_2)
-    # Using 'REAL' (Float32) for sensor values
-    tags = []
-    for sensor in registry.sensors.values():
-        tags.append(f"{sensor.name.upper()} REAL")
-
-    # Start the EtherNet/IP server
-    # Note: cpppo's server.main is quite blocking and designed for CLI, 
-    # but we can use its lower level components.
-    
-    # We will create an attribute proxy and run the server loop
-    proxy = proxy_simple()
-    
-    # Initialize tags in the proxy
-    for tag in tags:
-        name, _ = tag.split()
-        proxy[name] = 0.0
-
-    def updater():
-        while True:
-            for sensor in registry.sensors.values():
-                proxy[sensor.name.upper()] = float(sensor.value)
-            time.sleep(1)
-
-    threading.Thread(target=updater, daemon=True).start()
-    
-    print(f"EtherNet/IP Server starting on port {port}")
-    # Run the server (this is blocking)
-    cpppo.server.enip.main(host='0.0.0.0', port=port, proxy=proxy)
+    snapshot = registry.snapshot()
+    journal = registry.journal
+    buildings, types = {}, {}
+    tags = {}
+    for i, name in enumerate(snapshot.names):
+        tags[name.upper()] = [i]
+        building, point = point_path(name)
+        if building != "default":
+            buildings.setdefault(building.upper(), []).append(i)
+            types.setdefault(TYPE_PREFIX + point.upper(), []).append(i)
+    for group in (buildings, types):
+        for tag, positions in group.items():
+            if tag not in tags:
+                tags[tag] = positions
+    return {tag: SnapshotView(registry, positions, journal) for tag, positions in tags.items()}
+
+def run_enip(registry, port=44818):
+    """EtherNet/IP (CIP) server whose tags read the registry's shared value array directly."""
+    views = build_tags(registry)
+    arrays = sum(1 for view in views.values() if len(view) > 1)
+    logging.info(f"EtherNet/IP Server starting on port {port} ({len(views)} tags, {arrays} arrays)")
+    argv = ["--address", f"0.0.0.0:{port}", "--no-config"]
+    argv += [f"{tag}=REAL[{len(view)}]" for tag, view in views.items()]
+    # Blocking; cpppo serves each tag through a TagAttribute backed by its view
+    cpppo.server.enip.main.main(argv=argv, attribute_class=TagAttribute, attribute_kwds={"views": views})
 
 def start_enip(registry, port=44818):
     threading.Thread(target=run_enip, args=(registry, port), daemon=True).start()
@@ -0,0 +1,107 @@
+import numpy as np
+
+class RegisterImage:
+    """
+    Input-register image shared by several unit IDs: one big-endian float32 per sensor slot
+    per unit, viewed without copying as big-endian 16-bit registers (slot `i` is registers
+    `2i` and `2i + 1`). Each unit sees the same values plus its own offset.
+    """
+    def __init__(self, slot_of, units, offsets=None):
+        # Registry position -> register slot (-1 for sensors not in the image)
+        self.slot_of = np.asarray(slot_of, dtype=np.intp)
+        self.units = list(units)
+        self.rows = {unit: row for row, unit in enumerate(self.units)}
+        if offsets is None:
+            offsets = np.zeros(len(self.units))
+        self.offsets = np.asarray(offsets, dtype=float).reshape(-1, 1)
+        slots = int(self.slot_of.max()) + 1 if len(self.slot_of) else 0
+        self.floats = np.zeros((len(self.units), slots), dtype=">f4")
+        self.registers = self.floats.view(">u2")
+        # Slot -> registry position, for refreshing the whole image in slot order (-1: unused slot)
+        self.position_of = np.full(slots, -1, dtype=np.intp)
+        mapped = np.flatnonzero(self.slot_of >= 0)
+        self.position_of[self.slot_of[mapped]] = mapped
+
+    @classmethod
+    def sorted_by_name(cls, snapshot, units, offsets=None):
+        """Slots in sensor-name order, the layout the Modbus map has always used."""
+        order = sorted(range(len(snapshot.names)), key=snapshot.names.__getitem__)
+        slot_of = np.empty(len(order), dtype=np.intp)
+        slot_of[order] = np.arange(len(order))
+        return cls(slot_of, units, offsets)
+
+    def unit(self, unit_id):
+        """Register view for one unit ID (shares memory with the image)."""
+        return self.registers[self.rows[unit_id]]
+
+    def update(self, values, changed=None):
+        """Writes the changed registry positions (all when `changed` is None) for every unit."""
+        values = np.asarray(values, dtype=float)
+        if changed is None or len(changed) * 2 > len(self.slot_of):
+            # Most of the image is dirty: one sequential pass in slot order is cheaper than scattering
+            # Unused slots read the trailing 0.0
+            np.add(np.append(values, 0.0)[self.position_of], self.offsets, out=self.floats, casting="unsafe")
+            return self.floats.shape[1]
+
+        positions = np.asarray(changed, dtype=np.intp)
+        positions = positions[positions < len(self.slot_of)]
+        slots = self.slot_of[positions]
+        mapped = slots >= 0
+        if not mapped.all():
+            positions, slots = positions[mapped], slots[mapped]
+        if len(slots):
+            dirty = np.empty((len(self.units), len(slots)), dtype=">f4")
+            np.add(values[positions], self.offsets, out=dirty, casting="unsafe")
+            self.floats[:, slots] = dirty
+        return len(slots)
+
+class TableImage:
+    """
+    Packed raw image of one modbus_map.yaml table (uint16 registers or bools). A read first
+    syncs it with the registry, at most once per published snapshot, rewriting only the
+    addresses whose sensors changed since the last sync; the read itself is one slice.
+    """
+    def __init__(self, index):
+        self.index = index
+        self.raw = np.zeros(len(index), dtype=bool if index.bits else np.uint16)
+        # Mapped addresses sorted by registry position, to find the addresses of changed sensors
+        mapped = np.flatnonzero(index.position >= 0)
+        self.addresses = mapped[np.argsort(index.position[mapped], kind="stable")]
+        self.sorted_positions = index.position[self.addresses]
+        self.version = 0
+
+    def addresses_of(self, positions):
+        """Addresses holding any of the given registry positions (a sensor may appear more than once)."""
+        left = np.searchsorted(self.sorted_positions, positions, "left")
+        counts = np.searchsorted(self.sorted_positions, positions, "right") - left
+        hit = counts > 0
+        left, counts = left[hit], counts[hit]
+        if not len(counts):
+            return self.addresses[:0]
+        # Concatenated ranges [left, left + count) without a Python loop
+        starts = np.repeat(left - np.cumsum(counts) + counts, counts)
+        return self.addresses[starts + np.arange(counts.sum())]
+
+    def update(self, values, changed=None):
+        """Re-encodes the addresses of the changed positions (all when `changed` is None)."""
+        if changed is None or len(changed) * 2 > len(self.addresses):
+            addresses = self.addresses
+        else:
+            addresses = self.addresses_of(np.asarray(changed, dtype=np.intp))
+        if len(addresses):
+            self.raw[addresses] = self.index.encode(values, addresses)
+        return len(addresses)
+
+    def sync(self, registry):
+        if registry.snapshot().version == self.version:
+            return
+        snapshot, changed = registry.changes_since(self.version)
+        self.update(snapshot.values, None if self.version == 0 else changed)
+        self.version = snapshot.version
+
+    def read(self, start, count=1):
+        """Raw values for `count` addresses from `start` (unmapped or past-the-end addresses read 0)."""
+        raw = self.raw[start:start + count].tolist()
+        if len(raw) < count:
+            raw += [False if self.index.bits else 0] * (count - len(raw))
+        return raw
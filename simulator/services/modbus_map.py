@@ -0,0 +1,131 @@
+import numpy as np
+from core.sharding import building_of
+
+# Highest unicast Modbus unit ID
+MAX_UNIT_ID = 247
+
+# modbus_map.yaml section -> (datastore key, Modicon base address, single-bit table)
+SECTIONS = {
+    "coils": ("co", 1, True),
+    "discrete_inputs": ("di", 10001, True),
+    "input_registers": ("ir", 30001, False),
+    "holding_registers": ("hr", 40001, False),
+}
+
+class AddressIndex:
+    """
+    Dense lookup for one Modbus table: protocol address -> registry position, scale and
+    writability. Built once from modbus_map.yaml so a read of N addresses is one slice and
+    one gather from the snapshot's value array.
+
+    Registers hold `round(value / scale)` as a signed 16-bit integer; bits are `value >= 0.5`.
+    """
+    def __init__(self, entries, base, index, bits=False):
+        self.bits = bits
+        offsets = {int(addr) - base: item for addr, item in entries.items() if item.get("sensor") in index}
+        size = max(offsets) + 1 if offsets else 0
+        self.position = np.full(size, -1, dtype=np.intp)
+        self.scale = np.ones(size)
+        self.writable = np.zeros(size, dtype=bool)
+        for offset, item in offsets.items():
+            self.position[offset] = index[item["sensor"]]
+            self.scale[offset] = item.get("scale", 1) or 1
+            self.writable[offset] = bool(item.get("writable", False))
+
+    def __len__(self):
+        return len(self.position)
+
+    def view(self, start, stop):
+        """Index over addresses [start, stop) renumbered from 0, sharing this index's arrays."""
+        sub = AddressIndex.__new__(AddressIndex)
+        sub.bits = self.bits
+        sub.position = self.position[start:stop]
+        sub.scale = self.scale[start:stop]
+        sub.writable = self.writable[start:stop]
+        return sub
+
+    def take(self, offsets):
+        """Index over the given addresses, in order, renumbered from 0 (a copy)."""
+        sub = AddressIndex.__new__(AddressIndex)
+        sub.bits = self.bits
+        sub.position = self.position[offsets]
+        sub.scale = self.scale[offsets]
+        sub.writable = self.writable[offsets]
+        return sub
+
+    def _slice(self, start, count):
+        position = self.position[start:start + count]
+        if len(position) < count:
+            position = np.concatenate([position, np.full(count - len(position), -1, dtype=np.intp)])
+        return position
+
+    def read(self, values, start, count=1):
+        """Current raw values for `count` addresses from `start` (unmapped addresses read 0)."""
+        position = self._slice(start, count)
+        mapped = position >= 0
+        current = np.where(mapped, values[position], 0.0)
+        if self.bits:
+            return (current >= 0.5).tolist()
+        scale = self.scale[start:start + count]
+        if len(scale) < count:
+            scale = np.concatenate([scale, np.ones(count - len(scale))])
+        raw = np.clip(np.rint(current / scale), -32768, 32767).astype(np.int16)
+        return raw.view(np.uint16).tolist()
+
+    def encode(self, values, offsets):
+        """Raw values for the given mapped addresses (uint16 registers or bools)."""
+        current = values[self.position[offsets]]
+        if self.bits:
+            return current >= 0.5
+        return np.clip(np.rint(current / self.scale[offsets]), -32768, 32767).astype(np.int16).view(np.uint16)
+
+    def decode(self, start, raw_values):
+        """Yields (registry position, engineering value) for each writable address written."""
+        for offset, raw in enumerate(raw_values, start):
+            if offset >= len(self.position) or not self.writable[offset]:
+                continue
+            if self.bits:
+                value = 1.0 if raw else 0.0
+            else:
+                value = float(np.uint16(raw).view(np.int16)) * self.scale[offset]
+            yield int(self.position[offset]), value
+
+def building_offsets(index, names):
+    """Building -> ascending addresses holding its sensors."""
+    offsets = {}
+    for offset in np.flatnonzero(index.position >= 0).tolist():
+        offsets.setdefault(building_of(names[index.position[offset]]), []).append(offset)
+    return offsets
+
+def unit_table(index, offsets):
+    """A unit's table over `offsets` renumbered from 0: a view when they are contiguous, else a copy."""
+    if not offsets:
+        return index.view(0, 0)
+    if offsets[-1] - offsets[0] + 1 == len(offsets):
+        return index.view(offsets[0], offsets[-1] + 1)
+    return index.take(np.array(offsets, dtype=np.intp))
+
+def unit_indexes(indexes, units, names):
+    """
+    Per-unit tables for a `units:` map section (unit ID -> building): each unit's table holds
+    its building's addresses in order, renumbered from 0. A building whose addresses form one
+    block gets a view of the shared index; one split across blocks (points appended to the map
+    later) gets a compacted copy.
+    """
+    offsets = {key: building_offsets(index, names) for key, index in indexes.items()}
+    tables = {}
+    for unit_id, building in units.items():
+        unit_id = int(unit_id)
+        if not 1 <= unit_id <= MAX_UNIT_ID:
+            raise ValueError(f"Modbus unit ID {unit_id} out of range 1-{MAX_UNIT_ID}")
+        tables[unit_id] = {key: unit_table(index, offsets[key].get(building, [])) for key, index in indexes.items()}
+    return tables
+
+def build_indexes(modbus_map, index):
+    """One AddressIndex per table present in the map, keyed by datastore key (ir/hr/di/co)."""
+    indexes = {}
+    for section, (key, base, bits) in SECTIONS.items():
+        entries = (modbus_map or {}).get(section)
+        if entries:
+            indexes[key] = AddressIndex(entries, base, index, bits)
+    return indexes
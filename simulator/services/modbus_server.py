@@ -1,39 +1,126 @@
 from pymodbus.server import StartTcpServer
 from pymodbus.datastore import ModbusDeviceContext, ModbusServerContext, ModbusSequentialDataBlock
+from core.config_cache import load_yaml
+from services.modbus_image import RegisterImage, TableImage
+from services.modbus_map import build_indexes, unit_indexes
 import threading
 import time
 import logging
-import struct
+import os
 
-def float_to_registers(val):
-    """Convert a float to two 16-bit registers (Big Endian)."""
-    packed = struct.pack('>f', val)
-    return struct.unpack('>HH', packed)
+UNIT_IDS = [1, 2, 3, 4, 5]
+MAP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "modbus_map.yaml")
+# Priority-array slot that Modbus writes land in (BACnet-style 1-16)
+WRITE_PRIORITY = int(os.getenv("MODBUS_WRITE_PRIORITY", 16))
+
+class RegisterImageBlock(ModbusSequentialDataBlock):
+    """Datablock serving one unit's row of a RegisterImage directly, without copying it into a list."""
+    def __init__(self, registers, address=1):
+        # The device context adds 1 to request addresses, so address 1 maps register 0 to index 0
+        self.address = address
+        self.values = registers
+        self.default_value = 0
+
+    def validate(self, address, count=1):
+        start = address - self.address
+        return start >= 0 and start + count <= len(self.values)
+
+    def getValues(self, address, count=1):
+        start = address - self.address
+        return self.values[start:start + count].tolist()
+
+    def setValues(self, address, values):
+        if not isinstance(values, list):
+            values = [values]
+        start = address - self.address
+        self.values[start:start + len(values)] = values
+
+    def reset(self):
+        self.values[:] = 0
+
+class MapDataBlock(ModbusSequentialDataBlock):
+    """
+    Read-through datablock for one table of modbus_map.yaml: reads slice a packed TableImage
+    that is brought up to date on demand from the registry's change set, so no updater thread
+    runs; writes to writable addresses go to the sensor's priority array.
+    """
+    def __init__(self, registry, index, address=1):
+        self.registry = registry
+        self.index = index
+        self.image = TableImage(index)
+        self.address = address
+        self.values = index.position
+        self.default_value = False if index.bits else 0
+
+    def validate(self, address, count=1):
+        start = address - self.address
+        return start >= 0 and start + count <= len(self.index)
+
+    def getValues(self, address, count=1):
+        self.image.sync(self.registry)
+        return self.image.read(address - self.address, count)
+
+    def setValues(self, address, values):
+        if not isinstance(values, list):
+            values = [values]
+        names = self.registry.snapshot().names
+        for position, value in self.index.decode(address - self.address, values):
+            self.registry.get_sensor(names[position]).set_priority(value, WRITE_PRIORITY)
+
+    def reset(self):
+        pass
+
+def map_context(registry, indexes):
+    """Device context serving one set of tables built from modbus_map.yaml."""
+    return ModbusDeviceContext(**{key: MapDataBlock(registry, index) for key, index in indexes.items()})
+
+def map_slaves(registry, modbus_map):
+    """
+    Unit ID -> device context. With a `units:` section each unit serves its building's slice
+    of the shared address index; otherwise unit IDs 1-5 all serve the whole map.
+    """
+    snapshot = registry.snapshot()
+    indexes = build_indexes(modbus_map, snapshot.index)
+    units = modbus_map.get("units")
+    if units:
+        tables = unit_indexes(indexes, units, snapshot.names)
+        return {unit_id: map_context(registry, unit_tables) for unit_id, unit_tables in tables.items()}
+    store = map_context(registry, indexes)
+    return {slave_id: store for slave_id in UNIT_IDS}
 
 def run_modbus(registry, port=5020):
+    if os.path.exists(MAP_PATH):
+        slaves = map_slaves(registry, load_yaml(MAP_PATH))
+        context = ModbusServerContext(slaves=slaves, single=False)
+        logging.info(f"Modbus Server (map: {MAP_PATH}, {len(slaves)} unit IDs) started at 0.0.0.0:{port}")
+        StartTcpServer(context=context, address=("0.0.0.0", port))
+        return
+
+    # Without a map, every sensor is exposed as a float32 input register pair.
     # In pymodbus 3.x, ModbusSlaveContext is replaced by ModbusDeviceContext
+    snapshot = registry.snapshot()
+    # Sensors sorted by name; unit N reads every value + N * 0.1
+    image = RegisterImage.sorted_by_name(snapshot, UNIT_IDS, [unit * 0.1 for unit in UNIT_IDS])
+    image.update(snapshot.values)
+
     slaves = {}
-    sensors = sorted(registry.sensors.values(), key=lambda s: s.name)
-    
-    for slave_id in range(1, 6): # Slaves 1, 2, 3, 4, 5
-        store = ModbusDeviceContext(
-            ir=ModbusSequentialDataBlock(0, [0] * (len(sensors) * 2))
-        )
+    for slave_id in UNIT_IDS:
+        store = ModbusDeviceContext(ir=RegisterImageBlock(image.unit(slave_id)))
         slaves[slave_id] = store
 
     context = ModbusServerContext(slaves=slaves, single=False)
 
     def updater():
+        version = snapshot.version
         while True:
-            for slave_id, store in slaves.items():
-                regs = []
-                for sensor in sensors:
-                    val = float(sensor.value) + (slave_id * 0.1)
-                    regs.extend(float_to_registers(val))
-                store.setValues(4, 0, regs)
+            latest, changed = registry.changes_since(version)
+            version = latest.version
+            if len(changed):
+                # Only the changed slots are rewritten, for all units in one vectorized assignment
+                image.update(latest.values, changed)
             time.sleep(1)
 
     threading.Thread(target=updater, daemon=True).start()
-    logging.info(f"Modbus Multi-Slave Server (IDs 1-5) started at 0.0.0.0:{port}")
+    logging.info(f"Modbus Multi-Slave Server (IDs {UNIT_IDS[0]}-{UNIT_IDS[-1]}) started at 0.0.0.0:{port}")
     # In pymodbus 3.x, address is passed as a tuple to StartTcpServer
     StartTcpServer(context=context, address=("0.0.0.0", port))
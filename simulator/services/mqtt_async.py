@@ -0,0 +1,354 @@
+import asyncio
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+import numpy as np
+
+DEFAULT_INFLIGHT = 100
+# Queued messages per connection before the oldest are dropped
+DEFAULT_BACKLOG = 100_000
+KEEPALIVE = 60
+LATENCY_SAMPLES = 10000
+# Bytes buffered in a connection's transport before its sender waits for the socket to drain
+HIGH_WATER = 1 << 20
+# Most PUBLISH frames joined into one socket write
+WRITE_BATCH = 1000
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PINGREQ, PINGRESP, DISCONNECT = 1, 2, 3, 4, 12, 13, 14
+
+def remaining_length(n):
+    if n < 128:
+        return bytes((n,))
+    out = bytearray()
+    while True:
+        byte, n = n & 0x7F, n >> 7
+        out.append(byte | (0x80 if n else 0))
+        if not n:
+            return bytes(out)
+
+def utf8(text):
+    data = text.encode() if isinstance(text, str) else text
+    return len(data).to_bytes(2, "big") + data
+
+def encode_connect(client_id, keepalive=KEEPALIVE):
+    """MQTT 3.1.1 CONNECT with a clean session."""
+    body = utf8("MQTT") + bytes([4, 0x02]) + keepalive.to_bytes(2, "big") + utf8(client_id)
+    return bytes([CONNECT << 4]) + remaining_length(len(body)) + body
+
+def encode_publish(topic, payload, qos=0, packet_id=0, retain=False, dup=False):
+    """PUBLISH frame; `topic` is the length-prefixed topic (see utf8()). `dup` marks a QoS 1 re-delivery."""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    ident = packet_id.to_bytes(2, "big") if qos else b""
+    return (bytes([PUBLISH << 4 | dup << 3 | qos << 1 | retain]) + remaining_length(len(topic) + len(ident) + len(payload))
+            + topic + ident + payload)
+
+async def read_packet(reader):
+    """(packet type, body) of the next packet from the broker."""
+    header = (await reader.readexactly(1))[0]
+    length, shift = 0, 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            break
+    return header >> 4, await reader.readexactly(length) if length else b""
+
+def split_packets(buffer):
+    """(packets, consumed bytes): the complete (packet type, body) pairs at the start of `buffer`."""
+    packets, start, size = [], 0, len(buffer)
+    while start + 2 <= size:
+        length, shift, pos = 0, 0, start + 1
+        while pos < size:
+            byte = buffer[pos]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            pos += 1
+            if not byte & 0x80:
+                break
+        else:
+            break
+        if pos + length > size:
+            break
+        packets.append((buffer[start] >> 4, bytes(buffer[pos:pos + length])))
+        start = pos + length
+    return packets, start
+
+class BrokerConnection:
+    """
+    One broker connection with its own send queue. QoS 1 publishes hold one of `max_inflight`
+    slots until their PUBACK, so a slow broker backs up this connection's queue instead of
+    growing an unbounded in-flight set. If the connection drops, unacknowledged messages go
+    back to the front of the queue and the connection is re-established. The queue holds at
+    most `max_backlog` messages; beyond that the oldest are dropped and counted in `dropped`.
+    A connection that receives nothing (not even a PINGRESP) for 1.5 keepalive intervals is
+    treated as dead and re-established.
+    """
+    def __init__(self, host, port, client_id, qos=1, max_inflight=DEFAULT_INFLIGHT, latencies=None,
+                 max_backlog=DEFAULT_BACKLOG, keepalive=KEEPALIVE):
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self.qos = qos
+        self.max_inflight = max_inflight
+        self.max_backlog = max_backlog
+        self.keepalive = keepalive
+        self.last_received = time.monotonic()
+        self.queue = deque()
+        self.wake = asyncio.Event()
+        # Set when a PUBACK frees a slot in a full window
+        self.window = asyncio.Event()
+        # Packet ID -> queued message (topic, payload, submit time, retain, dup), in send order
+        self.inflight = {}
+        self._next_id = 0
+        self.latencies = latencies if latencies is not None else deque(maxlen=LATENCY_SAMPLES)
+        self.published = 0
+        self.acked = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.reader = self.writer = None
+        self._task = None
+
+    async def _open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(encode_connect(self.client_id, self.keepalive))
+        kind, body = await read_packet(self.reader)
+        self.last_received = time.monotonic()
+        if kind != CONNACK or body[1] != 0:
+            raise ConnectionError(f"MQTT broker {self.host}:{self.port} refused {self.client_id} (code {body[1:2].hex()})")
+
+    async def connect(self):
+        await self._open()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            tasks = [asyncio.create_task(self._send()), asyncio.create_task(self._receive()),
+                     asyncio.create_task(self._keepalive())]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                error = next(iter(done)).exception()
+            finally:
+                for task in tasks:
+                    task.cancel()
+            logging.warning(f"MQTT connection {self.client_id} lost ({error!r}), "
+                            f"requeueing {len(self.inflight)} in-flight messages")
+            self.writer.close()
+            # Already sent once, so they go out again with the DUP flag
+            self.queue.extendleft(reversed([m[:4] + (True,) for m in self.inflight.values()]))
+            self.inflight.clear()
+            self.trim()
+            delay = 0.5
+            while True:
+                try:
+                    await self._open()
+                    break
+                except (OSError, asyncio.IncompleteReadError) as e:
+                    logging.warning(f"MQTT reconnect {self.client_id} failed: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+            self.reconnects += 1
+
+    def trim(self):
+        """Drops the oldest queued messages beyond `max_backlog`."""
+        excess = len(self.queue) - self.max_backlog
+        if excess > 0:
+            for _ in range(excess):
+                self.queue.popleft()
+            self.dropped += excess
+
+    def _packet_id(self):
+        while True:
+            self._next_id = self._next_id % 0xFFFF + 1
+            if self._next_id not in self.inflight:
+                return self._next_id
+
+    async def _send(self):
+        writer, queue, inflight = self.writer, self.queue, self.inflight
+        while True:
+            if not queue:
+                self.wake.clear()
+                await self.wake.wait()
+                continue
+            if self.qos and len(inflight) >= self.max_inflight:
+                # Messages stay queued (and count as backlog) until a PUBACK frees a slot
+                self.window.clear()
+                await self.window.wait()
+                continue
+            if writer.is_closing():
+                raise ConnectionError("transport closed")
+            count = min(len(queue), WRITE_BATCH, self.max_inflight - len(inflight) if self.qos else WRITE_BATCH)
+            frames = []
+            for _ in range(count):
+                message = queue.popleft()
+                topic, payload, submitted, retain, dup = message
+                if self.qos:
+                    packet_id = self._packet_id()
+                    inflight[packet_id] = message
+                    frames.append(encode_publish(topic, payload, 1, packet_id, retain, dup))
+                else:
+                    frames.append(encode_publish(topic, payload, 0, 0, retain))
+            writer.write(b"".join(frames))
+            self.published += count
+            if not self.qos:
+                self.latencies.append(time.perf_counter() - submitted)
+            if writer.transport.get_write_buffer_size() > HIGH_WATER:
+                await writer.drain()
+            else:
+                # Let the receiver and the other connections run between batches
+                await asyncio.sleep(0)
+
+    async def _receive(self):
+        buffer = bytearray()
+        while True:
+            data = await self.reader.read(1 << 16)
+            if not data:
+                raise ConnectionError("broker closed the connection")
+            self.last_received = time.monotonic()
+            buffer += data
+            packets, consumed = split_packets(buffer)
+            del buffer[:consumed]
+            now = time.perf_counter()
+            for kind, body in packets:
+                if kind == PUBACK:
+                    message = self.inflight.pop(int.from_bytes(body[:2], "big"), None)
+                    if message is not None:
+                        self.latencies.append(now - message[2])
+                        self.acked += 1
+            self.window.set()
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.keepalive / 2)
+            if time.monotonic() - self.last_received > self.keepalive * 1.5:
+                raise ConnectionError(f"nothing received from the broker for {self.keepalive * 1.5:.0f} s")
+            self.writer.write(bytes([PINGREQ << 4, 0]))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        if self.writer is not None:
+            self.writer.write(bytes([DISCONNECT << 4, 0]))
+            self.writer.close()
+
+class ShardedPublisher:
+    """
+    Publishes over a pool of broker connections on its own asyncio loop. Each topic is pinned
+    to one connection (crc32 of the topic), which keeps per-topic ordering. `submit` takes a
+    whole tick's messages and hands them to the loop in one thread-safe call. Latency is
+    measured from `submit` to PUBACK (QoS 1) or to the socket write (QoS 0).
+    """
+    def __init__(self, host="localhost", port=1883, connections=4, qos=1, max_inflight=DEFAULT_INFLIGHT,
+                 client_id="simulator", max_backlog=DEFAULT_BACKLOG, keepalive=KEEPALIVE):
+        if qos not in (0, 1):
+            # No PUBREC/PUBREL/PUBCOMP handling, so QoS 2 messages would never leave the in-flight window
+            raise ValueError(f"ShardedPublisher supports QoS 0 and 1, not {qos}")
+        self.host = host
+        self.port = port
+        self.qos = qos
+        self.max_inflight = max_inflight
+        self.max_backlog = max_backlog
+        self.keepalive = keepalive
+        self.client_id = client_id
+        self.size = connections
+        self.connections = []
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        # Topic -> (connection, length-prefixed topic bytes)
+        self._routes = {}
+        self.loop = None
+        self.started = time.perf_counter()
+
+    async def connect(self):
+        self.loop = asyncio.get_running_loop()
+        self.connections = [BrokerConnection(self.host, self.port, f"{self.client_id}-{n}", self.qos,
+                                             self.max_inflight, self.latencies, self.max_backlog, self.keepalive)
+                            for n in range(self.size)]
+        await asyncio.gather(*(c.connect() for c in self.connections))
+        self.started = time.perf_counter()
+
+    def start(self):
+        """Runs the publisher's loop in a daemon thread; returns once every connection is up."""
+        ready = threading.Event()
+        failed = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.connect())
+            except Exception as e:
+                failed.append(e)
+                return
+            finally:
+                ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        if failed:
+            raise failed[0]
+        return self
+
+    def _route(self, topic):
+        route = self._routes.get(topic)
+        if route is None:
+            route = self._routes[topic] = (self.connections[zlib.crc32(topic.encode()) % len(self.connections)],
+                                           utf8(topic))
+        return route
+
+    def enqueue(self, messages, submitted=None, retain=False):
+        """Queues (topic, payload) pairs; call on the publisher's loop."""
+        submitted = time.perf_counter() if submitted is None else submitted
+        woken = set()
+        for topic, payload in messages:
+            connection, encoded = self._route(topic)
+            connection.queue.append((encoded, payload, submitted, retain, False))
+            woken.add(connection)
+        for connection in woken:
+            connection.trim()
+            connection.wake.set()
+
+    def submit(self, messages, retain=False):
+        """Thread-safe: queues one tick's (topic, payload) pairs."""
+        self.loop.call_soon_threadsafe(self.enqueue, list(messages), time.perf_counter(), retain)
+
+    def stats(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        published = sum(c.published for c in self.connections)
+        return {
+            "connections": len(self.connections),
+            "qos": self.qos,
+            "published": published,
+            "acked": sum(c.acked for c in self.connections),
+            "rate": round(published / elapsed, 1),
+            "inflight": sum(len(c.inflight) for c in self.connections),
+            "backlog": sum(len(c.queue) for c in self.connections),
+            "dropped": sum(c.dropped for c in self.connections),
+            "reconnects": sum(c.reconnects for c in self.connections),
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 3),
+                "p99": round(float(np.percentile(latencies, 99)), 3),
+                "max": round(float(latencies.max()), 3),
+            },
+        }
+
+    async def disconnect(self):
+        await asyncio.gather(*(c.close() for c in self.connections))
+
+    def close(self):
+        """Disconnects and stops the loop started by `start`; queued messages are dropped."""
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.disconnect(), self.loop).result(timeout=5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+def log_stats(publisher, interval=10.0):
+    """Logs publish rate, in-flight count, backlog and latency every `interval` seconds."""
+    def run():
+        while True:
+            time.sleep(interval)
+            logging.info(f"MQTT publisher: {publisher.stats()}")
+    threading.Thread(target=run, daemon=True).start()
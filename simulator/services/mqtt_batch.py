@@ -0,0 +1,92 @@
+import json
+import struct
+import numpy as np
+from core.sharding import building_of
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMATS = ("json", "msgpack", "packed")
+DEFAULT_TOPIC = "campus_batch/{building}"
+# Packed payload: timestamp (float64), sequence (uint32), count (uint16), then `count` uint16
+# point indices and `count` float32 values, little-endian
+PACKED_HEADER = struct.Struct("<dIH")
+
+def encode_packed(timestamp, seq, indices, values):
+    header = PACKED_HEADER.pack(timestamp, seq, len(indices))
+    return header + indices.astype("<u2").tobytes() + values.astype("<f4").tobytes()
+
+def decode_packed(payload):
+    """(timestamp, seq, indices, values) of a packed payload."""
+    timestamp, seq, count = PACKED_HEADER.unpack_from(payload)
+    offset = PACKED_HEADER.size
+    indices = np.frombuffer(payload, "<u2", count, offset)
+    values = np.frombuffer(payload, "<f4", count, offset + 2 * count)
+    return timestamp, seq, indices, values
+
+def encode_msgpack(timestamp, seq, indices, values):
+    return msgpack.packb({"ts": timestamp, "seq": seq, "i": indices.tolist(), "v": values.tolist()},
+                         use_single_float=True)
+
+ENCODERS = {"packed": encode_packed, "msgpack": encode_msgpack}
+
+class BuildingBatcher:
+    """
+    One MQTT message per building per tick instead of one per sensor.
+
+    Each building publishes under `topic` (with `{building}` filled in):
+    - `<topic>/points`: the building's sensor names as a retained JSON list; a message's point
+      indices refer to this list.
+    - `<topic>/birth`: every point's value, at startup and every `birth_interval` seconds, so a
+      subscriber that joins late or misses a message has the full state.
+    - `<topic>/data`: only the points in the tick's change set (deadband and heartbeat applied).
+    Each message carries the tick timestamp and a per-building sequence number.
+    Positions are grouped by building once; a tick sorts the change set by building and
+    encodes each group with one array conversion.
+    """
+    def __init__(self, names, encoding="packed", birth_interval=60.0, topic=DEFAULT_TOPIC):
+        if encoding not in ENCODERS:
+            raise ValueError(f"Unknown batch encoding '{encoding}', expected one of {list(ENCODERS)}")
+        if encoding == "msgpack" and msgpack is None:
+            raise RuntimeError("MQTT_FORMAT=msgpack needs the msgpack package (pip install msgpack)")
+        self.encode = ENCODERS[encoding]
+        self.birth_interval = birth_interval
+        self.last_birth = None
+        buildings = {}
+        for i, name in enumerate(names):
+            buildings.setdefault(building_of(name), []).append(i)
+        self.buildings = list(buildings)
+        self.topics = [topic.format(building=b) for b in self.buildings]
+        self.positions = [np.array(p, dtype=np.intp) for p in buildings.values()]
+        self.points = [[names[i] for i in p] for p in buildings.values()]
+        # Registry position -> building number and index within the building
+        self.building_of = np.empty(len(names), dtype=np.intp)
+        self.local_index = np.empty(len(names), dtype=np.intp)
+        for b, positions in enumerate(self.positions):
+            self.building_of[positions] = b
+            self.local_index[positions] = np.arange(len(positions))
+        self.seq = [0] * len(self.buildings)
+
+    def point_messages(self):
+        """(topic, payload) of each building's retained point list."""
+        return [(f"{topic}/points", json.dumps(points)) for topic, points in zip(self.topics, self.points)]
+
+    def _message(self, b, kind, timestamp, indices, values):
+        self.seq[b] = (self.seq[b] + 1) & 0xFFFFFFFF
+        return f"{self.topics[b]}/{kind}", self.encode(timestamp, self.seq[b], indices, values)
+
+    def messages(self, snapshot, changed):
+        """(topic, payload) to publish for one tick: births when due, else one data message per changed building."""
+        timestamp, values = float(snapshot.timestamp), snapshot.values
+        if self.last_birth is None or timestamp - self.last_birth >= self.birth_interval:
+            self.last_birth = timestamp
+            return [self._message(b, "birth", timestamp, np.arange(len(p)), values[p])
+                    for b, p in enumerate(self.positions)]
+        if not len(changed):
+            return []
+        order = changed[np.argsort(self.building_of[changed], kind="stable")]
+        bounds = np.flatnonzero(np.diff(self.building_of[order])) + 1
+        return [self._message(int(self.building_of[chunk[0]]), "data", timestamp, self.local_index[chunk], values[chunk])
+                for chunk in np.split(order, bounds)]
@@ -2,10 +2,16 @@ import json
 import time
 import logging
 import os
-import yaml
+from core.config_cache import load_yaml
+from services.mqtt_batch import BuildingBatcher, DEFAULT_TOPIC, FORMATS
+from services.mqtt_async import ShardedPublisher, log_stats
 import paho.mqtt.client as mqtt
 
 MQTT_ENABLED = True
+# json: one JSON message per sensor topic in mqtt_map.yaml; msgpack/packed: one message per building
+MQTT_FORMAT = os.getenv("MQTT_FORMAT", "json").lower()
+# >0: publish over this many asyncio broker connections (see services/mqtt_async.py) instead of paho
+MQTT_CONNECTIONS = int(os.getenv("MQTT_CONNECTIONS", 0))
 
 def set_mqtt_enabled(enabled: bool):
     global MQTT_ENABLED
@@ -22,40 +28,76 @@ def run_mqtt(registry, broker="localhost", port=1883, map_path="config/mqtt_map.
         map_path = os.path.join(base_dir, map_path)
 
     if os.path.exists(map_path):
-        with open(map_path, "r") as f:
-            config = yaml.safe_load(f)
-            topic_map = config.get("topics", {})
+        topic_map = load_yaml(map_path).get("topics", {})
         logging.info(f"Loaded MQTT topic map from {map_path}")
     else:
         logging.warning(f"MQTT map file not found at {map_path}. No topics will be published.")
 
-    try:
-        # paho-mqtt 2.0+ requires explicit API version
-        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
-    except AttributeError:
-        # Fallback for paho-mqtt 1.x
-        client = mqtt.Client()
-    try:
-        client.connect(broker, port, 60)
-        client.loop_start()
-        logging.info(f"Connected to MQTT broker at {broker}:{port}")
-    except Exception as e:
-        logging.error(f"Failed to connect to MQTT broker: {e}")
+    if MQTT_CONNECTIONS > 0:
+        qos = int(os.getenv("MQTT_QOS", 1))
+        if qos not in (0, 1):
+            logging.warning(f"MQTT_QOS={qos} is not supported by the sharded publisher; using QoS 1")
+            qos = 1
+        publisher = ShardedPublisher(broker, port, MQTT_CONNECTIONS, qos, int(os.getenv("MQTT_MAX_INFLIGHT", 100)),
+                                     max_backlog=int(os.getenv("MQTT_MAX_BACKLOG", 100_000)))
+        try:
+            publisher.start()
+            logging.info(f"Connected to MQTT broker at {broker}:{port} ({MQTT_CONNECTIONS} connections)")
+        except Exception as e:
+            logging.error(f"Failed to connect to MQTT broker: {e}")
+            return
+        registry.mqtt = publisher
+        log_stats(publisher, float(os.getenv("MQTT_STATS_INTERVAL", 10)))
+        publish = publisher.submit
+    else:
+        try:
+            # paho-mqtt 2.0+ requires explicit API version
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
+        except AttributeError:
+            # Fallback for paho-mqtt 1.x
+            client = mqtt.Client()
+        try:
+            client.connect(broker, port, 60)
+            client.loop_start()
+            logging.info(f"Connected to MQTT broker at {broker}:{port}")
+        except Exception as e:
+            logging.error(f"Failed to connect to MQTT broker: {e}")
+            return
+
+        def publish(messages, retain=False):
+            for topic, payload in messages:
+                client.publish(topic, payload, retain=retain)
+
+    if MQTT_FORMAT not in FORMATS:
+        logging.error(f"Unknown MQTT_FORMAT '{MQTT_FORMAT}', expected one of {list(FORMATS)}")
         return
+    batcher = None
+    if MQTT_FORMAT != "json":
+        batcher = BuildingBatcher(registry.snapshot().names, MQTT_FORMAT,
+                                  float(os.getenv("MQTT_BIRTH_INTERVAL", 60)),
+                                  os.getenv("MQTT_BATCH_TOPIC", DEFAULT_TOPIC))
+        publish(batcher.point_messages(), retain=True)
+        logging.info(f"MQTT publishing {MQTT_FORMAT} batches for {len(batcher.buildings)} buildings")
 
+    version = 0
     while True:
         if MQTT_ENABLED:
-            published_count = 0
-            snapshot = registry.snapshot()
-            for sensor_name, value in snapshot.items():
-                topic = topic_map.get(sensor_name)
-                if topic:
-                    payload = {
-                        "value": round(value, 2),
-                        "timestamp": int(time.time())
-                    }
-                    client.publish(topic, json.dumps(payload))
-                    published_count += 1
+            # Report by exception: only sensors past their deadband (or heartbeat) since the last loop
+            snapshot, changed = registry.changes_since(version)
+            version = snapshot.version
+            if batcher is not None:
+                messages = batcher.messages(snapshot, changed)
+            else:
+                messages = []
+                for i in changed.tolist():
+                    topic = topic_map.get(snapshot.names[i])
+                    if topic:
+                        payload = {
+                            "value": round(float(snapshot.values[i]), 2),
+                            "timestamp": int(snapshot.timestamp)
+                        }
+                        messages.append((topic, json.dumps(payload)))
+            publish(messages)
             # Use debug level to avoid flooding logs during normal operation
-            logging.debug(f"MQTT publish loop: Published {published_count}/{len(snapshot)} sensor values.")
+            logging.debug(f"MQTT publish loop: Published {len(messages)}/{len(snapshot)} sensor values.")
         time.sleep(1)
@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from asyncua import ua
+from asyncua.server.history import HistoryStorageInterface
+
+def to_epoch(moment):
+    """Epoch seconds of an OPC-UA DateTime, or None when unset (None or the 1601 epoch)."""
+    if moment is None or moment == ua.get_win_epoch():
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+class RingHistoryStorage(HistoryStorageInterface):
+    """
+    Serves HistoryReadRawModified from the simulator's SensorHistory ring buffers, so every
+    sensor variable has history without asyncua subscribing to it. Follows the asyncua
+    semantics: without a start time, values come newest first; a start later than the end
+    reads backwards; the continuation point is the timestamp of the first value not returned.
+    The buffers are filled by the simulation loop, so writes through the storage interface
+    are ignored.
+    """
+    def __init__(self, history, names, max_history_data_response_size=10000):
+        super().__init__(max_history_data_response_size)
+        self.history = history
+        # Variable NodeId -> sensor name
+        self.names = names
+
+    async def init(self):
+        pass
+
+    async def new_historized_node(self, node_id, period, count=0):
+        pass
+
+    async def save_node_value(self, node_id, datavalue):
+        pass
+
+    async def new_historized_event(self, source_id, evtypes, period, count=0):
+        pass
+
+    async def save_event(self, event):
+        pass
+
+    async def read_event_history(self, source_id, start, end, nb_values, evfilter):
+        return [], None
+
+    async def stop(self):
+        pass
+
+    async def read_node_history(self, node_id, start, end, nb_values):
+        name = self.names.get(node_id)
+        if name is None:
+            return [], None
+        start, end = to_epoch(start), to_epoch(end)
+        reverse = start is None or (end is not None and start > end)
+        if reverse and start is not None:
+            start, end = end, start
+        times, values = self.history.read(name, start, end)
+        if reverse:
+            times, values = times[::-1], values[::-1]
+
+        if nb_values:
+            times, values = times[:nb_values], values[:nb_values]
+        cont = None
+        limit = self.max_history_data_response_size
+        if len(times) > limit:
+            cont = datetime.fromtimestamp(times[limit], timezone.utc)
+            times, values = times[:limit], values[:limit]
+        return [self.datavalue(t, v) for t, v in zip(times.tolist(), values.tolist())], cont
+
+    @staticmethod
+    def datavalue(timestamp, value):
+        moment = datetime.fromtimestamp(timestamp, timezone.utc)
+        return ua.DataValue(ua.Variant(value, ua.VariantType.Double), SourceTimestamp=moment, ServerTimestamp=moment)
@@ -1,44 +1,126 @@
 import asyncio
 import logging
+import os
 from asyncua import ua, Server
-from asyncua.common.methods import uamethod
+from asyncua.common.callback import CallbackType
+from core.sharding import point_path
+from .opcua_history import RingHistoryStorage
+
+WRITE_PRIORITY = int(os.getenv("OPCUA_WRITE_PRIORITY", 16))
+
+class AddressSpace:
+    """
+    Simulator nodes: Objects/Buildings/<building>/<point> variables, with string node IDs equal
+    to the sensor names, plus Objects/PointTypes/<point> folders that reference (Organizes) the
+    same variables across buildings. Built once at startup; the per-tick path only indexes
+    `nodes` by registry position.
+    """
+    def __init__(self, server, idx, journal=None):
+        self.server = server
+        self.idx = idx
+        self.journal = journal
+        # Registry position -> variable NodeId
+        self.nodes = {}
+        # Variable NodeId -> sensor, for writable sensors only
+        self.write_targets = {}
+
+    async def build(self, registry, historizing=False):
+        objects = self.server.nodes.objects
+        buildings_folder = await objects.add_folder(self.idx, "Buildings")
+        types_folder = await objects.add_folder(self.idx, "PointTypes")
+        buildings, types = {}, {}
+        snapshot = registry.snapshot()
+        for name in snapshot.names:
+            sensor = registry.get_sensor(name)
+            building, point = point_path(name)
+            if building not in buildings:
+                buildings[building] = await buildings_folder.add_folder(self.idx, building)
+            if point not in types:
+                types[point] = await types_folder.add_folder(self.idx, point)
+            var = await buildings[building].add_variable(ua.NodeId(name, self.idx), point,
+                                                         float(snapshot.values[snapshot.index[name]]),
+                                                         ua.VariantType.Double)
+            await types[point].add_reference(var, ua.ObjectIds.Organizes)
+            if sensor.writable:
+                await var.set_writable()
+                self.write_targets[var.nodeid] = sensor
+            if historizing:
+                await var.write_attribute(ua.AttributeIds.Historizing, ua.DataValue(True))
+                await var.set_attr_bit(ua.AttributeIds.AccessLevel, ua.AccessLevel.HistoryRead)
+                await var.set_attr_bit(ua.AttributeIds.UserAccessLevel, ua.AccessLevel.HistoryRead)
+            self.nodes[snapshot.index[name]] = var.nodeid
+        return len(buildings), len(types)
+
+    def write_values(self, snapshot, changed):
+        """WriteParameters setting the changed positions' variables, or None if none are served."""
+        values = snapshot.values
+        nodes = []
+        for i in changed.tolist():
+            nodeid = self.nodes.get(i)
+            if nodeid is not None:
+                nodes.append(ua.WriteValue(
+                    NodeId=nodeid,
+                    AttributeId=ua.AttributeIds.Value,
+                    Value=ua.DataValue(ua.Variant(float(values[i]), ua.VariantType.Double)),
+                ))
+        return ua.WriteParameters(NodesToWrite=nodes) if nodes else None
+
+    def on_write(self, event, dispatcher):
+        """PostWrite callback: applies accepted client writes to the sensors' priority arrays."""
+        if not event.is_external:
+            return
+        for item, status in zip(event.request_params.NodesToWrite, event.response_params):
+            sensor = self.write_targets.get(item.NodeId)
+            if sensor is None or item.AttributeId != ua.AttributeIds.Value or not status.is_good():
+                continue
+            value = float(item.Value.Value.Value)
+            sensor.set_priority(value, WRITE_PRIORITY)
+            if self.journal is not None:
+                self.journal.record("opcua", item.NodeId.to_string(), sensor.name, WRITE_PRIORITY, value)
+
+async def publish_changes(server, space, registry, wake):
+    """Writes the variables of changed sensors in one batched attribute write per registry tick."""
+    version = 0
+    while True:
+        await wake.wait()
+        wake.clear()
+        snapshot, changed = registry.changes_since(version)
+        version = snapshot.version
+        params = space.write_values(snapshot, changed)
+        if params is not None:
+            # Server-side write: no per-node await, and no PreWrite/PostWrite callbacks
+            await server.iserver.attribute_service.write(params)
 
 async def run_opcua(registry, port=4840):
     # Setup server
     server = Server()
     await server.init()
     server.set_endpoint(f"opc.tcp://0.0.0.0:{port}/freeopcua/server/")
-    
+
     # Setup namespace
     uri = "http://examples.freeopcua.github.io"
     idx = await server.register_namespace(uri)
 
-    # Get Objects node, this is where we should put our custom nodes
-    objects = server.nodes.objects
-
-    # Create a folder for sensors
-    sensor_folder = await objects.add_folder(idx, "Sensors")
-
-    # Mapping of sensor names to OPC-UA variables
-    opc_vars = {}
-
-    for sensor in registry.sensors.values():
-        var = await sensor_folder.add_variable(idx, sensor.name, 0.0)
-        await var.set_writable()  # Allow writing to sensors for control simulation
-        opc_vars[sensor.name] = var
+    space = AddressSpace(server, idx, registry.journal)
+    history = registry.history
+    buildings, types = await space.build(registry, historizing=history is not None)
+    server.subscribe_server_callback(CallbackType.PostWrite, space.on_write)
+    if history is not None:
+        # HistoryRead is answered from the simulator's ring buffers
+        names = registry.snapshot().names
+        server.iserver.history_manager.set_storage(
+            RingHistoryStorage(history, {nodeid: names[i] for i, nodeid in space.nodes.items()}))
 
-    async def updater():
-        while True:
-            for name, var in opc_vars.items():
-                sensor = registry.get_sensor(name)
-                if sensor:
-                    await var.write_value(float(sensor.value))
-            await asyncio.sleep(1)
+    # Registry ticks wake the publisher; ticks that arrive while it is busy coalesce
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    registry.subscribe(lambda snapshot: loop.call_soon_threadsafe(wake.set))
+    wake.set()
 
-    # Start the server and the updater
     async with server:
-        print(f"OPC-UA Server started at opc.tcp://0.0.0.0:{port}/freeopcua/server/")
-        await updater()
+        logging.info(f"OPC-UA Server started at opc.tcp://0.0.0.0:{port}/freeopcua/server/ "
+                     f"({len(space.nodes)} variables in {buildings} buildings, {types} point types)")
+        await publish_changes(server, space, registry, wake)
 
 def start_opcua(registry, port=4840):
     """Bridge to run the async opcua server in a separate thread if needed."""
@@ -0,0 +1,105 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+class ProtocolPlugin:
+    """
+    A protocol server started in a daemon thread as `entry(registry, port)`.
+    `entry` is a "module:function" string so the protocol library is only imported when enabled.
+    """
+    def __init__(self, name, label, entry, port_env, default_port):
+        self.name = name
+        self.label = label
+        self.entry = entry
+        self.port_env = port_env
+        self.default_port = default_port
+
+    def port(self):
+        return int(os.getenv(self.port_env, self.default_port))
+
+    def load(self):
+        module, func = self.entry.split(":")
+        return getattr(importlib.import_module(module), func)
+
+    def args(self, registry):
+        return (registry, self.port())
+
+    def describe(self):
+        return f"{self.label} server on port {self.port()}"
+
+class MqttPlugin(ProtocolPlugin):
+    """The MQTT publisher connects out to a broker instead of listening on a port."""
+    def args(self, registry):
+        return (registry, os.getenv("MQTT_BROKER", "localhost"), self.port())
+
+    def load(self):
+        from services.mqtt_client import set_mqtt_enabled
+        set_mqtt_enabled(os.getenv("MQTT_ENABLED", "True").lower() == "true")
+        return super().load()
+
+    def describe(self):
+        return f"{self.label} publisher to {os.getenv('MQTT_BROKER', 'localhost')}:{self.port()}"
+
+PLUGINS = {
+    "modbus": ProtocolPlugin("modbus", "Modbus", "services.modbus_server:run_modbus", "MODBUS_PORT", 5020),
+    "bacnet": ProtocolPlugin("bacnet", "BACnet", "services.bacnet_server:run_bacnet", "BACNET_PORT", 47808),
+    "opcua": ProtocolPlugin("opcua", "OPC-UA", "services.opcua_server:start_opcua", "OPCUA_PORT", 4840),
+    "enip": ProtocolPlugin("enip", "EtherNet/IP", "services.enip_server:start_enip", "ENIP_PORT", 44818),
+    "mqtt": MqttPlugin("mqtt", "MQTT", "services.mqtt_client:run_mqtt", "MQTT_PORT", 1883),
+}
+
+def enabled_plugins(spec=None):
+    """Plugins named in `spec` / SIM_PROTOCOLS (comma-separated, "all" or "none"; default all)."""
+    if spec is None:
+        spec = os.getenv("SIM_PROTOCOLS", "all")
+    names = [n.strip().lower() for n in spec.split(",") if n.strip()]
+    if names == ["all"]:
+        return list(PLUGINS.values())
+    if names == ["none"]:
+        return []
+    unknown = [n for n in names if n not in PLUGINS]
+    if unknown:
+        raise ValueError(f"Unknown protocol(s) {unknown}, expected some of {list(PLUGINS)}")
+    return [PLUGINS[n] for n in names]
+
+def _rss_mb():
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def start_plugins(registry, plugins=None):
+    """Imports and starts each enabled plugin; logs and returns a per-plugin startup breakdown."""
+    if plugins is None:
+        plugins = enabled_plugins()
+
+    timings = []
+    for plugin in plugins:
+        started = time.perf_counter()
+        rss = _rss_mb()
+        entry = plugin.load()
+        loaded = time.perf_counter()
+        logging.info(f"Starting {plugin.describe()}...")
+        threading.Thread(target=entry, args=plugin.args(registry), name=f"{plugin.name}-server", daemon=True).start()
+        timings.append({
+            "plugin": plugin.name,
+            "import_ms": (loaded - started) * 1000,
+            # Only spawning the server thread; the protocol may still be binding its port
+            "thread_start_ms": (time.perf_counter() - loaded) * 1000,
+            "rss_mb": _rss_mb() - rss,
+        })
+
+    logging.info("Protocol startup breakdown:")
+    for t in timings:
+        logging.info(f"  {t['plugin']:<8} import {t['import_ms']:8.1f} ms  thread start {t['thread_start_ms']:6.1f} ms  "
+                     f"+{t['rss_mb']:.0f} MB peak RSS")
+    skipped = sorted(set(PLUGINS) - {p.name for p in plugins})
+    if skipped:
+        logging.info(f"  disabled: {', '.join(skipped)}")
+    return timings
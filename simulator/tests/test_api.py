@@ -54,3 +54,67 @@ def test_fault_clear(api_context):
     # Check fault status
     response = client.get("/sensors/temp")
     assert response.json()["fault"] is None
+
+def test_batch_fault_plans(api_context):
+    client, registry = api_context
+    registry.add(Sensor("temp_2", "C", 20.0, 0, 100))
+    response = client.post("/faults", json=[{"pattern": "temp*", "type": "offset", "value": 3.0, "duration": 60}])
+    assert response.status_code == 200
+    plan = response.json()["plans"][0]
+    assert plan["matched"] == 2
+
+    assert [p["id"] for p in client.get("/faults").json()] == [plan["id"]]
+    assert client.delete(f"/faults/{plan['id']}").status_code == 200
+    assert client.get("/faults").json() == []
+
+    response = client.post("/faults", json=[{"pattern": "temp*", "type": "melt"}])
+    assert response.status_code == 400
+
+def test_write_journal(api_context):
+    client, registry = api_context
+    registry.journal.record("bacnet", "analogValue:1", "temp", 8, 25.0)
+    registry.journal.record("bacnet", "analogValue:1", "temp", 8, None)
+
+    data = client.get("/writes", params={"sensor": "temp"}).json()
+    assert [e["action"] for e in data["entries"]] == ["write", "relinquish"]
+    assert client.get("/writes", params={"since": data["next"]}).json()["entries"] == []
+
+def test_sensor_listing_pages_and_filters(api_context):
+    client, registry = api_context
+    for b in (1, 2):
+        registry.add(Sensor(f"building_{b}_temperature", "C", 20.0, 0, 100, writable=False))
+        registry.add(Sensor(f"building_{b}_setpoint", "C", 21.0, 10, 30))
+    registry.update_all()
+
+    response = client.get("/sensors", params={"limit": 2})
+    assert [s["name"] for s in response.json()] == ["building_1_setpoint", "building_1_temperature"]
+    assert response.headers["x-total-count"] == "5"
+    response = client.get("/sensors", params={"limit": 2, "cursor": response.headers["x-next-cursor"]})
+    assert [s["name"] for s in response.json()] == ["building_2_setpoint", "building_2_temperature"]
+    response = client.get("/sensors", params={"limit": 2, "cursor": response.headers["x-next-cursor"]})
+    assert [s["name"] for s in response.json()] == ["temp"]
+    assert "x-next-cursor" not in response.headers
+
+    names = lambda **params: [s["name"] for s in client.get("/sensors", params=params).json()]
+    assert names(building="building_2") == ["building_2_setpoint", "building_2_temperature"]
+    assert names(building="building_2", writable=False) == ["building_2_temperature"]
+    assert names(building="building_9") == []
+
+    client.post("/sensors/building_1_temperature/fault", json={"type": "freeze", "value": 50.0})
+    assert names(faulted=True) == ["building_1_temperature"]
+    client.post("/faults", json=[{"pattern": "building_2_*", "type": "offset", "value": 1.0}])
+    assert names(faulted=True) == ["building_1_temperature", "building_2_setpoint", "building_2_temperature"]
+
+def test_sensor_listing_etag(api_context):
+    client, registry = api_context
+    registry.update_all()
+    response = client.get("/sensors")
+    etag = response.headers["etag"]
+    assert client.get("/sensors", headers={"If-None-Match": etag}).status_code == 304
+
+    registry.get_sensor("temp").set_fault("freeze", 42.0)
+    registry.update_all()
+    response = client.get("/sensors", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()[0]["value"] == 42.0
@@ -0,0 +1,79 @@
+import pytest
+from bacpypes.core import run_once
+from bacpypes.object import AnalogValueObject
+from bacpypes.service.cov import COVIncrementCriteria
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+from services.bacnet_cov import ChangeFeed, cov_increment
+
+class RecordingCriteria(COVIncrementCriteria):
+    def __init__(self, obj):
+        super().__init__(obj)
+        self.sent = []
+
+    def send_cov_notifications(self, subscription=None):
+        self.previous_reported_value = self.presentValue
+        self.sent.append(self.presentValue)
+
+@pytest.fixture
+def feed():
+    registry = SensorRegistry()
+    objects = {}
+    for i, name in enumerate(["temp", "hum", "co2"]):
+        sensor = Sensor(name, "", 20.0, 0, 1000, noise=0.0, simulation_type="step")
+        registry.add(sensor)
+        obj = AnalogValueObject(
+            objectIdentifier=("analogValue", i + 1),
+            objectName=name,
+            presentValue=0.0,
+            priorityArray=[None] * 16,
+            relinquishDefault=0.0,
+            covIncrement=cov_increment({"cov_increment": 1.0} if name == "temp" else None, sensor),
+        )
+        objects[i] = [(obj, sensor)]
+    for sensor in registry.sensors.values():
+        sensor.set_priority(20.0, 8)
+    registry.update_all()
+    return registry, objects, ChangeFeed(registry, objects)
+
+def test_apply_writes_only_changed_objects(feed):
+    registry, objects, feed = feed
+    assert feed.apply() == 3
+
+    registry.get_sensor("hum").set_priority(55.0, 8)
+    registry.update_all()
+    assert feed.apply() == 1
+    assert objects[1][0][0].presentValue == 55.0
+    assert objects[1][0][0].priorityArray[7] == 55.0
+    assert feed.apply() == 0
+
+def test_cov_increment_filters_notifications(feed):
+    registry, objects, feed = feed
+    feed.apply()
+    temp = objects[0][0][0]
+    assert temp.covIncrement == 1.0
+    criteria = RecordingCriteria(temp)
+
+    for value in (20.5, 21.5, 21.9):
+        registry.get_sensor("temp").set_priority(value, 8)
+        registry.update_all()
+        feed.apply()
+        run_once()
+    assert criteria.sent == [21.5]
+
+def test_priority_write_without_value_change_updates_priority_array(feed):
+    registry, objects, feed = feed
+    feed.apply()
+    hum = objects[1][0][0]
+
+    # A lower-priority write leaves the value at 20.0 but changes the array
+    registry.get_sensor("hum").set_priority(30.0, 12)
+    registry.update_all()
+    assert feed.apply() == 1
+    assert hum.presentValue == 20.0
+    assert hum.priorityArray[11] == 30.0
+
+    registry.get_sensor("hum").clear_priority(12)
+    registry.update_all()
+    assert feed.apply() == 1
+    assert hum.priorityArray[11] is None
@@ -13,7 +13,14 @@ import time
 import pytest
 
 import asyncore
+import datetime
 import bacpypes.core
+from bacpypes.constructeddata import AnyAtomic
+from bacpypes.service.object import read_property_to_any
+from core.registry import SensorRegistry
+from core.schedules import ScheduleEngine, load_schedules
+from core.sensors import Sensor
+from services.bacnet_schedule import ScheduleFeed
 
 # Mock Registry for testing
 class MockRegistry:
@@ -128,3 +135,64 @@ def test_bacnet_schedule_workflow():
         stop()
         asyncore.close_all()
         t.join(timeout=2)
+
+SCHEDULES = {
+    "calendars": {"holidays": {"dates": ["2026-12-25"]}},
+    "schedules": {
+        "setpoint_schedule": {
+            "target": "setpoint",
+            "priority": 12,
+            "weekly": {"weekdays": [["07:00", 21.0], ["18:00", None]]},
+            "exceptions": [{"calendar": "holidays", "events": []}],
+        },
+    },
+}
+
+class ObjectList:
+    def __init__(self):
+        self.objects = {}
+
+    def add_object(self, obj):
+        self.objects[obj.objectIdentifier] = obj
+
+def at(text):
+    return datetime.datetime.fromisoformat(text).timestamp()
+
+def make_feed():
+    registry = SensorRegistry()
+    registry.add(Sensor("setpoint", "C", 19.0, 10, 30))
+    schedules, calendars = load_schedules(SCHEDULES)
+    engine = ScheduleEngine(registry, schedules, calendars)
+    feed = ScheduleFeed(engine, {"setpoint": ("analogValue", 7)})
+    app = ObjectList()
+    feed.add_objects(app)
+    return engine, feed, app.objects
+
+def test_schedule_objects_mirror_the_engine():
+    engine, feed, objects = make_feed()
+    schedule, calendar = objects[("schedule", 1)], objects[("calendar", 1)]
+    assert schedule.objectName == "setpoint_schedule" and calendar.objectName == "holidays"
+    assert schedule.priorityForWriting == 12
+    assert schedule.listOfObjectPropertyReferences[0].objectIdentifier == ("analogValue", 7)
+    monday = schedule.weeklySchedule[0].daySchedule
+    assert [tv.time.value for tv in monday] == [(7, 0, 0, 0), (18, 0, 0, 0)]
+    assert schedule.exceptionSchedule[0].period.calendarReference == ("calendar", 1)
+    # Every property encodes for ReadProperty
+    for prop in ("presentValue", "weeklySchedule", "exceptionSchedule", "effectivePeriod", "scheduleDefault"):
+        read_property_to_any(schedule, prop)
+    read_property_to_any(calendar, "dateList")
+
+def test_schedule_feed_follows_engine_transitions():
+    engine, feed, objects = make_feed()
+    schedule, calendar = objects[("schedule", 1)], objects[("calendar", 1)]
+    engine.start(at("2026-12-21T06:00:00"))
+    feed.apply(at("2026-12-21T06:00:00"))
+    assert not calendar.presentValue
+
+    engine.run_due(at("2026-12-21T07:00:00"))
+    assert feed.apply(at("2026-12-21T07:00:00")) == 1
+    assert read_property_to_any(schedule, "presentValue").cast_out(AnyAtomic).value == 21.0
+    assert feed.apply(at("2026-12-21T07:00:01")) == 0
+
+    feed.apply(at("2026-12-25T00:00:00"))
+    assert calendar.presentValue
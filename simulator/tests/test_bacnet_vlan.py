@@ -0,0 +1,67 @@
+from bacpypes.apdu import APDU, WhoIsRequest, ReadPropertyRequest
+from bacpypes.npdu import NPDU
+from bacpypes.pdu import PDU, LocalBroadcast
+from bacpypes.vlan import Node
+from services.bacnet_vlan import VirtualNetwork, vlan_address, who_is_limits
+
+class RecordingNode(Node):
+    def __init__(self, address):
+        super().__init__(address)
+        self.received = []
+
+    def response(self, pdu):
+        self.received.append(pdu)
+
+def encode(request, source, destination):
+    apdu = APDU()
+    request.encode(apdu)
+    npdu = NPDU()
+    apdu.encode(npdu)
+    pdu = PDU()
+    npdu.encode(pdu)
+    pdu.pduSource = source
+    pdu.pduDestination = destination
+    return pdu
+
+def read_request():
+    read = ReadPropertyRequest(objectIdentifier=("analogValue", 1), propertyIdentifier="presentValue")
+    read.apduInvokeID = 1
+    read.apduMaxSegs = 0
+    read.apduMaxResp = 5
+    return read
+
+def make_network(devices=300):
+    vlan = VirtualNetwork()
+    router = RecordingNode(vlan_address(0))
+    vlan.add_node(router)
+    nodes = []
+    for n in range(1, devices + 1):
+        node = RecordingNode(vlan_address(n))
+        vlan.add_node(node, 1000 + n)
+        nodes.append(node)
+    return vlan, router, nodes
+
+def test_who_is_limits():
+    ranged = WhoIsRequest(deviceInstanceRangeLowLimit=1010, deviceInstanceRangeHighLimit=1020)
+    assert who_is_limits(encode(ranged, vlan_address(0), LocalBroadcast())) == (1010, 1020)
+    assert who_is_limits(encode(WhoIsRequest(), vlan_address(0), LocalBroadcast())) is None
+    assert who_is_limits(encode(read_request(), vlan_address(0), vlan_address(1))) is None
+
+def test_who_is_reaches_only_devices_in_range():
+    vlan, router, nodes = make_network()
+    ranged = WhoIsRequest(deviceInstanceRangeLowLimit=1010, deviceInstanceRangeHighLimit=1012)
+    vlan.process_pdu(encode(ranged, router.address, LocalBroadcast()))
+    assert [n for n, node in enumerate(nodes, 1) if node.received] == [10, 11, 12]
+
+    vlan.process_pdu(encode(WhoIsRequest(), router.address, LocalBroadcast()))
+    assert all(node.received for node in nodes)
+    assert not router.received
+
+def test_device_traffic_goes_to_router_only():
+    vlan, router, nodes = make_network()
+    vlan.process_pdu(encode(WhoIsRequest(), nodes[0].address, LocalBroadcast()))
+    assert len(router.received) == 1
+    assert not any(node.received for node in nodes)
+
+    vlan.process_pdu(encode(read_request(), router.address, nodes[41].address))
+    assert [n for n, node in enumerate(nodes, 1) if node.received] == [42]
@@ -0,0 +1,58 @@
+import pytest
+from bacpypes.apdu import WritePropertyRequest, SimpleAckPDU
+from bacpypes.constructeddata import Any
+from bacpypes.errors import ExecutionError
+from bacpypes.primitivedata import Real, Null
+from bacpypes.basetypes import BinaryPV
+from core.journal import WriteJournal
+from core.sensors import Sensor
+from services.bacnet_write import SensorWriteServices
+
+class Fallback:
+    def do_WritePropertyRequest(self, apdu):
+        self.fallback = apdu
+
+class App(SensorWriteServices, Fallback):
+    def __init__(self, targets):
+        self.write_targets = targets
+        self.journal = WriteJournal()
+        self.responses = []
+
+    def response(self, apdu):
+        self.responses.append(apdu)
+
+def write(obj_id, value, priority=None, prop="presentValue"):
+    return WritePropertyRequest(objectIdentifier=obj_id, propertyIdentifier=prop, propertyValue=Any(value),
+                                priority=priority)
+
+@pytest.fixture
+def app():
+    setpoint = Sensor("setpoint", "C", 21.0, 0, 40, writable=True)
+    pump = Sensor("pump", "", 0.0, 0, 1, writable=True)
+    temp = Sensor("temp", "C", 20.0, 0, 40, writable=False)
+    return App({("analogValue", 1): setpoint, ("binaryValue", 2): pump, ("analogValue", 3): temp})
+
+def test_write_and_relinquish_are_applied_and_journaled(app):
+    setpoint = app.write_targets[("analogValue", 1)]
+    app.do_WritePropertyRequest(write(("analogValue", 1), Real(23.5), priority=8))
+    assert setpoint.priority_array[7] == 23.5
+    app.do_WritePropertyRequest(write(("binaryValue", 2), BinaryPV("active")))
+    assert app.write_targets[("binaryValue", 2)].priority_array[15] == 1.0
+    app.do_WritePropertyRequest(write(("analogValue", 1), Null(), priority=8))
+    assert setpoint.priority_array[7] is None
+
+    assert all(isinstance(r, SimpleAckPDU) for r in app.responses) and len(app.responses) == 3
+    entries = app.journal.query()
+    assert [(e["sensor"], e["priority"], e["value"], e["action"]) for e in entries] == [
+        ("setpoint", 8, 23.5, "write"), ("pump", 16, 1.0, "write"), ("setpoint", 8, None, "relinquish")]
+
+def test_read_only_sensor_is_denied(app):
+    with pytest.raises(ExecutionError) as err:
+        app.do_WritePropertyRequest(write(("analogValue", 3), Real(30.0)))
+    assert err.value.errorCode == "writeAccessDenied"
+    assert app.journal.query()[-1]["accepted"] is False
+
+def test_other_writes_fall_through(app):
+    request = write(("schedule", 1), Real(1.0))
+    app.do_WritePropertyRequest(request)
+    assert app.fallback is request
@@ -0,0 +1,54 @@
+import datetime
+import os
+import yaml
+from core import config_cache
+from core.config_cache import compile_configs, load_yaml
+
+def write(path, data):
+    with open(path, "w") as f:
+        yaml.dump(data, f)
+
+def fail_parse(*args, **kwargs):
+    raise AssertionError("YAML was parsed instead of loading the compiled cache")
+
+def test_cache_is_keyed_by_content(tmp_path, monkeypatch):
+    path = tmp_path / "sensors.yaml"
+    write(path, {"sensors": [{"name": "a"}]})
+    monkeypatch.setattr(config_cache, "_memo", {})
+    assert load_yaml(path) == {"sensors": [{"name": "a"}]}
+    cached = os.listdir(tmp_path / ".cache")
+    assert len(cached) == 1
+
+    # A fresh process loads the compiled artifact without parsing YAML
+    monkeypatch.setattr(config_cache, "_memo", {})
+    monkeypatch.setattr(config_cache.yaml, "load", fail_parse)
+    assert load_yaml(path) == {"sensors": [{"name": "a"}]}
+    monkeypatch.undo()
+
+    write(path, {"sensors": [{"name": "b"}]})
+    assert load_yaml(path) == {"sensors": [{"name": "b"}]}
+    assert os.listdir(tmp_path / ".cache") != cached
+    assert len(os.listdir(tmp_path / ".cache")) == 1
+
+def test_compile_configs_prebuilds_every_file(tmp_path):
+    write(tmp_path / "modbus_map.yaml", {"input_registers": {30001: {"sensor": "a"}}})
+    write(tmp_path / "mqtt_map.yaml", {"topics": {"a": "campus/a"}})
+    assert len(compile_configs(tmp_path)) == 2
+    assert len(os.listdir(tmp_path / ".cache")) == 2
+
+def test_cache_keeps_yaml_types_and_ignores_pickles(tmp_path, monkeypatch):
+    path = tmp_path / "schedules.yaml"
+    path.write_text("registers:\n  30001: {sensor: a}\n  true: b\nholiday: 2026-12-25\nnan: .nan\n")
+    (tmp_path / ".cache").mkdir()
+    (tmp_path / ".cache" / "schedules.yaml.0123.pickle").write_bytes(b"not loaded")
+    monkeypatch.setattr(config_cache, "_memo", {})
+    parsed = load_yaml(path)
+    # The stale pickle is removed, never loaded
+    assert [name.rsplit(".", 1)[1] for name in os.listdir(tmp_path / ".cache")] == ["json"]
+
+    monkeypatch.setattr(config_cache, "_memo", {})
+    monkeypatch.setattr(config_cache.yaml, "load", fail_parse)
+    cached = load_yaml(path)
+    assert cached["registers"] == {30001: {"sensor": "a"}, True: "b"}
+    assert cached["holiday"] == parsed["holiday"] == datetime.date(2026, 12, 25)
+    assert cached["nan"] != cached["nan"]
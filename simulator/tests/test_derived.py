@@ -0,0 +1,82 @@
+import pytest
+from core.derived import DerivedPlan, parse
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+
+def make_registry(use_bank=False):
+    registry = SensorRegistry(use_bank=use_bank)
+    for b in (1, 2):
+        temp = registry.add(Sensor(f"building_{b}_temperature", "C", 20.0 + b, 0, 50, simulation_type="custom"))
+        temp.noise = 0.0
+        registry.add(Sensor(f"building_{b}_motion", "bool", 0, 0, 1, simulation_type="custom", noise=0.0))
+        registry.add(Sensor(f"building_{b}_chiller_power", "kW", 0, 0, 100, simulation_type="derived",
+                            expression=f"max(0, 10 * (building_{b}_temperature - 20))"))
+        registry.add(Sensor(f"building_{b}_load", "kW", 0, 0, 1000, simulation_type="derived",
+                            expression=f"building_{b}_chiller_power * 2 + 50 * building_{b}_motion"))
+    return registry
+
+def test_parse_normalizes_names_and_constants():
+    shape, names, consts = parse("max(0, 35 * (b1_temp - 20))")
+    assert parse("max(0, 40 * (b2_temp - 21))")[0] == shape
+    assert names == ["b1_temp"]
+    assert consts == [0.0, 35.0, 20.0]
+
+@pytest.mark.parametrize("use_bank", [False, True])
+def test_derived_sensors_follow_their_inputs(use_bank):
+    registry = make_registry(use_bank)
+    registry.update_all()
+    snap = registry.snapshot()
+    assert snap["building_1_chiller_power"] == pytest.approx(10.0)
+    assert snap["building_2_chiller_power"] == pytest.approx(20.0)
+    assert snap["building_2_load"] == pytest.approx(40.0)
+    assert registry.get_sensor("building_2_load").value == pytest.approx(40.0)
+
+    registry.get_sensor("building_1_temperature").set_priority(35.0, 8)
+    registry.get_sensor("building_1_motion").set_priority(1, 8)
+    registry.update_all()
+    snap = registry.snapshot()
+    # Clamped to the derived sensor's max, and the second level sees the first level's result
+    assert snap["building_1_chiller_power"] == 100.0
+    assert snap["building_1_load"] == pytest.approx(250.0)
+
+def test_same_template_compiles_to_one_group_per_level():
+    registry = make_registry()
+    registry._sensor_list()
+    plan = DerivedPlan(registry._layout[0], registry._layout[2])
+    assert [len(level) for level in plan.levels] == [1, 1]
+    assert plan.levels[0][0].idx.tolist() == [2, 6]
+
+def test_priority_overrides_derived_value():
+    registry = make_registry()
+    registry.get_sensor("building_1_chiller_power").set_priority(77.0, 8)
+    registry.update_all()
+    assert registry.snapshot()["building_1_chiller_power"] == 77.0
+    assert registry.snapshot()["building_1_load"] == pytest.approx(154.0)
+
+def test_invalid_graphs_rejected():
+    sensors = [
+        Sensor("a", "u", 0, 0, 1, simulation_type="derived", expression="b + 1"),
+        Sensor("b", "u", 0, 0, 1, simulation_type="derived", expression="a + 1"),
+    ]
+    with pytest.raises(ValueError, match="cycle"):
+        DerivedPlan(("a", "b"), sensors)
+    with pytest.raises(ValueError, match="unknown"):
+        DerivedPlan(("a",), sensors[:1])
+    with pytest.raises(ValueError):
+        parse("__import__('os')")
+
+def test_faults_on_derived_sensors_survive_evaluation():
+    registry = make_registry()
+    registry.get_sensor("building_1_chiller_power").set_fault("offset", 5.0)
+    registry.get_sensor("building_2_chiller_power").set_fault("freeze", 3.0)
+    registry.update_all()
+    snap = registry.snapshot()
+    assert snap["building_1_chiller_power"] == pytest.approx(15.0)
+    # The next level reads the faulted value
+    assert snap["building_1_load"] == pytest.approx(30.0)
+    assert snap["building_2_chiller_power"] == 3.0
+    assert snap["building_2_load"] == pytest.approx(6.0)
+
+    registry.get_sensor("building_1_chiller_power").clear_fault()
+    registry.update_all()
+    assert registry.snapshot()["building_1_chiller_power"] == pytest.approx(10.0)
@@ -0,0 +1,40 @@
+import pytest
+from cpppo.server.enip import parser
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+from services.enip_server import TagAttribute, build_tags, WRITE_PRIORITY
+
+@pytest.fixture
+def registry():
+    registry = SensorRegistry()
+    for b in (1, 2, 3):
+        registry.add(Sensor(f"building_{b}_temperature", "C", 20.0 + b, 0, 50, noise=0.0,
+                            simulation_type="custom", writable=False))
+        registry.add(Sensor(f"building_{b}_setpoint", "C", 21.0, 10, 30, noise=0.0, simulation_type="custom"))
+    registry.update_all()
+    return registry
+
+def test_tags_read_the_shared_value_array(registry):
+    views = build_tags(registry)
+    assert sorted(views) == ["BUILDING_1", "BUILDING_1_SETPOINT", "BUILDING_1_TEMPERATURE", "BUILDING_2",
+                             "BUILDING_2_SETPOINT", "BUILDING_2_TEMPERATURE", "BUILDING_3", "BUILDING_3_SETPOINT",
+                             "BUILDING_3_TEMPERATURE", "CAMPUS_SETPOINT", "CAMPUS_TEMPERATURE"]
+    attribute = TagAttribute("CAMPUS_TEMPERATURE", parser.REAL, default=[0.0] * 3, views=views)
+    assert attribute[0:3] == [21.0, 22.0, 23.0]
+    assert views["BUILDING_2"][0:2] == [22.0, 21.0]
+
+    registry.get_sensor("building_3_setpoint").set_priority(25.0, 8)
+    registry.update_all()
+    assert views["CAMPUS_SETPOINT"][2] == 25.0
+
+def test_writes_go_to_priority_array(registry):
+    views = build_tags(registry)
+    views["CAMPUS_SETPOINT"][1:3] = [24.0, 26.0]
+    assert registry.get_sensor("building_2_setpoint").priority_array[WRITE_PRIORITY - 1] == 24.0
+    assert registry.get_sensor("building_3_setpoint").priority_array[WRITE_PRIORITY - 1] == 26.0
+
+    # A write touching a read-only point is rejected as a whole
+    with pytest.raises(AssertionError):
+        views["BUILDING_1"][0:2] = [1.0, 2.0]
+    assert registry.get_sensor("building_1_setpoint").priority_array[WRITE_PRIORITY - 1] is None
+    assert [e["accepted"] for e in registry.journal.query(protocol="enip")] == [True, True, False, False]
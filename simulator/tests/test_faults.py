@@ -0,0 +1,87 @@
+import pytest
+from core import clock
+from core.clock import SteppedClock
+from core.faults import FaultPlan
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+
+@pytest.fixture
+def stepped():
+    original = clock.get_clock()
+    sim = SteppedClock(start=1_000.0)
+    clock.set_clock(sim)
+    yield sim
+    clock.set_clock(original)
+
+@pytest.fixture
+def registry(stepped):
+    registry = SensorRegistry()
+    for b in (1, 2):
+        for kind in ("temperature", "humidity"):
+            sensor = registry.add(Sensor(f"building_{b}_{kind}", "u", 50.0, 0, 100, simulation_type="custom"))
+            sensor.noise = 0.0
+    return registry
+
+def test_glob_offset_applies_to_matching_sensors_only(registry):
+    registry.faults.add(FaultPlan("*_temperature", "offset", value=5.0))
+    registry.update_all()
+    snap = registry.snapshot()
+    assert snap["building_1_temperature"] == 55.0
+    assert snap["building_2_temperature"] == 55.0
+    assert snap["building_1_humidity"] == 50.0
+    # Faults shape the published values, not the underlying sensor state
+    assert registry.get_sensor("building_1_temperature").value == 50.0
+
+def test_regex_plan_with_schedule_and_ramp(registry, stepped):
+    registry.faults.add(FaultPlan(r"building_2_.*", "offset", value=10.0, start=1_010.0, end=1_030.0,
+                                  ramp=10.0, regex=True))
+    registry.update_all()
+    assert registry.snapshot()["building_2_humidity"] == 50.0
+
+    stepped.advance(15.0)
+    registry.update_all()
+    assert registry.snapshot()["building_2_humidity"] == pytest.approx(55.0)
+
+    stepped.advance(20.0)
+    registry.update_all()
+    assert registry.snapshot()["building_2_humidity"] == 50.0
+    assert registry.faults.plans() == []
+
+def test_drift_grows_with_time_and_clamps(registry, stepped):
+    registry.faults.add(FaultPlan("building_1_humidity", "drift", drift_rate=2.0, start=1_000.0))
+    stepped.advance(10.0)
+    registry.update_all()
+    assert registry.snapshot()["building_1_humidity"] == pytest.approx(70.0)
+
+    stepped.advance(100.0)
+    registry.update_all()
+    assert registry.snapshot()["building_1_humidity"] == 100.0
+
+def test_freeze_holds_value_and_overrides_offsets(registry):
+    registry.faults.add(FaultPlan("building_1_*", "offset", value=1.0))
+    registry.faults.add(FaultPlan("building_1_temperature", "freeze"))
+    registry.update_all()
+    assert registry.snapshot()["building_1_temperature"] == 51.0
+
+    registry.get_sensor("building_1_temperature").set_priority(80.0, 8)
+    registry.update_all()
+    assert registry.snapshot()["building_1_temperature"] == 51.0
+    assert registry.snapshot()["building_1_humidity"] == 51.0
+
+def test_freeze_survives_other_plans_changing(registry):
+    registry.faults.add(FaultPlan("building_1_temperature", "freeze"))
+    registry.update_all()
+    registry.get_sensor("building_1_temperature").set_priority(80.0, 8)
+
+    offset = registry.faults.add(FaultPlan("building_2_*", "offset", value=5.0))
+    registry.update_all()
+    assert registry.snapshot()["building_1_temperature"] == 50.0
+    assert registry.snapshot()["building_2_humidity"] == 55.0
+
+    registry.faults.remove(offset.id)
+    registry.update_all()
+    assert registry.snapshot()["building_1_temperature"] == 50.0
+
+def test_unknown_fault_type_rejected():
+    with pytest.raises(ValueError):
+        FaultPlan("*", "explode")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from core import clock
+from core.clock import SteppedClock
+from core.history import SensorHistory
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+
+@pytest.fixture
+def stepped():
+    original = clock.get_clock()
+    sim = SteppedClock(start=1_000.0)
+    clock.set_clock(sim)
+    yield sim
+    clock.set_clock(original)
+
+def make_registry():
+    registry = SensorRegistry(max_silence=None)
+    registry.add(Sensor("flow", "", 0.0, 0, 1000, noise=0.0, simulation_type="step", writable=True))
+    registry.add(Sensor("level", "", 5.0, 0, 10, noise=0.0, simulation_type="step", writable=True))
+    return registry
+
+def test_records_changes_and_wraps(stepped):
+    registry = make_registry()
+    history = SensorHistory(depth=4)
+    registry.subscribe(history.record)
+    for n in range(6):
+        registry.get_sensor("flow").set_priority(float(n), 8)
+        registry.update_all()
+        stepped.advance(1.0)
+
+    times, values = history.read("flow")
+    assert times.tolist() == [1_002.0, 1_003.0, 1_004.0, 1_005.0]
+    assert values.tolist() == [2.0, 3.0, 4.0, 5.0]
+    # Only the first tick reported the unchanged sensor
+    assert history.read("level")[0].tolist() == [1_000.0]
+    assert history.stats() == {"depth": 4, "sensors": 2, "samples": 5}
+
+def test_time_range_slices_across_the_wrap():
+    history = SensorHistory(depth=5)
+    history.index = {"flow": 0}
+    history.times = np.array([[105.0, 106.0, 102.0, 103.0, 104.0]])
+    history.values = history.times * 10
+    history.counts = np.array([7])
+
+    assert history.read("flow", 103.0, 105.0)[1].tolist() == [1030.0, 1040.0, 1050.0]
+    assert history.read("flow", start=104.5)[0].tolist() == [105.0, 106.0]
+    assert history.read("flow", end=102.5)[0].tolist() == [102.0]
+    assert history.read("missing")[0].size == 0
@@ -0,0 +1,28 @@
+import json
+from core.journal import WriteJournal
+
+def test_ring_keeps_most_recent_entries():
+    journal = WriteJournal(capacity=3)
+    for i in range(5):
+        journal.record("bacnet", "analogValue:1", "temp", 8, float(i))
+    journal.record("bacnet", "analogValue:1", "temp", 8, None)
+
+    entries = journal.query()
+    assert [e["seq"] for e in entries] == [4, 5, 6]
+    assert entries[-1]["action"] == "relinquish"
+    assert [e["seq"] for e in journal.query(since=5)] == [6]
+    assert journal.query(sensor="hum") == []
+
+def test_flush_appends_batches(tmp_path):
+    path = tmp_path / "writes.jsonl"
+    journal = WriteJournal(capacity=100, path=str(path))
+    for i in range(10):
+        journal.record("bacnet", "analogValue:2", "hum", 16, 40.0 + i, source="10.0.0.9")
+    assert journal.flush() == 10
+    journal.record("bacnet", "analogValue:2", "hum", 16, None)
+    journal.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["seq"] for line in lines] == list(range(1, 12))
+    assert lines[0]["value"] == 40.0 and lines[0]["source"] == "10.0.0.9"
+    assert journal.stats()["flushed"] == 11
@@ -0,0 +1,66 @@
+import struct
+import numpy as np
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+from services.modbus_image import RegisterImage, TableImage
+from services.modbus_map import AddressIndex
+
+def registers_to_float(hi, lo):
+    return struct.unpack(">f", struct.pack(">HH", hi, lo))[0]
+
+def test_image_packs_floats_as_big_endian_registers():
+    image = RegisterImage([1, 0, 2], units=[1, 2], offsets=[0.1, 0.2])
+    image.update(np.array([20.0, 10.0, -5.5]))
+
+    unit2 = image.unit(2)
+    assert unit2.dtype == np.dtype(">u2") and len(unit2) == 6
+    assert registers_to_float(*unit2[0:2].tolist()) == np.float32(10.2)
+    assert registers_to_float(*image.unit(1)[2:4].tolist()) == np.float32(20.1)
+    # Views share memory with the image
+    assert np.shares_memory(unit2, image.floats)
+
+def test_update_writes_only_changed_slots():
+    image = RegisterImage([0, 1, -1, 2], units=[1])
+    image.update(np.array([1.0, 2.0, 3.0, 4.0]))
+    written = image.update(np.array([9.0, 9.0, 9.0, 9.0]), changed=np.array([1, 2]))
+
+    assert written == 1
+    assert image.floats[0].tolist() == [1.0, 9.0, 4.0]
+
+def test_unused_slots_stay_zero():
+    image = RegisterImage([0, 3], units=[1])
+    image.update(np.array([1.0, 2.0]))
+    assert image.floats[0].tolist() == [1.0, 0.0, 0.0, 2.0]
+
+def test_sorted_by_name_layout():
+    class Snap:
+        names = ("zeta", "alpha", "mid")
+    image = RegisterImage.sorted_by_name(Snap, units=[1])
+    assert image.slot_of.tolist() == [2, 0, 1]
+
+def test_table_image_rewrites_only_addresses_of_changed_sensors():
+    # "b" is mapped twice, "c" not at all
+    entries = {30001: {"sensor": "a", "scale": 0.1}, 30002: {"sensor": "b"}, 30004: {"sensor": "b", "scale": 2}}
+    image = TableImage(AddressIndex(entries, 30001, {"a": 0, "b": 1, "c": 2}))
+    image.update(np.array([1.0, 10.0, 7.0]))
+    assert image.read(0, 5) == [10, 10, 0, 5, 0]
+
+    written = image.update(np.array([2.0, 20.0, 8.0]), changed=np.array([1]))
+    assert written == 2
+    assert image.read(0, 4) == [10, 20, 0, 10]
+
+def test_table_image_syncs_once_per_snapshot():
+    registry = SensorRegistry()
+    for name in ("a", "b", "c"):
+        registry.add(Sensor(name, "u", 1.0, -50, 50, simulation_type="custom")).noise = 0.0
+    registry.update_all()
+    entries = {30001 + i: {"sensor": name} for i, name in enumerate("abc")}
+    image = TableImage(AddressIndex(entries, 30001, registry.snapshot().index))
+    image.sync(registry)
+    assert image.read(0, 3) == [1, 1, 1]
+
+    registry.get_sensor("b").set_priority(-4.0, 8)
+    registry.update_all()
+    image.sync(registry)
+    assert image.read(0, 3) == [1, 65536 - 4, 1]
+    assert image.version == registry.snapshot().version
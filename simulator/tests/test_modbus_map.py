@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+from services.modbus_map import build_indexes, unit_indexes
+
+MODBUS_MAP = {
+    "input_registers": {30001: {"sensor": "temp", "scale": 0.1}, 30003: {"sensor": "power", "scale": 10}},
+    "holding_registers": {40001: {"sensor": "setpoint", "scale": 0.1, "writable": True}},
+    "discrete_inputs": {10001: {"sensor": "motion"}},
+}
+
+@pytest.fixture
+def registry():
+    registry = SensorRegistry()
+    for name, value in (("temp", -2.5), ("power", 55.0), ("setpoint", 22.0), ("motion", 1.0)):
+        sensor = registry.add(Sensor(name, "u", value, -50, 500, simulation_type="custom"))
+        sensor.noise = 0.0
+    registry.update_all()
+    return registry
+
+def test_reads_scale_values_through_the_map(registry):
+    indexes = build_indexes(MODBUS_MAP, registry.snapshot().index)
+    values = registry.snapshot().values
+
+    # -2.5 / 0.1 as a signed 16-bit register, a gap, then 55 / 10 rounded
+    assert indexes["ir"].read(values, 0, 3) == [65536 - 25, 0, 6]
+    assert indexes["hr"].read(values, 0) == [220]
+    assert indexes["di"].read(values, 0, 2) == [True, False]
+    # Reads past the end of the table are zero-filled
+    assert indexes["ir"].read(values, 2, 3) == [6, 0, 0]
+
+def test_only_writable_addresses_decode(registry):
+    indexes = build_indexes(MODBUS_MAP, registry.snapshot().index)
+    assert list(indexes["hr"].decode(0, [235])) == [(2, 23.5)]
+    assert list(indexes["ir"].decode(0, [1])) == []
+
+def test_holding_register_write_lands_in_priority_array(registry):
+    pytest.importorskip("pymodbus")
+    from services.modbus_server import WRITE_PRIORITY, map_slaves
+
+    store = map_slaves(registry, MODBUS_MAP)[1]
+    store.setValues(6, 0, [250])
+    sensor = registry.get_sensor("setpoint")
+    assert sensor.priority_array[WRITE_PRIORITY - 1] == pytest.approx(25.0)
+
+    registry.update_all()
+    assert store.getValues(3, 0, 1) == [250]
+    assert store.getValues(4, 0, 1) == [65536 - 25]
+
+def test_units_are_views_of_their_building_range():
+    registry = SensorRegistry()
+    modbus_map = {"input_registers": {}, "units": {}}
+    for b in (1, 2, 3):
+        for i, kind in enumerate(("temperature", "humidity")):
+            name = f"building_{b}_{kind}"
+            registry.add(Sensor(name, "u", 10.0 * b + i, 0, 100, simulation_type="custom")).noise = 0.0
+            modbus_map["input_registers"][30001 + (b - 1) * 2 + i] = {"sensor": name}
+        modbus_map["units"][10 + b] = f"building_{b}"
+    registry.update_all()
+    snapshot = registry.snapshot()
+
+    indexes = build_indexes(modbus_map, snapshot.index)
+    tables = unit_indexes(indexes, modbus_map["units"], snapshot.names)
+    assert tables[12]["ir"].read(snapshot.values, 0, 2) == [20, 21]
+    assert np.shares_memory(tables[13]["ir"].position, indexes["ir"].position)
+
+def test_split_building_units_are_compacted():
+    # building_1's second point was appended after building_2's
+    modbus_map = {"input_registers": {30001: {"sensor": "building_1_a"}, 30002: {"sensor": "building_2_a"},
+                                      30003: {"sensor": "building_1_b"}}}
+    registry = SensorRegistry()
+    for value, name in enumerate(("building_1_a", "building_2_a", "building_1_b")):
+        registry.add(Sensor(name, "u", value, 0, 10, simulation_type="custom")).noise = 0.0
+    registry.update_all()
+    snapshot = registry.snapshot()
+    tables = unit_indexes(build_indexes(modbus_map, snapshot.index), {1: "building_1", 2: "building_2"},
+                          snapshot.names)
+    assert len(tables[1]["ir"]) == 2
+    assert tables[1]["ir"].read(snapshot.values, 0, 2) == [0, 2]
+    assert tables[2]["ir"].read(snapshot.values, 0) == [1]
+
+def test_load_tool_sizes_reads_to_resolved_unit_tables(tmp_path):
+    pytest.importorskip("pymodbus")
+    import yaml
+    from tools.load_modbus import table_sizes
+
+    sensors = {"sensors": [{"name": n} for n in ("building_1_a", "building_1_b", "building_2_a", "building_3_flag")]}
+    modbus_map = {
+        "input_registers": {30001: {"sensor": "building_1_a"}, 30002: {"sensor": "building_1_b"},
+                            30003: {"sensor": "building_2_a"}, 30004: {"sensor": "building_2_gone"}},
+        "discrete_inputs": {10001: {"sensor": "building_3_flag"}},
+        "units": {1: "building_1", 2: "building_2", 3: "building_3"},
+    }
+    (tmp_path / "sensors.yaml").write_text(yaml.safe_dump(sensors))
+    (tmp_path / "modbus_map.yaml").write_text(yaml.safe_dump(modbus_map))
+    # building_2_gone is not a sensor, so the server does not serve 30004
+    assert table_sizes(tmp_path / "modbus_map.yaml", tmp_path / "sensors.yaml") == {1: 2, 2: 1, 3: 0}
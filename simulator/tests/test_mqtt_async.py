@@ -0,0 +1,153 @@
+import asyncio
+import time
+import pytest
+from services.mqtt_async import ShardedPublisher, remaining_length, CONNECT, PUBLISH, PUBACK
+
+class Broker:
+    """Minimal MQTT broker: accepts every CONNECT and records publishes, holding PUBACKs while `paused`."""
+    def __init__(self, drop_after=None):
+        self.received = []
+        # DUP flag of each recorded publish
+        self.dup = []
+        self.paused = False
+        self.held = []
+        # Close the first connection without acking its `drop_after`-th publish
+        self.drop_after = drop_after
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                header = (await reader.readexactly(1))[0]
+                length, shift = 0, 0
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length |= (byte & 0x7F) << shift
+                    shift += 7
+                    if not byte & 0x80:
+                        break
+                kind, body = header >> 4, await reader.readexactly(length) if length else b""
+                if kind == CONNECT:
+                    writer.write(bytes([0x20, 2, 0, 0]))
+                elif kind == PUBLISH:
+                    length = int.from_bytes(body[:2], "big")
+                    topic, packet_id = body[2:2 + length].decode(), body[2 + length:4 + length]
+                    if len(self.received) + 1 == self.drop_after:
+                        self.drop_after = None
+                        writer.close()
+                        return
+                    self.received.append((topic, body[4 + length:]))
+                    self.dup.append(bool(header & 0x08))
+                    ack = bytes([PUBACK << 4, 2]) + packet_id
+                    if self.paused:
+                        self.held.append((writer, ack))
+                    else:
+                        writer.write(ack)
+        except asyncio.IncompleteReadError:
+            pass
+
+    def release(self):
+        for writer, ack in self.held:
+            writer.write(ack)
+        self.held = []
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+def test_remaining_length():
+    assert remaining_length(0) == b"\x00"
+    assert remaining_length(127) == b"\x7f"
+    assert remaining_length(128) == b"\x80\x01"
+    assert remaining_length(16383) == b"\xff\x7f"
+
+def test_qos_2_is_rejected():
+    with pytest.raises(ValueError, match="QoS"):
+        ShardedPublisher(qos=2)
+
+def test_shards_keep_topic_order_and_bound_inflight():
+    async def run():
+        broker = Broker()
+        server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        publisher = ShardedPublisher("127.0.0.1", port, connections=3, qos=1, max_inflight=5)
+        await publisher.connect()
+
+        broker.paused = True
+        topics = [f"campus/building_{b}/temperature" for b in range(10)]
+        publisher.enqueue([(topic, str(n)) for n in range(20) for topic in topics])
+        await wait_for(lambda: len(broker.received) == 15)
+        await asyncio.sleep(0.05)
+        stats = publisher.stats()
+        assert len(broker.received) == 15
+        assert (stats["inflight"], stats["backlog"], stats["acked"]) == (15, 185, 0)
+
+        broker.paused = False
+        broker.release()
+        await wait_for(lambda: publisher.stats()["acked"] == 200)
+        stats = publisher.stats()
+        assert (stats["published"], stats["inflight"], stats["backlog"]) == (200, 0, 0)
+        assert stats["latency_ms"]["max"] > 0
+        for topic in topics:
+            assert [payload for t, payload in broker.received if t == topic] == [str(n).encode() for n in range(20)]
+        assert len({publisher._route(topic)[0] for topic in topics}) == 3
+
+        await publisher.disconnect()
+        server.close()
+
+    asyncio.run(run())
+
+def test_unacked_messages_are_resent_after_reconnect():
+    async def run():
+        broker = Broker(drop_after=50)
+        server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+        publisher = ShardedPublisher("127.0.0.1", server.sockets[0].getsockname()[1], connections=1, max_inflight=10)
+        await publisher.connect()
+        publisher.enqueue([("campus/building_1/temperature", str(n)) for n in range(100)])
+        await wait_for(lambda: publisher.stats()["acked"] == 100, timeout=5.0)
+        assert publisher.stats()["reconnects"] == 1
+        assert sorted({int(payload) for _, payload in broker.received}) == list(range(100))
+        # Only the messages that were in flight when the connection dropped are marked as re-deliveries
+        resent = [int(payload) for (_, payload), dup in zip(broker.received, broker.dup) if dup]
+        assert 49 in resent and not any(broker.dup[:49])
+        await publisher.disconnect()
+        server.close()
+
+    asyncio.run(run())
+
+def test_silent_broker_connection_is_replaced():
+    async def run():
+        # The test broker never answers PINGREQ, like a half-open connection
+        broker = Broker()
+        server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+        publisher = ShardedPublisher("127.0.0.1", server.sockets[0].getsockname()[1], connections=1, keepalive=1)
+        await publisher.connect()
+        await wait_for(lambda: publisher.stats()["reconnects"] >= 1, timeout=4.0)
+        await publisher.disconnect()
+        server.close()
+
+    asyncio.run(run())
+
+def test_backlog_drops_oldest_messages():
+    async def run():
+        broker = Broker()
+        broker.paused = True
+        server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+        publisher = ShardedPublisher("127.0.0.1", server.sockets[0].getsockname()[1], connections=1, max_inflight=5,
+                                     max_backlog=10)
+        await publisher.connect()
+        publisher.enqueue([("campus/building_1/temperature", str(n)) for n in range(5)])
+        await wait_for(lambda: len(broker.received) == 5)
+        publisher.enqueue([("campus/building_1/temperature", str(n)) for n in range(5, 30)])
+        stats = publisher.stats()
+        assert (stats["inflight"], stats["backlog"], stats["dropped"]) == (5, 10, 15)
+
+        broker.paused = False
+        broker.release()
+        await wait_for(lambda: publisher.stats()["acked"] == 15)
+        assert [int(payload) for _, payload in broker.received] == list(range(5)) + list(range(20, 30))
+        await publisher.disconnect()
+        server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+import json
+import numpy as np
+import pytest
+from core.registry import RegistrySnapshot
+from services.mqtt_batch import BuildingBatcher, decode_packed
+
+NAMES = ("building_1_temperature", "building_2_temperature", "building_1_co2", "building_2_co2", "building_1_power")
+
+def snapshot(timestamp, values):
+    return RegistrySnapshot(1, timestamp, NAMES, {n: i for i, n in enumerate(NAMES)}, np.array(values, dtype=float))
+
+def test_points_and_periodic_birth():
+    batcher = BuildingBatcher(NAMES, "packed", birth_interval=60.0)
+    assert batcher.point_messages() == [
+        ("campus_batch/building_1/points", json.dumps(["building_1_temperature", "building_1_co2", "building_1_power"])),
+        ("campus_batch/building_2/points", json.dumps(["building_2_temperature", "building_2_co2"])),
+    ]
+    births = batcher.messages(snapshot(1000.0, [21.5, 22.5, 400.0, 410.0, 55.0]), np.arange(5))
+    assert [topic for topic, _ in births] == ["campus_batch/building_1/birth", "campus_batch/building_2/birth"]
+    timestamp, seq, indices, values = decode_packed(births[0][1])
+    assert (timestamp, seq, indices.tolist(), values.tolist()) == (1000.0, 1, [0, 1, 2], [21.5, 400.0, 55.0])
+
+    assert batcher.messages(snapshot(1030.0, [21.5, 22.5, 400.0, 410.0, 55.0]), np.empty(0, dtype=np.intp)) == []
+    assert [t for t, _ in batcher.messages(snapshot(1060.0, [0.0] * 5), np.empty(0, dtype=np.intp))] == \
+        ["campus_batch/building_1/birth", "campus_batch/building_2/birth"]
+
+def test_data_carries_only_changed_points_per_building():
+    batcher = BuildingBatcher(NAMES, "packed", topic="site/{building}")
+    batcher.messages(snapshot(1000.0, [0.0] * 5), np.arange(5))
+    messages = batcher.messages(snapshot(1001.0, [21.0, 23.0, 400.0, 415.0, 60.0]), np.array([1, 3, 4]))
+    decoded = {topic: decode_packed(payload) for topic, payload in messages}
+    assert list(decoded) == ["site/building_1/data", "site/building_2/data"]
+    _, seq, indices, values = decoded["site/building_1/data"]
+    assert (seq, indices.tolist(), values.tolist()) == (2, [2], [60.0])
+    _, _, indices, values = decoded["site/building_2/data"]
+    assert (indices.tolist(), values.tolist()) == ([0, 1], [23.0, 415.0])
+
+def test_msgpack_encoding():
+    msgpack = pytest.importorskip("msgpack")
+    batcher = BuildingBatcher(NAMES, "msgpack")
+    topic, payload = batcher.messages(snapshot(1000.0, [21.5, 22.5, 400.0, 410.0, 55.0]), np.arange(5))[1]
+    assert msgpack.unpackb(payload) == {"ts": 1000.0, "seq": 1, "i": [0, 1], "v": [22.5, 410.0]}
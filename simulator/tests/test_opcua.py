@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timezone
+from asyncua import ua, Client, Server
+from asyncua.common.callback import CallbackType
+from core.history import SensorHistory
+from core.registry import RegistrySnapshot, SensorRegistry
+from core.sensors import Sensor
+from services.opcua_history import RingHistoryStorage
+from core.sharding import point_path
+from services.opcua_server import AddressSpace, WRITE_PRIORITY
+
+PORT = 48411
+
+def make_registry():
+    registry = SensorRegistry()
+    for b in (1, 2):
+        registry.add(Sensor(f"building_{b}_temperature", "C", 20.0, 0, 50, noise=0.0, writable=False,
+                            simulation_type="step"))
+        registry.add(Sensor(f"building_{b}_setpoint", "C", 21.0, 10, 30, noise=0.0, simulation_type="step"))
+    registry.update_all()
+    return registry
+
+def test_point_path():
+    assert point_path("building_12_chiller_power") == ("building_12", "chiller_power")
+    assert point_path("temperature") == ("default", "temperature")
+
+async def serve_and_check(registry):
+    server = Server()
+    await server.init()
+    server.set_endpoint(f"opc.tcp://127.0.0.1:{PORT}/test/")
+    idx = await server.register_namespace("urn:test")
+    space = AddressSpace(server, idx, registry.journal)
+    assert await space.build(registry) == (2, 2)
+    server.subscribe_server_callback(CallbackType.PostWrite, space.on_write)
+
+    async with server:
+        snapshot = registry.snapshot()
+        registry.get_sensor("building_2_setpoint").set_priority(25.0, 8)
+        registry.update_all()
+        snapshot, changed = registry.changes_since(snapshot.version)
+        params = space.write_values(snapshot, changed)
+        assert [w.NodeId.Identifier for w in params.NodesToWrite] == ["building_2_setpoint"]
+        await server.iserver.attribute_service.write(params)
+
+        async with Client(f"opc.tcp://127.0.0.1:{PORT}/test/") as client:
+            assert await client.get_node(ua.NodeId("building_2_setpoint", idx)).read_value() == 25.0
+            types = await client.nodes.objects.get_child([f"{idx}:PointTypes", f"{idx}:temperature"])
+            assert len(await types.get_children()) == 2
+
+            await client.get_node(ua.NodeId("building_1_setpoint", idx)).write_value(24.5, ua.VariantType.Double)
+            try:
+                node = client.get_node(ua.NodeId("building_2_temperature", idx))
+                await node.write_value(0.0, ua.VariantType.Double)
+                rejected = False
+            except ua.UaStatusCodeError:
+                rejected = True
+    return rejected
+
+def test_batched_publish_and_client_writes():
+    registry = make_registry()
+    rejected = asyncio.run(serve_and_check(registry))
+    assert rejected
+    assert registry.get_sensor("building_1_setpoint").priority_array[WRITE_PRIORITY - 1] == 24.5
+    entries = registry.journal.query(protocol="opcua")
+    assert [(e["sensor"], e["value"]) for e in entries] == [("building_1_setpoint", 24.5)]
+
+async def read_history(registry):
+    server = Server()
+    await server.init()
+    server.set_endpoint(f"opc.tcp://127.0.0.1:{PORT + 1}/test/")
+    idx = await server.register_namespace("urn:test")
+    space = AddressSpace(server, idx)
+    await space.build(registry, historizing=True)
+    names = registry.snapshot().names
+    server.iserver.history_manager.set_storage(
+        RingHistoryStorage(registry.history, {nodeid: names[i] for i, nodeid in space.nodes.items()}))
+
+    async with server:
+        async with Client(f"opc.tcp://127.0.0.1:{PORT + 1}/test/") as client:
+            node = client.get_node(ua.NodeId("building_1_setpoint", idx))
+            start = datetime.fromtimestamp(1_001.0, timezone.utc)
+            forward = await node.read_raw_history(start, datetime.fromtimestamp(1_003.0, timezone.utc))
+            newest = await node.read_raw_history(numvalues=2)
+    return forward, newest
+
+def test_history_read_from_ring_buffers():
+    registry = make_registry()
+    registry.history = SensorHistory(depth=10)
+    sensor = registry.get_sensor("building_1_setpoint")
+    for n in range(5):
+        sensor.set_priority(20.0 + n, 8)
+        registry.update_all()
+        snapshot = registry.snapshot()
+        registry.history.record(RegistrySnapshot(snapshot.version, 1_000.0 + n, snapshot.names, snapshot.index,
+                                                 snapshot.values, snapshot.changed))
+
+    forward, newest = asyncio.run(read_history(registry))
+    assert [dv.Value.Value for dv in forward] == [21.0, 22.0, 23.0]
+    assert forward[0].SourceTimestamp.timestamp() == 1_001.0
+    assert [dv.Value.Value for dv in newest] == [24.0, 23.0]
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+import pytest
+from services.plugins import PLUGINS, ProtocolPlugin, enabled_plugins, start_plugins
+
+def test_enabled_plugins_parsing():
+    assert [p.name for p in enabled_plugins("all")] == list(PLUGINS)
+    assert enabled_plugins("none") == []
+    assert [p.name for p in enabled_plugins("Modbus, mqtt")] == ["modbus", "mqtt"]
+    with pytest.raises(ValueError):
+        enabled_plugins("modbus,profinet")
+
+def test_protocol_libraries_are_not_imported_by_main():
+    code = "import sys, main; print(sorted(m for m in ('bacpypes', 'asyncua', 'cpppo', 'pymodbus') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_start_plugins_reports_breakdown():
+    plugin = ProtocolPlugin("dummy", "Dummy", "time:sleep", "DUMMY_PORT", 0)
+    plugin.args = lambda registry: (0,)
+    timings = start_plugins(None, [plugin])
+    assert [t["plugin"] for t in timings] == ["dummy"]
+    assert timings[0]["import_ms"] >= 0
@@ -0,0 +1,70 @@
+import pytest
+from core import clock
+from core.clock import SteppedClock
+from core.recording import Recorder, Recording, ReplaySource
+from core.registry import SensorRegistry
+from core.sensors import Sensor, set_seed
+
+@pytest.fixture
+def stepped():
+    original = clock.get_clock()
+    sim = SteppedClock(start=1_700_000_000.0)
+    clock.set_clock(sim)
+    yield sim
+    clock.set_clock(original)
+    set_seed(None)
+
+def make_registry():
+    registry = SensorRegistry()
+    for i in range(3):
+        registry.add(Sensor(f"walk_{i}", "ppm", 420.0, 400.0, 1200.0, noise=5.0, simulation_type="random_walk"))
+    return registry
+
+def record(path, stepped, ticks, chunk_rows=4):
+    registry = make_registry()
+    recorder = Recorder(path, chunk_rows=chunk_rows)
+    registry.subscribe(recorder.record)
+    history = []
+    for _ in range(ticks):
+        registry.update_all()
+        history.append(registry.snapshot().values.tolist())
+        stepped.advance(1.0)
+    recorder.close()
+    return history
+
+def test_recording_round_trips_across_chunks(tmp_path, stepped):
+    history = record(tmp_path / "rec", stepped, ticks=10)
+    recording = Recording(tmp_path / "rec")
+
+    assert len(recording) == 10
+    assert len(recording.chunks) == 3
+    assert recording.names == ("walk_0", "walk_1", "walk_2")
+    assert [recording.row(i).tolist() for i in range(10)] == history
+    assert recording.column("walk_1").tolist() == [row[1] for row in history]
+    assert recording.duration == 9.0
+
+def test_replay_feeds_registry_at_speed(tmp_path, stepped):
+    history = record(tmp_path / "rec", stepped, ticks=10)
+
+    set_seed(99)
+    registry = make_registry()
+    registry.replay = ReplaySource(Recording(tmp_path / "rec"), speed=2.0)
+    replayed = []
+    for _ in range(4):
+        registry.update_all()
+        replayed.append(registry.snapshot().values.tolist())
+        stepped.advance(1.0)
+    assert replayed == [history[0], history[2], history[4], history[6]]
+
+    # Past the end the last row is held
+    stepped.advance(60.0)
+    registry.update_all()
+    assert registry.snapshot().values.tolist() == history[-1]
+
+def test_replay_honours_priority_overrides(tmp_path, stepped):
+    record(tmp_path / "rec", stepped, ticks=3)
+    registry = make_registry()
+    registry.replay = ReplaySource(Recording(tmp_path / "rec"), loop=True)
+    registry.get_sensor("walk_0").set_priority(500.0, 8)
+    registry.update_all()
+    assert registry.snapshot()["walk_0"] == 500.0
@@ -0,0 +1,127 @@
+import threading
+import pytest
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+import core.clock
+
+@pytest.fixture
+def registry():
+    registry = SensorRegistry()
+    registry.add(Sensor("temp", "C", 20.0, 0, 100, noise=0.0, simulation_type="step"))
+    registry.add(Sensor("hum", "%", 40.0, 0, 100, noise=0.0, simulation_type="step"))
+    return registry
+
+def test_update_all_publishes_new_snapshot(registry):
+    registry.update_all()
+    first = registry.snapshot()
+    registry.update_all()
+    second = registry.snapshot()
+
+    assert second.version == first.version + 1
+    assert set(second) == {"temp", "hum"}
+    assert second["temp"] == registry.get_sensor("temp").value
+
+def test_snapshot_is_immutable(registry):
+    snap = registry.snapshot()
+    with pytest.raises(ValueError):
+        snap.values[0] = 1.0
+
+    registry.get_sensor("temp").set_priority(99.0, 8)
+    registry.update_all()
+    assert snap["temp"] != 99.0
+    assert registry.snapshot()["temp"] == 99.0
+
+def test_readers_do_not_wait_for_tick(registry):
+    registry.update_all()
+    result = {}
+    with registry.lock:
+        reader = threading.Thread(target=lambda: result.setdefault("temp", registry.get("temp")))
+        reader.start()
+        reader.join(timeout=1)
+    assert "temp" in result
+
+def test_get_falls_back_for_sensors_added_after_publish(registry):
+    registry.update_all()
+    registry.add(Sensor("late", "C", 5.0, 0, 10))
+    assert registry.get("late") == 5.0
+
+def test_deadband_suppresses_small_changes():
+    registry = SensorRegistry()
+    sensor = registry.add(Sensor("setpoint", "C", 20.0, 0, 100, simulation_type="custom", deadband=0.5))
+    sensor.noise = 0.0
+
+    registry.update_all()
+    assert registry.snapshot().changed.tolist() == [0]
+
+    sensor.set_priority(20.3, 8)
+    registry.update_all()
+    assert registry.snapshot().changed.tolist() == []
+
+    sensor.set_priority(21.0, 8)
+    registry.update_all()
+    assert registry.snapshot().changed.tolist() == [0]
+
+def test_changes_since_accumulates_skipped_ticks(registry):
+    registry.update_all()
+    version = registry.snapshot().version
+    for _ in range(3):
+        registry.update_all()
+
+    registry.get_sensor("temp").set_priority(99.0, 8)
+    registry.update_all()
+    snap, changed = registry.changes_since(version)
+    assert snap.version == version + 4
+    assert "temp" in [snap.names[i] for i in changed]
+
+    # A consumer that has never polled gets everything
+    _, changed = registry.changes_since(0)
+    assert len(changed) == 2
+
+def test_max_silence_forces_heartbeat(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(core.clock.time, "time", lambda: now[0])
+    registry = SensorRegistry(max_silence=30)
+    registry.add(Sensor("flag", "bool", 0.0, 0, 1, simulation_type="step"))
+    registry.get_sensor("flag").set_priority(1.0, 8)
+
+    registry.update_all()
+    now[0] += 10
+    registry.update_all()
+    assert len(registry.snapshot().changed) == 0
+
+    now[0] += 25
+    registry.update_all()
+    assert len(registry.snapshot().changed) == 1
+
+def test_partial_ticks_track_due_derived_and_silent_sensors(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(core.clock.time, "time", lambda: now[0])
+    registry = SensorRegistry(max_silence=30)
+    registry.add(Sensor("fast", "u", 0.0, 0, 100, simulation_type="ramp"))
+    registry.add(Sensor("slow", "u", 5.0, 0, 100, simulation_type="step", update_period=100))
+    registry.add(Sensor("double", "u", 0.0, 0, 1000, simulation_type="derived", expression="fast * 2",
+                        update_period=100))
+    registry.configure_rates(1.0)
+    registry.update_due()
+    first = registry.snapshot()
+
+    now[0] += 10
+    registry.update_due()
+    snap = registry.snapshot()
+    # Only the due sensor and the derived sensor reading it moved; the last tick's snapshot is untouched
+    assert [snap.names[i] for i in snap.changed] == ["fast", "double"]
+    assert snap["double"] == pytest.approx(2 * snap["fast"])
+    assert snap["slow"] == first["slow"]
+    assert first.values is not snap.values and not snap.values.flags.writeable
+
+    # "slow" is not due again for 100 s but still reports its heartbeat after 30 s of silence
+    now[0] += 25
+    registry.update_due()
+    assert "slow" in [registry.snapshot().names[i] for i in registry.snapshot().changed]
+
+def test_subscribers_receive_snapshot(registry):
+    seen = []
+    registry.subscribe(lambda snap: seen.append(snap.version))
+    registry.update_all()
+    registry.update_all()
+    assert seen == [1, 2]
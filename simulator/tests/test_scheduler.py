@@ -0,0 +1,59 @@
+import time
+import pytest
+from core.clock import ScaledClock
+from core.scheduler import FixedRateScheduler, LatencyHistogram
+
+def test_fixed_rate_does_not_drift():
+    scheduler = FixedRateScheduler(interval=0.02)
+    start = time.monotonic()
+    # Each tick costs half the interval; sleep-after-work would take ~0.6s
+    scheduler.run(lambda: time.sleep(0.01), max_ticks=20)
+    elapsed = time.monotonic() - start
+
+    assert scheduler.stats.ticks == 20
+    assert elapsed < 20 * 0.02 + 0.05
+    assert scheduler.stats.overruns == 0
+
+def test_skip_policy_drops_missed_ticks():
+    scheduler = FixedRateScheduler(interval=0.01, policy="skip")
+    scheduler.run(lambda: time.sleep(0.025), max_ticks=4)
+
+    stats = scheduler.stats.report()
+    assert stats["overruns"] == 4
+    assert stats["skipped"] >= 4
+
+def test_catch_up_policy_bounds_backlog():
+    scheduler = FixedRateScheduler(interval=0.01, policy="catch_up", max_catch_up=1)
+    calls = []
+
+    def slow_first():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            time.sleep(0.055)
+
+    scheduler.run(slow_first, max_ticks=3)
+    # One missed tick runs immediately, the remaining backlog is skipped
+    assert calls[1] - calls[0] < 0.065
+    assert scheduler.stats.skipped >= 4
+
+def test_rates_on_scheduler_and_wall_clock():
+    # One simulated second per tick, at ten simulated seconds per real second
+    scheduler = FixedRateScheduler(interval=1.0, clock=ScaledClock(scale=10.0))
+    scheduler.run(lambda: None, max_ticks=5)
+
+    stats = scheduler.stats.report()
+    assert stats["effective_hz"] == pytest.approx(1.0, rel=0.1)
+    assert stats["wall_hz"] == pytest.approx(10.0, rel=0.2)
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        FixedRateScheduler(policy="bogus")
+
+def test_histogram_percentiles():
+    hist = LatencyHistogram()
+    for ms in (0.5, 3, 3, 3, 40):
+        hist.record(ms / 1000.0)
+    report = hist.report()
+    assert report["buckets"]["<=5"] == 3
+    assert report["p50"] == 5.0
+    assert report["max"] == pytest.approx(40.0)
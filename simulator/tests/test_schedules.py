@@ -0,0 +1,74 @@
+import datetime
+from core.registry import SensorRegistry
+from core.schedules import ScheduleEngine, load_schedules, parse_time
+from core.sensors import Sensor
+
+CONFIG = {
+    "calendars": {"holidays": {"dates": ["2026-12-25"], "ranges": [["2026-12-30", "2026-12-31"]]}},
+    "schedules": {
+        "setpoint": {
+            "target": "building_1_setpoint",
+            "priority": 12,
+            "weekly": {"weekdays": [["07:00", 21.0], ["18:00", None]], "friday": [["07:00", 20.0]]},
+            "exceptions": [{"calendar": "holidays", "events": []}],
+        },
+    },
+}
+
+def at(text):
+    return datetime.datetime.fromisoformat(text).timestamp()
+
+def make_engine(config=CONFIG, count=1):
+    registry = SensorRegistry()
+    for n in range(1, count + 1):
+        registry.add(Sensor(f"building_{n}_setpoint", "C", 19.0, 10, 30))
+    schedules, _ = load_schedules(config)
+    return registry, ScheduleEngine(registry, schedules)
+
+def test_parse_time():
+    assert parse_time("07:30") == 27000
+    assert parse_time("23:59:59") == 86399
+
+def test_transitions_write_priority_array():
+    registry, engine = make_engine()
+    sensor = registry.get_sensor("building_1_setpoint")
+    engine.start(at("2026-12-21T06:00:00"))  # Monday
+    assert sensor.priority_array[11] is None
+    assert engine.next_due() == at("2026-12-21T07:00:00")
+
+    assert engine.run_due(at("2026-12-21T06:59:59")) == 0
+    assert engine.run_due(at("2026-12-21T07:00:00")) == 1
+    assert sensor.priority_array[11] == 21.0
+    assert engine.next_due() == at("2026-12-21T18:00:00")
+
+    # A None event relinquishes the schedule's slot
+    engine.run_due(at("2026-12-21T18:00:05"))
+    assert sensor.priority_array[11] is None
+    assert engine.next_due() == at("2026-12-22T00:00:00")
+    entry = registry.journal.query(protocol="schedule")[-1]
+    assert (entry["target"], entry["priority"], entry["value"]) == ("setpoint", 12, None)
+
+def test_day_override_and_calendar_exception():
+    registry, engine = make_engine()
+    sensor = registry.get_sensor("building_1_setpoint")
+    engine.start(at("2026-12-25T12:00:00"))  # Friday, but a holiday
+    assert sensor.priority_array[11] is None
+
+    engine.run_due(at("2026-12-26T00:00:00"))  # Saturday: no events
+    engine.run_due(at("2026-12-28T07:00:00"))
+    assert sensor.priority_array[11] == 21.0
+    engine.run_due(at("2027-01-01T07:00:00"))  # Friday
+    assert sensor.priority_array[11] == 20.0
+
+def test_idle_ticks_touch_no_schedules():
+    config = {"schedules": {f"s{n}": {"target": f"building_{n}_setpoint", "weekly": {"daily": [["00:00", 22.0]]}}
+                            for n in range(1, 2001)}}
+    registry, engine = make_engine(config, count=2000)
+    engine.start(at("2026-12-21T09:00:00"))
+    assert all(s.priority_array[15] == 22.0 for s in registry.sensors.values())
+
+    # Midnight re-evaluates every schedule but the value in force has not changed
+    assert engine.run_due(at("2026-12-21T23:00:00")) == 0
+    assert engine.run_due(at("2026-12-22T00:00:00")) == 0
+    assert engine.next_due() == at("2026-12-23T00:00:00")
+    assert len(engine.heap) == 2000
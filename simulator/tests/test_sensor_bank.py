@@ -0,0 +1,84 @@
+import time
+import numpy as np
+import pytest
+from core.registry import SensorRegistry
+from core.sensor_bank import SensorBank
+from core.sensors import Sensor
+import core.clock
+
+DETERMINISTIC = [
+    dict(simulation_type="ramp", noise=0.0),
+    dict(simulation_type="step"),
+    dict(simulation_type="sawtooth", noise=0.0, period=30),
+    dict(simulation_type="square_wave", period=20),
+    dict(simulation_type="triangle_wave", noise=0.0, period=60),
+    dict(simulation_type="pulse", period=10, pulse_width=2),
+    dict(simulation_type="sine", noise=0.0),
+]
+
+@pytest.mark.parametrize("offset", [0.0, 3.7, 17.2, 44.9])
+def test_bank_matches_scalar_update(monkeypatch, offset):
+    now = time.time() + offset
+    monkeypatch.setattr(core.clock.time, "time", lambda: now)
+
+    scalar = [Sensor(f"s{i}", "C", 20.0, 10.0, 30.0, **kw) for i, kw in enumerate(DETERMINISTIC)]
+    banked = [Sensor(f"s{i}", "C", 20.0, 10.0, 30.0, **kw) for i, kw in enumerate(DETERMINISTIC)]
+    for a, b in zip(scalar, banked):
+        a.t0 = b.t0 = now - 100.0
+
+    SensorBank(banked).update(now)
+    for a, b in zip(scalar, banked):
+        assert b.value == pytest.approx(a.update()), a.simulation_type
+
+def test_bank_random_types_stay_in_range():
+    sensors = [
+        Sensor(f"{t}_{i}", "u", 50.0, 0.0, 100.0, noise=5.0, simulation_type=t)
+        for t in ("random_walk", "random_spike", "random_binary")
+        for i in range(50)
+    ]
+    bank = SensorBank(sensors)
+    for _ in range(20):
+        bank.update()
+    for s in sensors:
+        assert 0.0 <= s.value <= 100.0
+    walkers = [s for s in sensors if s.simulation_type == "random_walk"]
+    assert all(s.last_val == s.value for s in walkers)
+
+def test_bank_respects_priority_and_fault():
+    pinned = Sensor("pinned", "C", 20.0, 0.0, 100.0)
+    frozen = Sensor("frozen", "C", 20.0, 0.0, 100.0)
+    pinned.set_priority(42.0, 8)
+    frozen.set_fault("freeze", 7.0)
+
+    SensorBank([pinned, frozen]).update()
+    assert pinned.value == 42.0
+    assert frozen.value == 7.0
+
+def test_registry_uses_bank_when_enabled():
+    registry = SensorRegistry(use_bank=True)
+    registry.add(Sensor("temp", "C", 20.0, 0.0, 100.0, simulation_type="sawtooth", period=60))
+    registry.add(Sensor("custom", "u", 5.0, 0.0, 10.0, simulation_type="custom"))
+
+    registry.update_all()
+    assert len(registry._bank) == 1
+    assert registry._bank.fallback == [registry.get_sensor("custom")]
+    assert 0.0 <= registry.get_sensor("temp").value <= 100.0
+
+def test_partial_update_evaluates_only_due_members(monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(core.clock.time, "time", lambda: now)
+    sensors = [Sensor(f"s{i}", "C", 20.0, 10.0, 30.0, simulation_type="ramp", noise=0.0) for i in range(6)]
+    scalar = Sensor("scalar", "C", 20.0, 10.0, 30.0, simulation_type="ramp", noise=0.0)
+    for s in sensors + [scalar]:
+        s.t0 = now - 15.0
+    bank = SensorBank(sensors)
+    sensors[4].set_priority(12.5, 8)
+    assert bank.groups[0].overridden.tolist() == [False, False, False, False, True, False]
+
+    bank.update(now, due=np.array([4, 1]))
+    assert sensors[1].value == pytest.approx(scalar.update())
+    assert sensors[4].value == 12.5
+    assert [s.value for i, s in enumerate(sensors) if i not in (1, 4)] == [20.0] * 4
+
+    sensors[4].clear_priority(8)
+    assert not bank.groups[0].overridden.any()
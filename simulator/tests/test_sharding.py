@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+import numpy as np
+import pytest
+from core.sharding import RemoteSensor, SharedValueTable, ShardedRegistry, building_of, partition, start_sharded_simulation
+
+def sensor_defs(buildings=4):
+    defs = []
+    for b in range(1, buildings + 1):
+        defs.append({"name": f"building_{b}_temperature", "unit": "C", "base": 22.0, "min": 18.0, "max": 28.0,
+                     "writable": True, "simulation_type": "sine", "noise": 0.1})
+        defs.append({"name": f"building_{b}_motion", "unit": "bool", "base": 0.0, "min": 0.0, "max": 1.0,
+                     "writable": False, "simulation_type": "square_wave", "period": 2})
+    return defs
+
+def wait_for(predicate, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_partition_keeps_buildings_together():
+    shards = partition(sensor_defs(5), 2)
+    assert len(shards) == 2
+    for shard in shards:
+        buildings = {building_of(d["name"]) for d in shard}
+        assert all(sum(building_of(d["name"]) == b for d in shard) == 2 for b in buildings)
+    assert sorted(len(s) for s in shards) == [4, 6]
+
+def test_partition_never_creates_empty_shards():
+    assert len(partition(sensor_defs(1), 4)) == 1
+
+def test_table_read_waits_for_writes_in_progress():
+    table = SharedValueTable(4, 2)
+    try:
+        table.begin_write(1)
+        table.values[2:] = 7.0
+        result = []
+        reader = threading.Thread(target=lambda: result.append(table.read()))
+        reader.start()
+        time.sleep(0.05)
+        # The reader does not return the half-written shard
+        assert not result
+        table.values[3] = 8.0
+        table.end_write(1)
+        reader.join(timeout=2)
+
+        version, values = result[0]
+        assert version == 1
+        assert values.tolist() == [0.0, 0.0, 7.0, 8.0]
+        assert not values.flags.writeable and not np.shares_memory(values, table.values)
+    finally:
+        table.unlink()
+
+@pytest.fixture
+def sharded():
+    registry = start_sharded_simulation(sensor_defs(), workers=2, interval=0.05)
+    yield registry
+    registry.stop()
+
+def test_front_end_tick_checks_only_shards_that_wrote():
+    table = SharedValueTable(4, 2)
+    registry = ShardedRegistry(table, [], [2, 2])
+    for i, d in enumerate(sensor_defs(2)):
+        registry.sensors[d["name"]] = RemoteSensor(registry, i, queue.Queue(), **d)
+    try:
+        registry.publish()
+        # Shard 0's slice changes without a completed write; only shard 1 wrote
+        table.values[0] = 5.0
+        table.begin_write(1)
+        table.values[2:] = [1.0, 0.0]
+        table.end_write(1)
+        registry.update_due()
+        assert registry.snapshot().changed.tolist() == [2]
+        assert registry.snapshot().values[0] == 5.0
+
+        # A full publish checks every sensor
+        table.begin_write(1)
+        table.end_write(1)
+        registry._publish()
+        assert registry.snapshot().changed.tolist() == [0]
+    finally:
+        table.unlink()
+
+def test_sharded_simulation_fills_shared_table(sharded):
+    assert len(sharded.sensors) == 8
+    assert wait_for(lambda: sharded.snapshot().version >= 4)
+
+    snap = sharded.snapshot()
+    assert 18.0 <= snap["building_3_temperature"] <= 28.0
+    assert not snap.values.flags.writeable
+    # Snapshots are copies: later ticks do not change them
+    before = snap.values.copy()
+    assert wait_for(lambda: sharded.snapshot().version > snap.version)
+    assert np.array_equal(snap.values, before)
+    assert all(row["ticks"] > 0 for row in sharded.shard_stats())
+
+def test_writes_and_faults_are_routed_to_owning_shard(sharded):
+    sharded.get_sensor("building_2_temperature").set_priority(25.5, 8)
+    sharded.get_sensor("building_4_temperature").fault = {"type": "freeze", "value": 19.0}
+
+    assert wait_for(lambda: sharded.get("building_2_temperature") == 25.5)
+    assert wait_for(lambda: sharded.get("building_4_temperature") == 19.0)
+
+    sharded.get_sensor("building_2_temperature").clear_priority(8)
+    assert wait_for(lambda: sharded.get("building_2_temperature") != 25.5)
+
+def test_front_end_loop_notifies_subscribers_without_readers(sharded):
+    seen = []
+    sharded.subscribe(lambda snap: seen.append(snap.version))
+    assert wait_for(lambda: len(seen) >= 3)
+    assert seen == sorted(set(seen))
+
+    # With the front-end loop stopped, reads neither publish newer ticks nor notify
+    sharded.scheduler.stop()
+    time.sleep(0.1)
+    snap, count = sharded.snapshot(), len(seen)
+    version = sharded.table.read()[0]
+    assert wait_for(lambda: sharded.table.read()[0] > version)
+    assert sharded.snapshot() is snap
+    assert len(seen) == count
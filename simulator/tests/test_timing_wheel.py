@@ -0,0 +1,47 @@
+import pytest
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+from core.timing_wheel import UpdateWheel
+
+def test_wheel_spreads_slow_sensors_across_ticks():
+    # 2 sensors every tick, 6 sensors every 3 ticks
+    wheel = UpdateWheel([1.0, 1.0] + [3.0] * 6, tick_interval=1.0)
+    counts = {i: 0 for i in range(8)}
+    per_tick = []
+    for _ in range(6):
+        due = wheel.advance().tolist()
+        per_tick.append(len(due))
+        for i in due:
+            counts[i] += 1
+
+    assert per_tick == [4, 4, 4, 4, 4, 4]
+    assert counts[0] == counts[1] == 6
+    assert all(counts[i] == 2 for i in range(2, 8))
+
+def test_wheel_every_tick():
+    assert UpdateWheel([1.0, 1.2], tick_interval=1.0).every_tick()
+    assert not UpdateWheel([1.0, 2.0], tick_interval=1.0).every_tick()
+
+def test_wheel_handles_very_long_periods():
+    wheel = UpdateWheel([86400.0], tick_interval=0.01)
+    assert len(wheel.wheels[0][1]) == 1
+    assert wheel.advance().tolist() == [0]
+    assert wheel.advance().tolist() == []
+
+@pytest.mark.parametrize("use_bank", [False, True])
+def test_registry_updates_only_due_sensors(use_bank):
+    registry = SensorRegistry(use_bank=use_bank)
+    fast = registry.add(Sensor("fast", "g", 0.0, 0, 10, simulation_type="sine"))
+    slow = registry.add(Sensor("slow", "%", 50.0, 0, 100, simulation_type="sine", update_period=5.0))
+    registry.configure_rates(1.0)
+
+    calls = {"fast": 0, "slow": 0}
+    for sensor in (fast, slow):
+        sensor.set_priority(1.0, 1)  # force the scalar update() path so calls can be counted
+        sensor.update = (lambda name: lambda: calls.__setitem__(name, calls[name] + 1))(sensor.name)
+
+    for _ in range(10):
+        registry.update_due()
+
+    assert calls == {"fast": 10, "slow": 2}
+    assert registry.min_update_period() == 5.0
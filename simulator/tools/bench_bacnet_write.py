@@ -0,0 +1,76 @@
+from bacpypes.apdu import WritePropertyRequest, SimpleAckPDU
+from bacpypes.app import BIPSimpleApplication
+from bacpypes.constructeddata import Any
+from bacpypes.core import run as bacnet_run, stop, deferred
+from bacpypes.iocb import IOCB
+from bacpypes.local.device import LocalDeviceObject
+from bacpypes.pdu import Address
+from bacpypes.primitivedata import Real
+import argparse
+import threading
+import time
+
+def run(writes=5000, window=16, instances=(5,), priority=16, target="127.0.0.1:47808", local="127.0.0.1:47809"):
+    """
+    WriteProperty/sec against a running simulator: keeps `window` confirmed writes in flight,
+    cycling over the analogValue `instances` (default: building_1_thermostat_setpoint).
+    """
+    device = LocalDeviceObject(objectName="WriteBench", objectIdentifier=599999, maxApduLengthAccepted=1024,
+                               segmentationSupported="noSegmentation", vendorIdentifier=15)
+    app = BIPSimpleApplication(device, local)
+    address = Address(target)
+    done = threading.Event()
+    counts = {"sent": 0, "acked": 0, "errors": 0}
+
+    def send():
+        i = counts["sent"]
+        counts["sent"] += 1
+        request = WritePropertyRequest(
+            objectIdentifier=("analogValue", instances[i % len(instances)]),
+            propertyIdentifier="presentValue",
+            propertyValue=Any(Real(20.0 + i % 10)),
+            priority=priority,
+        )
+        request.pduDestination = address
+        iocb = IOCB(request)
+        iocb.add_callback(complete)
+        app.request_io(iocb)
+
+    def complete(iocb):
+        if isinstance(iocb.ioResponse, SimpleAckPDU):
+            counts["acked"] += 1
+        else:
+            counts["errors"] += 1
+        if counts["acked"] + counts["errors"] == writes:
+            done.set()
+        elif counts["sent"] < writes:
+            send()
+
+    def start():
+        for _ in range(min(window, writes)):
+            send()
+
+    loop = threading.Thread(target=bacnet_run, daemon=True)
+    loop.start()
+    started = time.time()
+    deferred(start)
+    finished = done.wait(timeout=max(30.0, writes / 100))
+    elapsed = time.time() - started
+    stop()
+    app.close_socket()
+
+    wps = (counts["acked"] + counts["errors"]) / elapsed
+    print(f"Writes/sec: {wps:.0f} ({counts['acked']} acked, {counts['errors']} errors, window {window})"
+          + ("" if finished else " - timed out"))
+    return wps
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BACnet WriteProperty throughput against the simulator")
+    parser.add_argument("--writes", type=int, default=5000)
+    parser.add_argument("--window", type=int, default=16, help="Confirmed writes kept in flight")
+    parser.add_argument("--instances", type=int, nargs="+", default=[5], help="analogValue instances to write")
+    parser.add_argument("--priority", type=int, default=16)
+    parser.add_argument("--target", default="127.0.0.1:47808")
+    parser.add_argument("--local", default="127.0.0.1:47809", help="Address the benchmark client binds to")
+    args = parser.parse_args()
+    run(args.writes, args.window, args.instances, args.priority, args.target, args.local)
@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import statistics
+import time
+import yaml
+from asyncua import Client, Server
+from asyncua.common.callback import CallbackType
+from core.registry import SensorRegistry
+from core.sensors import Sensor
+from core.sharding import building_of
+from services.opcua_server import AddressSpace
+
+def build_registry(buildings, config_path="config/sensors.yaml"):
+    """`buildings` copies of building_1's sensors from sensors.yaml."""
+    with open(config_path) as f:
+        sensors = yaml.safe_load(f)["sensors"]
+    template = [s for s in sensors if building_of(s["name"]) == "building_1" and s.get("simulation_type") != "derived"]
+    registry = SensorRegistry()
+    for n in range(1, buildings + 1):
+        for s in template:
+            registry.add(Sensor(**dict(s, name=s["name"].replace("building_1_", f"building_{n}_", 1))))
+    registry.update_all()
+    return registry
+
+class Counter:
+    def __init__(self):
+        self.notifications = 0
+
+    def datachange_notification(self, node, val, data):
+        self.notifications += 1
+
+async def bench(buildings, ticks, interval, port):
+    registry = build_registry(buildings)
+    server = Server()
+    await server.init()
+    server.set_endpoint(f"opc.tcp://127.0.0.1:{port}/bench/")
+    idx = await server.register_namespace("urn:bench")
+    space = AddressSpace(server, idx, registry.journal)
+    started = time.perf_counter()
+    await space.build(registry)
+    build_ms = (time.perf_counter() - started) * 1000
+    server.subscribe_server_callback(CallbackType.PostWrite, space.on_write)
+
+    async with server:
+        async with Client(f"opc.tcp://127.0.0.1:{port}/bench/") as client:
+            counter = Counter()
+            subscription = await client.create_subscription(100, counter)
+            await subscription.subscribe_data_change([client.get_node(n) for n in space.nodes.values()])
+            await asyncio.sleep(1.0)
+            counter.notifications = 0
+
+            publish_ms, changed_counts = [], []
+            version = registry.snapshot().version
+            started = time.perf_counter()
+            for _ in range(ticks):
+                registry.update_all()
+                snapshot, changed = registry.changes_since(version)
+                version = snapshot.version
+                t0 = time.perf_counter()
+                params = space.write_values(snapshot, changed)
+                if params is not None:
+                    await server.iserver.attribute_service.write(params)
+                publish_ms.append((time.perf_counter() - t0) * 1000)
+                changed_counts.append(len(changed))
+                await asyncio.sleep(interval)
+            await asyncio.sleep(0.5)
+            elapsed = time.perf_counter() - started
+
+    print(f"{len(space.nodes)} variables in {buildings} buildings (address space built in {build_ms:.0f} ms)")
+    print(f"Changed per tick: {statistics.mean(changed_counts):.0f}; publish per tick: "
+          f"mean {statistics.mean(publish_ms):.1f} ms, max {max(publish_ms):.1f} ms")
+    print(f"Client data changes received: {counter.notifications} ({counter.notifications / elapsed:.0f}/s)")
+    return publish_ms
+
+def run(buildings=100, ticks=20, interval=1.0, port=48420):
+    return asyncio.run(bench(buildings, ticks, interval, port))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OPC-UA publish cost and client notification throughput")
+    parser.add_argument("--buildings", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between simulation ticks")
+    parser.add_argument("--port", type=int, default=48420)
+    args = parser.parse_args()
+    run(args.buildings, args.ticks, args.interval, args.port)
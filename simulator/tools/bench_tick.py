@@ -0,0 +1,47 @@
+import argparse
+import json
+import threading
+import yaml
+from core.registry import SensorRegistry
+from core.scheduler import FixedRateScheduler
+from core.sensors import Sensor
+
+def build_registry(points, use_bank, config_path="config/sensors.yaml"):
+    """Replicates the sensors.yaml templates until `points` sensors exist."""
+    with open(config_path) as f:
+        templates = yaml.safe_load(f)["sensors"]
+
+    registry = SensorRegistry(use_bank=use_bank)
+    copy = 0
+    while len(registry.sensors) < points:
+        for t in templates:
+            if len(registry.sensors) >= points:
+                break
+            s = dict(t, name=f"{t['name']}_{copy}")
+            registry.add(Sensor(**s))
+        copy += 1
+    return registry
+
+def run(points=100000, hz=1.0, seconds=10, policy="catch_up", use_bank=True):
+    registry = build_registry(points, use_bank)
+    scheduler = FixedRateScheduler(1.0 / hz, policy)
+    ticks = int(seconds * hz)
+
+    worker = threading.Thread(target=scheduler.run, args=(registry.update_all, ticks))
+    worker.start()
+    worker.join()
+
+    report = scheduler.stats.report()
+    print(f"{points} points @ {hz} Hz ({'bank' if use_bank else 'per-object'}):")
+    print(json.dumps(report, indent=2))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure simulator tick latency at a fixed rate")
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--hz", type=float, default=1.0)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--policy", default="catch_up", choices=FixedRateScheduler.POLICIES)
+    parser.add_argument("--no-bank", action="store_true", help="Use per-object Sensor.update()")
+    args = parser.parse_args()
+    run(args.points, args.hz, args.seconds, args.policy, not args.no_bank)
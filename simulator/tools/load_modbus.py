@@ -1,19 +1,77 @@
 from pymodbus.client import ModbusTcpClient
+import argparse
+import os
 import time
+from core.config_cache import load_yaml
+from services.modbus_map import build_indexes, unit_indexes
 
-def run():
-    client = ModbusTcpClient("localhost", port=5020)
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
+MAP_PATH = os.path.join(CONFIG_DIR, "modbus_map.yaml")
+SENSORS_PATH = os.path.join(CONFIG_DIR, "sensors.yaml")
+
+def read(client, unit, count):
+    # The unit-ID keyword was renamed from `slave` to `device_id` in pymodbus 3.10
+    try:
+        return client.read_input_registers(0, count=count, slave=unit)
+    except TypeError:
+        return client.read_input_registers(0, count=count, device_id=unit)
+
+def table_sizes(map_path=MAP_PATH, sensors_path=SENSORS_PATH):
+    """
+    Unit ID -> input registers the server resolves for it (map entries whose sensor exists,
+    split per unit as services/modbus_map.py does), or None when every unit serves the whole map.
+    """
+    if not os.path.exists(map_path) or not os.path.exists(sensors_path):
+        return None
+    modbus_map = load_yaml(map_path) or {}
+    units = modbus_map.get("units")
+    if not units:
+        return None
+    names = [d["name"] for d in (load_yaml(sensors_path) or {}).get("sensors", [])]
+    indexes = build_indexes(modbus_map, {name: i for i, name in enumerate(names)})
+    tables = unit_indexes(indexes, units, names)
+    return {unit: len(table["ir"]) if "ir" in table else 0 for unit, table in tables.items()}
+
+def sweep(reads=10000, count=10, units=None, port=5020, map_path=MAP_PATH):
+    """
+    (reads/sec, failed reads) against the simulator. With `units` (e.g. range(1, 251)), consecutive
+    reads sweep across those unit IDs instead of hammering unit 1. When the map gives units their
+    building's registers, each read is capped at the unit's table, and units without input
+    registers are skipped.
+    """
+    units = list(units) if units else [1]
+    sizes = table_sizes(map_path)
+    if sizes:
+        plan = [(unit, min(count, sizes.get(unit, count))) for unit in units]
+        plan = [(unit, n) for unit, n in plan if n > 0]
+    else:
+        plan = [(unit, count) for unit in units]
+    if not plan:
+        raise ValueError(f"None of unit IDs {units[0]}-{units[-1]} serve input registers")
+    client = ModbusTcpClient("localhost", port=port)
     client.connect()
 
+    errors = 0
     start = time.time()
-    for _ in range(10000):
-        client.read_input_registers(0, count=10)
+    for i in range(reads):
+        rr = read(client, *plan[i % len(plan)])
+        errors += rr.isError()
 
     elapsed = time.time() - start
-    rps = 10000 / elapsed
-    print("Reads/sec:", rps)
+    rps = reads / elapsed
+    print(f"Reads/sec: {rps:.0f} across {len(plan)} unit ID(s), {errors} errors")
     client.close()
-    return rps
+    return rps, errors
+
+def run(reads=10000, count=10, units=None, port=5020):
+    """Reads/sec against the simulator; see `sweep` for the error count."""
+    return sweep(reads, count, units, port)[0]
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Modbus read throughput against the simulator")
+    parser.add_argument("--reads", type=int, default=10000)
+    parser.add_argument("--count", type=int, default=10, help="Registers per read (capped at each unit's table)")
+    parser.add_argument("--units", type=int, default=0, help="Sweep reads across unit IDs 1..N")
+    parser.add_argument("--port", type=int, default=5020)
+    args = parser.parse_args()
+    run(args.reads, args.count, range(1, args.units + 1) if args.units else None, args.port)